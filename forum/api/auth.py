@@ -120,11 +120,16 @@ def search_users_api(request):
     """Search for users API endpoint"""
     try:
         query = request.GET.get('query', '').strip()
-        users = search_users(request.user, query)[:10]
+        page = request.GET.get('page', 1)
+        users_page = search_users(request.user, query, page=page, per_page=10)
 
-        serializer = UserSerializer(users, many=True, context={'request': request})
+        serializer = UserSerializer(users_page.object_list, many=True, context={'request': request})
         
-        return Response({'users': serializer.data})
+        return Response({
+            'users': serializer.data,
+            'page': users_page.number,
+            'has_next': users_page.has_next(),
+        })
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
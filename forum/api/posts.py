@@ -1,14 +1,20 @@
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 import json
 
 from forum.models import Post, Course
-from forum.services.feed_services import get_for_you_posts, get_all_posts, paginate_posts
-from forum.services.search_services import search_posts
+from forum.services.feed_services import get_for_you_posts, get_all_posts, paginate_posts, build_feed_pagination_data
+from forum.services.feed_cache_services import get_cached_all_posts_page
+from forum.services.view_services import record_post_view
+from forum.services.search_services import search_content, suggest, SEARCH_PAGE_SIZE
+from forum.services.search_cache_services import get_cached_search_page, get_search_cache_stats
+from forum.services.related_posts_services import get_related_posts, suggest_related_posts
+from forum.services.poll_tally_services import get_option_voters, POLL_VOTERS_PAGE_SIZE
+from forum.services.poll_vote_services import cast_poll_vote, remove_poll_vote
 from forum.services.post_services import (
     create_post_service,
     update_post_service,
@@ -70,17 +76,18 @@ def for_you_api(request):
     try:
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('limit', 8))
+        cursor = request.GET.get('cursor')
 
-        page_obj = get_for_you_posts(request.user, page, per_page)
+        page_obj = get_for_you_posts(request.user, page, per_page, cursor=cursor)
         
         serializer = PostListSerializer(page_obj.object_list, many=True, context={'request': request})
         
         return Response({
             "posts": serializer.data,
-            "has_next": page_obj.has_next(),
-            "page": page_obj.number,
-            "total_pages": page_obj.paginator.num_pages
+            **build_feed_pagination_data(page_obj, cursor)
         })
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -92,18 +99,26 @@ def all_posts_api(request):
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('limit', 8))
         query = request.GET.get('q', '')
+        sort = request.GET.get('sort', 'recent')
+        cursor = None if query else request.GET.get('cursor')
 
-        page_obj = get_all_posts(request.user, query, page, per_page)
+        if not query:
+            feed_page = get_cached_all_posts_page(request, page, per_page, cursor=cursor, sort=sort)
+            feed_page.pop('post_ids')
+            return Response({**feed_page, "query": query, "sort": sort})
+
+        page_obj = get_all_posts(request.user, query, page, per_page, cursor=cursor, sort=sort)
         
         serializer = PostListSerializer(page_obj.object_list, many=True, context={'request': request})
         
         return Response({
             "posts": serializer.data,
-            "has_next": page_obj.has_next(),
-            "page": page_obj.number,
-            "total_pages": page_obj.paginator.num_pages,
-            "query": query
+            **build_feed_pagination_data(page_obj, cursor),
+            "query": query,
+            "sort": sort
         })
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -122,8 +137,7 @@ def post_detail_api(request, post_id):
             )
         
         serializer = PostDetailSerializer(post, context={'request': request})
-        post.views += 1
-        post.save()
+        record_post_view(post.id, request.user)
         return Response(serializer.data)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -264,6 +278,97 @@ def get_post_share_info_api(request, post_id):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def related_posts_api(request, post_id):
+    """Stored related posts of a post, most similar first"""
+    try:
+        post = get_object_or_404(Post, id=post_id)
+
+        # Check teacher visibility
+        if request.user.is_teacher and not post.allow_teacher:
+            return Response(
+                {'error': "You don't have permission to view this post."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return Response({'related_posts': get_related_posts(post, request.user)}, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def related_posts_suggest_api(request):
+    """Possible duplicates of a post being composed, from its title and courses"""
+    try:
+        title = request.GET.get('title', '')
+        course_ids = request.GET.getlist('courses')
+        if len(course_ids) == 1 and ',' in course_ids[0]:
+            course_ids = course_ids[0].split(',')
+        course_ids = [int(course_id) for course_id in course_ids if course_id.strip()]
+
+        return Response({
+            'related_posts': suggest_related_posts(request.user, title, course_ids),
+            'title': title
+        }, status=status.HTTP_200_OK)
+    except ValueError:
+        return Response({'error': 'Invalid course id'}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def poll_voters_api(request, post_id):
+    """
+    Cursor-paginated voters of one option of a public poll, newest vote first.
+
+    Query params: option (required), cursor, limit (default 20, max 50).
+    """
+    try:
+        from forum.models import Poll
+
+        poll = Poll.objects.filter(id=post_id).first()
+        if poll is None:
+            return Response({'error': 'Poll not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Check teacher visibility
+        if request.user.is_teacher and not poll.allow_teacher:
+            return Response(
+                {'error': "You don't have permission to view this post."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not poll.is_public_voting:
+            return Response({'error': 'Votes on this poll are private.'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            option_id = int(request.GET.get('option', ''))
+            limit = min(max(int(request.GET.get('limit', POLL_VOTERS_PAGE_SIZE)), 1), 50)
+        except ValueError:
+            return Response({'error': 'Invalid option or limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+        option = poll.options.filter(id=option_id).first()
+        if option is None:
+            return Response({'error': 'Option not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            page = get_option_voters(option, cursor=request.GET.get('cursor') or None, per_page=limit)
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'option_id': option.id,
+            'voters': page.object_list,
+            'has_next': page.has_next(),
+            'next_cursor': page.next_cursor
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @authentication_classes([SessionAuthentication, TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -272,7 +377,7 @@ def vote_on_poll_api(request, post_id):
     API endpoint to vote on a poll
     """
     try:
-        from forum.models import Poll, PollVote
+        from forum.models import Poll
         from forum.services.post_services import _check_teacher_visibility
         
         poll = Poll.objects.get(id=post_id)
@@ -280,21 +385,9 @@ def vote_on_poll_api(request, post_id):
         # Check teacher visibility
         _check_teacher_visibility(request.user, poll)
         
-        selected_option_ids = request.data.get('selected_option_ids', [])
-        
-        if not selected_option_ids:
-            return Response({'error': 'No options selected'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if user already voted
-        existing_vote = PollVote.objects.filter(poll=poll, user=request.user).first()
-        if existing_vote:
-            # Update existing vote
-            existing_vote.selected_options.set(selected_option_ids)
-            existing_vote.save(update_fields=['updated_at'])
-        else:
-            # Create new vote
-            poll_vote = PollVote.objects.create(poll=poll, user=request.user)
-            poll_vote.selected_options.set(selected_option_ids)
+        result = cast_poll_vote(poll, request.user, request.data.get('selected_option_ids', []))
+        if 'error' in result:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
         poll_data = serialize_poll_display_data(poll, request=request) or {}
         
@@ -317,7 +410,7 @@ def remove_poll_vote_api(request, post_id):
     API endpoint to remove a vote from a poll
     """
     try:
-        from forum.models import Poll, PollVote
+        from forum.models import Poll
         from forum.services.post_services import _check_teacher_visibility
         
         poll = Poll.objects.get(id=post_id)
@@ -325,12 +418,9 @@ def remove_poll_vote_api(request, post_id):
         # Check teacher visibility
         _check_teacher_visibility(request.user, poll)
         
-        poll_vote = PollVote.objects.filter(poll=poll, user=request.user).first()
-        
-        if not poll_vote:
-            return Response({'error': 'No vote found to remove'}, status=status.HTTP_404_NOT_FOUND)
-        
-        poll_vote.delete()
+        result = remove_poll_vote(poll, request.user)
+        if 'error' in result:
+            return Response(result, status=status.HTTP_404_NOT_FOUND)
 
         poll_data = serialize_poll_display_data(poll, request=request) or {}
 
@@ -349,23 +439,73 @@ def remove_poll_vote_api(request, post_id):
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
 def search_posts_api(request):
-    """Search for posts API endpoint"""
+    """Search for posts API endpoint, cursor-paginated by relevance"""
     try:
         query = request.GET.get('q', '').strip()
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('limit', 8))
-        
-        posts = search_posts(request.user, query)
-        page_obj = paginate_posts(posts, page, per_page)
-        
-        serializer = PostListSerializer(page_obj.object_list, many=True, context={'request': request})
-        
+        cursor = request.GET.get('cursor') or None
+        per_page = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+
+        page_obj = get_cached_search_page(request.user, query, cursor=cursor, per_page=per_page)
+
+        posts_data = PostListSerializer(page_obj.object_list, many=True, context={'request': request}).data
+        for post, post_data in zip(page_obj.object_list, posts_data):
+            post_data['headline'] = post.search_headline
+
         return Response({
-            'posts': serializer.data,
+            'posts': posts_data,
             'has_next': page_obj.has_next(),
-            'page': page_obj.number,
-            'total_pages': page_obj.paginator.num_pages,
+            'next_cursor': page_obj.next_cursor,
             'query': query
         }, status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, TokenAuthentication])
+@permission_classes([IsAdminUser])
+def search_cache_stats_api(request):
+    """Hit rate of the search ranking cache (staff only)"""
+    return Response(get_search_cache_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def search_api(request):
+    """Search posts, solutions and comments, one result per post ranked by its best match"""
+    try:
+        query = request.GET.get('q', '').strip()
+        cursor = request.GET.get('cursor') or None
+        per_page = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+
+        page_obj = search_content(request.user, query, cursor=cursor, per_page=per_page)
+
+        posts_data = PostListSerializer(page_obj.object_list, many=True, context={'request': request}).data
+        results = [
+            {'post': post_data, 'match': post.search_match}
+            for post, post_data in zip(page_obj.object_list, posts_data)
+        ]
+
+        return Response({
+            'results': results,
+            'has_next': page_obj.has_next(),
+            'next_cursor': page_obj.next_cursor,
+            'query': query
+        }, status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def search_suggest_api(request):
+    """Typeahead suggestions (post titles, users, courses) for a search prefix"""
+    try:
+        prefix = request.GET.get('q', '')
+        return Response({**suggest(request.user, prefix), 'query': prefix}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -24,6 +24,7 @@ from forum.services.profile_service import (
     remove_user_experience,
     remove_user_help_request,
 )
+from forum.services.feed_services import build_feed_pagination_data
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +75,7 @@ def get_profile_posts_api(request, username):
     try:
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('limit', 3))
+        cursor = request.GET.get('cursor')
 
         profile_user = get_object_or_404(User, username=username)
         page_obj = get_profile_posts_page(
@@ -81,6 +83,7 @@ def get_profile_posts_api(request, username):
             profile_user=profile_user,
             page=page,
             per_page=per_page,
+            cursor=cursor,
         )
 
         from forum.serializers import PostListSerializer
@@ -88,9 +91,7 @@ def get_profile_posts_api(request, username):
 
         return Response({
             'posts': serializer.data,
-            'has_next': page_obj.has_next(),
-            'page': page_obj.number,
-            'total_pages': page_obj.paginator.num_pages,
+            **build_feed_pagination_data(page_obj, cursor),
             'username': profile_user.username,
             'is_qa_user': profile_user.is_teacher,
         }, status=status.HTTP_200_OK)
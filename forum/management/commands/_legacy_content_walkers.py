@@ -0,0 +1,498 @@
+"""
+Frozen copy of the Editor.js content walkers from before the single-pass
+content compiler, kept only so benchmark_content_compiler has a fixed
+baseline to time against. Do not import from application code and do not
+update it when the compiler changes.
+"""
+import re
+import json
+from html import unescape, escape
+from django.utils.html import strip_tags
+
+PREVIEW_FALLBACK_KEYS = (
+    'text',
+    'content',
+    'caption',
+    'title',
+    'message',
+    'code',
+    'math',
+    'value',
+)
+
+
+def _sanitize_href(href):
+    """
+    Validate and sanitize href attributes to prevent XSS attacks.
+    Allows http, https, mailto, and relative URLs only.
+    """
+    if not href:
+        return None
+    
+    href = href.strip()
+    
+    # Allow relative URLs
+    if href.startswith('/') or href.startswith('#'):
+        return escape(href)
+    
+    # Allow safe protocols
+    if href.startswith(('http://', 'https://', 'mailto:')):
+        # Basic URL validation - check for obvious XSS patterns
+        if 'javascript:' in href.lower() or 'data:' in href.lower():
+            return None
+        return escape(href)
+    
+    return None
+
+
+def _preserve_links_in_html(html_content):
+    """
+    Extract links from HTML while keeping them as proper <a> tags.
+    Strips other HTML tags but preserves <a href="...">text</a> structure.
+    """
+    if not html_content:
+        return ''
+    
+    # Pattern to match <a> tags with href attributes
+    link_pattern = r'<a\s+[^>]*href=["\']([^"\']*)["\'][^>]*>([^<]*)</a>'
+    
+    # Replace all <a> tags with placeholders
+    placeholder_map = {}
+    counter = [0]
+    
+    def replace_link(match):
+        href = match.group(1)
+        text = match.group(2)
+        sanitized_href = _sanitize_href(href)
+        
+        if not sanitized_href:
+            # If href is invalid, just return the text
+            return escape(text)
+        
+        placeholder = f'__LINK_PLACEHOLDER_{counter[0]}__'
+        placeholder_map[placeholder] = f'<a href="{sanitized_href}">{escape(text)}</a>'
+        counter[0] += 1
+        return placeholder
+    
+    # Replace all link tags
+    html_content = re.sub(link_pattern, replace_link, html_content, flags=re.IGNORECASE)
+    
+    # Strip all other HTML tags
+    html_content = strip_tags(html_content)
+    
+    # Unescape HTML entities
+    html_content = unescape(html_content)
+    
+    # Restore the links
+    for placeholder, link_html in placeholder_map.items():
+        html_content = html_content.replace(placeholder, link_html)
+    
+    return html_content
+
+
+def _normalize_preview_text_with_links(value, preserve_newlines=True):
+    """
+    Normalize Editor.js-derived text while preserving <a> tags.
+    Returns HTML-safe text with links preserved.
+    """
+    if value is None:
+        return ''
+
+    text = str(value)
+    text = text.replace('&nbsp;', ' ')
+    text = re.sub(r'<br\s*/?>', '\n' if preserve_newlines else ' ', text, flags=re.IGNORECASE)
+    
+    # Preserve links
+    text = _preserve_links_in_html(text)
+    
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'[\t\f\v ]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+
+    if preserve_newlines:
+        text = re.sub(r'\n{3,}', '\n\n', text)
+    else:
+        text = text.replace('\n', ' ')
+
+    return text.strip()
+
+
+
+def _normalize_preview_text(value, preserve_newlines=True):
+    """Normalize Editor.js-derived text while keeping meaningful line breaks."""
+    if value is None:
+        return ''
+
+    text = str(value)
+    text = text.replace('&nbsp;', ' ')
+    text = re.sub(r'<br\s*/?>', '\n' if preserve_newlines else ' ', text, flags=re.IGNORECASE)
+    text = strip_tags(text)
+    text = unescape(text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'[\t\f\v ]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+
+    if preserve_newlines:
+        text = re.sub(r'\n{3,}', '\n\n', text)
+    else:
+        text = text.replace('\n', ' ')
+
+    return text.strip()
+
+
+def _extract_list_items(items):
+    """Extract text from Editor.js list/checklist item structures."""
+    lines = []
+    if not isinstance(items, list):
+        return lines
+
+    for item in items:
+        if isinstance(item, str):
+            text = _normalize_preview_text(item)
+            if text:
+                lines.append(text)
+            continue
+
+        if not isinstance(item, dict):
+            continue
+
+        text = _normalize_preview_text(item.get('content') or item.get('text') or '')
+        if text:
+            lines.append(text)
+
+        nested_items = item.get('items')
+        if nested_items:
+            lines.extend(_extract_list_items(nested_items))
+
+    return lines
+
+
+def _extract_fallback_fragments(value):
+    """Recursively extract common textual fields from unknown block payloads."""
+    if isinstance(value, str):
+        text = _normalize_preview_text(value)
+        return [text] if text else []
+
+    if isinstance(value, list):
+        fragments = []
+        for item in value:
+            fragments.extend(_extract_fallback_fragments(item))
+        return fragments
+
+    if isinstance(value, dict):
+        fragments = []
+        for key in PREVIEW_FALLBACK_KEYS:
+            if key in value:
+                fragments.extend(_extract_fallback_fragments(value.get(key)))
+        return fragments
+
+    return []
+
+
+def _extract_block_preview_text(block):
+    """Extract previewable text from a single Editor.js block."""
+    if not isinstance(block, dict):
+        return ''
+
+    block_type = block.get('type', '')
+    data = block.get('data', {})
+    if not isinstance(data, dict):
+        return ''
+
+    if block_type in {'paragraph', 'header'}:
+        return _normalize_preview_text(data.get('text', ''))
+
+    if block_type == 'list':
+        return '\n'.join(_extract_list_items(data.get('items', [])))
+
+    if block_type == 'checklist':
+        return '\n'.join(_extract_list_items(data.get('items', [])))
+
+    if block_type == 'quote':
+        fragments = [
+            _normalize_preview_text(data.get('text', '')),
+            _normalize_preview_text(data.get('caption', '')),
+        ]
+        return '\n'.join([fragment for fragment in fragments if fragment])
+
+    if block_type == 'code':
+        return _normalize_preview_text(data.get('code', ''))
+
+    if block_type == 'math':
+        return _normalize_preview_text(
+            data.get('math') or data.get('text') or data.get('formula') or ''
+        )
+
+    if block_type == 'table':
+        rows = []
+        for row in data.get('content', []):
+            if not isinstance(row, list):
+                continue
+            cells = []
+            for cell in row:
+                cell_text = _normalize_preview_text(cell, preserve_newlines=False)
+                if cell_text:
+                    cells.append(cell_text)
+            if cells:
+                rows.append(' | '.join(cells))
+        return '\n'.join(rows)
+
+    if block_type == 'warning':
+        fragments = [
+            _normalize_preview_text(data.get('title', '')),
+            _normalize_preview_text(data.get('message', '')),
+        ]
+        return '\n'.join([fragment for fragment in fragments if fragment])
+
+    if block_type == 'image':
+        return _normalize_preview_text(data.get('caption', ''))
+
+    if block_type == 'delimiter':
+        return ''
+
+    return '\n'.join(_extract_fallback_fragments(data))
+
+
+def _extract_block_preview_html(block):
+    """Extract previewable HTML from a single Editor.js block, preserving links."""
+    if not isinstance(block, dict):
+        return ''
+
+    block_type = block.get('type', '')
+    data = block.get('data', {})
+    if not isinstance(data, dict):
+        return ''
+
+    if block_type in {'paragraph', 'header'}:
+        return _normalize_preview_text_with_links(data.get('text', ''))
+
+    if block_type == 'list':
+        return '\n'.join(_extract_list_items(data.get('items', [])))
+
+    if block_type == 'checklist':
+        return '\n'.join(_extract_list_items(data.get('items', [])))
+
+    if block_type == 'code':
+        return _normalize_preview_text_with_links(data.get('code', ''))
+
+    if block_type == 'math':
+        return _normalize_preview_text_with_links(
+            data.get('math') or data.get('text') or data.get('formula') or ''
+        )
+
+    if block_type == 'image':
+        return _normalize_preview_text_with_links(data.get('caption', ''))
+
+    if block_type == 'delimiter':
+        return ''
+
+    return '\n'.join(_extract_fallback_fragments(data))
+
+
+
+def _coerce_post_content(content):
+    """Parse JSON-string content where possible so block extraction can run."""
+    if isinstance(content, str):
+        stripped = content.strip()
+        if stripped.startswith('{') or stripped.startswith('['):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                return content
+    return content
+
+def process_post_preview(post):
+    """
+    Generate a preview text for a post by extracting and cleaning paragraph blocks from Editor.js content.
+
+    Args:
+        post: Post object with a content attribute (dict or str).
+
+    Returns:
+        str: Concatenated and cleaned preview text.
+    """
+    content = _coerce_post_content(getattr(post, 'content', post))
+
+    if isinstance(content, dict) and 'blocks' in content:
+        block_texts = []
+        for block in content.get('blocks', []):
+            text = _extract_block_preview_text(block)
+            if text:
+                block_texts.append(text)
+
+        if block_texts:
+            return '\n'.join(block_texts)
+
+        # Editor.js payload with no extractable block text should not show serialized JSON.
+        return ''
+
+    if isinstance(content, dict):
+        fragments = _extract_fallback_fragments(content)
+        return '\n'.join(fragments) if fragments else ''
+
+    if isinstance(content, list):
+        fragments = _extract_fallback_fragments(content)
+        return '\n'.join(fragments) if fragments else ''
+
+    return _normalize_preview_text(content)
+
+
+def process_post_preview_html(post):
+    """
+    Generate HTML preview text for a post, preserving links while stripping other HTML tags.
+
+    Args:
+        post: Post object with a content attribute (dict or str).
+
+    Returns:
+        str: Concatenated and cleaned preview HTML with preserved links.
+    """
+    content = _coerce_post_content(getattr(post, 'content', post))
+
+    if isinstance(content, dict) and 'blocks' in content:
+        block_texts = []
+        for block in content.get('blocks', []):
+            text = _extract_block_preview_html(block)
+            if text:
+                block_texts.append(text)
+
+        if block_texts:
+            return '\n'.join(block_texts)
+
+        # Editor.js payload with no extractable block text should not show serialized JSON.
+        return ''
+
+    if isinstance(content, dict):
+        fragments = _extract_fallback_fragments(content)
+        return '\n'.join(fragments) if fragments else ''
+
+    if isinstance(content, list):
+        fragments = _extract_fallback_fragments(content)
+        return '\n'.join(fragments) if fragments else ''
+
+    return _normalize_preview_text_with_links(content)
+
+
+leet_mapping = str.maketrans({
+    '4': 'a', '@': 'a',
+    '8': 'b',
+    '(': 'c', '{': 'c', '[': 'c', '<': 'c',
+    '3': 'e',
+    '6': 'g', '9': 'g',
+    '1': 'i', '!': 'i', '|': 'i',
+    '0': 'o',
+    '5': 's', '$': 's',
+    '7': 't', '+': 't',
+    '2': 'z'
+})
+
+def normalize_text(text):
+    """
+    Normalize text by converting leetspeak, removing special characters, and reducing repeated letters.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: Normalized, lowercase text.
+    """
+    if not text:
+        return ""
+    
+    text = text.translate(leet_mapping)  # Convert leetspeak
+    text = re.sub(r'[^a-zA-Z\s]', '', text)  # Remove non-alphabetic characters, keep spaces
+    text = re.sub(r'\s+', ' ', text).strip()  # Normalize spaces
+    text = re.sub(r'(.)\1{2,}', r'\1', text)  # Reduce repeated letters (e.g., "loooool" -> "lol")
+    
+    return text.lower()
+
+bad_word_list = ['fuck', 'bitch', 'shit', 'ass', 'dick', 'cunt', 'cock', 'pussy']
+bad_word_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, bad_word_list)) + r')\b', re.IGNORECASE)
+
+def detect_bad_words(content):
+    """
+    Detects bad words in plain text or structured Editor.js content.
+    Raises ValueError if bad words are found, specifying the location.
+    """
+    if isinstance(content, str):
+        normalized_text = normalize_text(content)
+        if bad_word_pattern.search(normalized_text):
+            raise ValueError("Bad word detected in text.")
+    
+    elif isinstance(content, dict) and 'blocks' in content:
+        for block in content['blocks']:
+            block_type = block.get("type", "unknown")
+            data = block.get("data", {})
+            
+            text = data.get("text", "")
+            items = data.get("items", [])
+            
+            if text:
+                normalized_text = normalize_text(text)
+                if bad_word_pattern.search(normalized_text):
+                    raise ValueError(f"Bad word detected in block of type '{block_type}'.")
+            
+            for item in items:
+                item_text = normalize_text(item.get("content"))
+                if bad_word_pattern.search(item_text):
+                    raise ValueError(f"Bad word detected in list item in block of type '{block_type}'.")
+    else:
+        raise ValueError("Unsupported content format for bad word detection.")
+
+def extract_files_from_editorjs_content(content):
+    """
+    Extract file URLs from EditorJS content blocks.
+    
+    Args:
+        content: EditorJS content (dict with 'blocks' key or similar structure)
+        
+    Returns:
+        list: List of file URLs found in the content
+    """
+    file_urls = []
+    
+    if not isinstance(content, dict):
+        return file_urls
+    
+    blocks = content.get('blocks', [])
+    if not isinstance(blocks, list):
+        return file_urls
+    
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+            
+        block_type = block.get('type', '')
+        block_data = block.get('data', {})
+        
+        if block_type == 'image':
+            # Image data can be in 'file' or 'url' field
+            image_url = block_data.get('file', {}).get('url') or block_data.get('url')
+            if image_url:
+                file_urls.append(image_url)
+    
+    return file_urls
+
+
+def get_first_image_url(content):
+    """Post.get_first_image_url as it was, taking the content directly."""
+    try:
+        if isinstance(content, str):
+            content = json.loads(content)
+
+        if not isinstance(content, dict) or 'blocks' not in content:
+            return None
+
+        for block in content.get('blocks', []):
+            if isinstance(block, dict) and block.get('type') == 'image':
+                if 'data' in block and 'file' in block['data']:
+                    file_data = block['data']['file']
+                    if isinstance(file_data, dict) and 'url' in file_data:
+                        return file_data['url']
+                    elif isinstance(file_data, str):
+                        return file_data
+
+        return None
+
+    except (json.JSONDecodeError, AttributeError, TypeError):
+        return None
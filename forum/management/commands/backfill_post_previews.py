@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from forum.services.post_services import backfill_post_previews_service
+from forum.services.utils import PREVIEW_VERSION
+
+
+class Command(BaseCommand):
+    help = 'Regenerate stored post previews that were rendered by an older preview version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts regenerated per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate every post, even those already at the current preview version'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilling post previews to version {PREVIEW_VERSION}...')
+        )
+
+        try:
+            updated = backfill_post_previews_service(
+                batch_size=options['batch_size'],
+                force=options['force'],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Regenerated previews for {updated} posts')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Error backfilling post previews: {str(e)}')
+            )
+            raise
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from forum.services.search_services import backfill_search_text
+
+
+class Command(BaseCommand):
+    help = 'Index existing solutions and comments for search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows indexed per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-index every solution and comment, not just those never indexed'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Indexing solutions and comments for search...'))
+
+        try:
+            updated = backfill_search_text(
+                batch_size=options['batch_size'],
+                force=options['force'],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✓ Indexed {updated['solutions']} solutions and {updated['comments']} comments"
+                )
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Error indexing search text: {str(e)}')
+            )
+            raise
@@ -0,0 +1,117 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from forum.services.content_compiler import compile_post_content
+from forum.management.commands import _legacy_content_walkers as legacy
+
+WORDS = (
+    'photosynthesis', 'derivative', 'essay', 'thesis', 'homework', 'lab', 'report',
+    'equation', 'chapter', 'quiz', 'midterm', 'the', 'a', 'how', 'do', 'I', 'solve',
+    'this', 'question', 'about', 'momentum', 'vector', 'French', 'verb', 'tense',
+)
+
+
+def _sentence(rng, length):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    if not words:
+        return ''
+    if rng.random() < 0.3:
+        words[rng.randrange(length)] = '<b>' + rng.choice(WORDS) + '</b>'
+    if rng.random() < 0.3:
+        words[rng.randrange(length)] = f'<a href="https://example.com/{rng.randrange(1000)}">{rng.choice(WORDS)}</a>'
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(length), '&nbsp;<br>')
+    return ' '.join(words)
+
+
+def _block(rng):
+    kind = rng.choices(
+        ('paragraph', 'header', 'list', 'checklist', 'image', 'code', 'math', 'table', 'quote', 'delimiter'),
+        weights=(40, 6, 10, 3, 8, 6, 6, 3, 3, 2),
+    )[0]
+    if kind in ('paragraph', 'header'):
+        return {'type': kind, 'data': {'text': _sentence(rng, rng.randint(5, 40))}}
+    if kind in ('list', 'checklist'):
+        items = [{'content': _sentence(rng, rng.randint(3, 12)), 'items': []} for _ in range(rng.randint(2, 6))]
+        return {'type': kind, 'data': {'style': 'unordered', 'items': items}}
+    if kind == 'image':
+        return {'type': 'image', 'data': {
+            'file': {'url': f'/media/uploads/{rng.randrange(10 ** 6):x}.jpg'},
+            'caption': _sentence(rng, rng.randint(0, 6)),
+        }}
+    if kind == 'code':
+        return {'type': 'code', 'data': {'code': 'for i in range(10):\n    print(i)  # &lt;loop&gt;'}}
+    if kind == 'math':
+        return {'type': 'math', 'data': {'math': r'\frac{d}{dx} x^2 = 2x'}}
+    if kind == 'table':
+        return {'type': 'table', 'data': {'content': [
+            [_sentence(rng, 2) for _ in range(3)] for _ in range(rng.randint(2, 4))
+        ]}}
+    if kind == 'quote':
+        return {'type': 'quote', 'data': {'text': _sentence(rng, 10), 'caption': _sentence(rng, 2)}}
+    return {'type': 'delimiter', 'data': {}}
+
+
+def build_corpus(size, seed=0):
+    """Editor.js payloads shaped like real posts: mostly paragraphs, some lists, images and code."""
+    rng = random.Random(seed)
+    return [
+        {'time': 1700000000000, 'blocks': [_block(rng) for _ in range(rng.randint(1, 12))], 'version': '2.28.2'}
+        for _ in range(size)
+    ]
+
+
+def _separate_walks(content):
+    """The artifacts of a post computed by the pre-compiler functions, one walk each."""
+    legacy.process_post_preview(content)
+    legacy.process_post_preview_html(content)
+    legacy.get_first_image_url(content)
+    legacy.extract_files_from_editorjs_content(content)
+    try:
+        legacy.detect_bad_words(content)
+    except ValueError:
+        pass
+
+
+def _single_pass(content):
+    compile_post_content(content)
+
+
+class Command(BaseCommand):
+    help = 'Time the single-pass content compiler against the pre-compiler per-artifact content walkers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=500,
+            help='Number of generated posts in the corpus (default: 500)'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='Timed passes over the corpus per strategy; the fastest is reported (default: 5)'
+        )
+
+    def _time(self, func, corpus, rounds):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for content in corpus:
+                func(content)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(corpus) * 1e6
+
+    def handle(self, *args, **options):
+        corpus = build_corpus(options['posts'])
+        rounds = options['rounds']
+        self.stdout.write(self.style.SUCCESS(f'Benchmarking {len(corpus)} posts, best of {rounds} rounds...'))
+
+        separate = self._time(_separate_walks, corpus, rounds)
+        single = self._time(_single_pass, corpus, rounds)
+
+        self.stdout.write(f'  pre-compiler walkers:   {separate:8.1f} µs/post')
+        self.stdout.write(f'  single-pass compiler:   {single:8.1f} µs/post')
+        self.stdout.write(self.style.SUCCESS(f'✓ One compile is {separate / single:.1f}x faster than separate calls'))
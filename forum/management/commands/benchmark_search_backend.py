@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from forum.management.commands.benchmark_content_compiler import build_corpus, WORDS
+from forum.models import Post, User
+from forum.services.content_compiler import compile_post_content
+from forum.services.search_backends import PostgresSearchBackend, SQLiteFTS5SearchBackend
+
+BACKENDS = ('sqlite_fts5', 'postgres')
+
+
+def _documents(size, seed):
+    """(post_id, title, preview text) rows built from the content compiler benchmark corpus."""
+    rng = random.Random(seed)
+    return [
+        (post_id, ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).capitalize(),
+         compile_post_content(content).preview_text)
+        for post_id, content in enumerate(build_corpus(size, seed), start=1)
+    ]
+
+
+def _queries(count, seed):
+    rng = random.Random(seed + 1)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) for _ in range(count)]
+
+
+def _percentiles(func, queries):
+    func(queries[0])  # Warm up caches and statement compilation
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+
+class Command(BaseCommand):
+    help = 'Time post search ranking on a generated corpus with the SQLite FTS5 or Postgres backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=BACKENDS, default='sqlite_fts5', help='Backend to time (default: sqlite_fts5)')
+        parser.add_argument('--posts', type=int, default=20000, help='Posts in the corpus (default: 20000)')
+        parser.add_argument('--queries', type=int, default=300, help='Queries to time (default: 300)')
+        parser.add_argument('--limit', type=int, default=10, help='Results ranked per query (default: 10)')
+
+    def _time_sqlite(self, documents, queries, limit):
+        # Runs entirely in an in-memory FTS5 index: no database server needed
+        backend = SQLiteFTS5SearchBackend(':memory:')
+        start = time.perf_counter()
+        backend.index_documents(documents)
+        self.stdout.write(f'  indexed in {time.perf_counter() - start:.2f} s')
+        return _percentiles(lambda query: backend.search(query, limit), queries)
+
+    def _time_postgres(self, documents, queries, limit):
+        backend = PostgresSearchBackend()
+        with transaction.atomic():
+            author = User.objects.create(
+                username='searchbench', school_email='searchbench@wpga.ca', first_name='Search', last_name='Bench'
+            )
+            start = time.perf_counter()
+            Post.objects.bulk_create([
+                Post(title=title, content={'blocks': [{'type': 'paragraph', 'data': {'text': text}}]},
+                     preview_text=text, author=author)
+                for _, title, text in documents
+            ], batch_size=1000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE forum_post')
+            self.stdout.write(f'  indexed in {time.perf_counter() - start:.2f} s')
+
+            timings = _percentiles(
+                lambda query: list(
+                    backend.candidates(Post.objects.all(), query).order_by('-rank', '-id').values_list('id', flat=True)[:limit]
+                ),
+                queries
+            )
+            transaction.set_rollback(True)
+        return timings
+
+    def handle(self, *args, **options):
+        if options['posts'] < 1 or options['queries'] < 2:
+            raise CommandError('✗ --posts must be positive and --queries at least 2')
+
+        documents = _documents(options['posts'], seed=0)
+        queries = _queries(options['queries'], seed=0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Timing {len(queries)} queries over {len(documents)} posts with the {options['backend']} backend..."
+        ))
+
+        if options['backend'] == 'sqlite_fts5':
+            p50, p95 = self._time_sqlite(documents, queries, options['limit'])
+        else:
+            p50, p95 = self._time_postgres(documents, queries, options['limit'])
+
+        self.stdout.write(f'  p50: {p50:6.2f} ms')
+        self.stdout.write(f'  p95: {p95:6.2f} ms')
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete'))
@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from forum.models import Post, User
+from forum.services.search_services import suggest, SUGGEST_P95_BUDGET_MS
+
+SYLLABLES = ('an', 'bel', 'cor', 'da', 'el', 'fin', 'gra', 'ha', 'is', 'jo', 'ka', 'li', 'mo', 'na', 'or', 'pe', 'ri', 'sa', 'ta', 'vi')
+TOPICS = ('Chemistry', 'Calculus', 'Biology', 'History', 'French', 'Physics', 'English', 'Economics', 'Art', 'Music')
+
+
+def _word(rng, syllables):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def _seed(rng, post_count, user_count):
+    users = User.objects.bulk_create([
+        User(
+            username=f'suggestbench{i}',
+            school_email=f'suggestbench{i}@wpga.ca',
+            first_name=_word(rng, 2),
+            last_name=_word(rng, 3),
+        )
+        for i in range(user_count)
+    ], batch_size=1000)
+    Post.objects.bulk_create([
+        Post(
+            title=f'{rng.choice(TOPICS)} {_word(rng, 2)} question {i}',
+            content={'blocks': []},
+            author=rng.choice(users),
+            hot_score=rng.random(),
+        )
+        for i in range(post_count)
+    ], batch_size=1000)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE forum_post')
+        cursor.execute('ANALYZE forum_user')
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/search/suggest latency on seeded data and fail if p95 exceeds the budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000, help='Posts to seed (default: 10000)')
+        parser.add_argument('--users', type=int, default=5000, help='Users to seed (default: 5000)')
+        parser.add_argument('--queries', type=int, default=300, help='Prefixes to time (default: 300)')
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            default=SUGGEST_P95_BUDGET_MS,
+            help=f'Maximum allowed p95 latency in ms (default: {SUGGEST_P95_BUDGET_MS})'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeding {options['posts']} posts and {options['users']} users (rolled back afterwards)..."
+        ))
+
+        timings = []
+        with transaction.atomic():
+            _seed(rng, options['posts'], options['users'])
+
+            prefixes = [
+                rng.choice((rng.choice(TOPICS), _word(rng, 2)))[:rng.randint(2, 6)]
+                for _ in range(options['queries'])
+            ]
+            viewer = AnonymousUser()
+            suggest(viewer, prefixes[0])  # Warm up connection and query compilation
+            for prefix in prefixes:
+                start = time.perf_counter()
+                suggest(viewer, prefix)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            transaction.set_rollback(True)
+
+        p50 = statistics.median(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        self.stdout.write(f'  p50: {p50:6.2f} ms')
+        self.stdout.write(f'  p95: {p95:6.2f} ms (budget {options["budget_ms"]} ms)')
+
+        if p95 > options['budget_ms']:
+            raise CommandError(f'✗ p95 latency {p95:.2f} ms exceeds the {options["budget_ms"]} ms budget')
+        self.stdout.write(self.style.SUCCESS('✓ Suggest latency within budget'))
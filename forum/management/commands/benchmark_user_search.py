@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Greatest
+from django.contrib.postgres.search import TrigramSimilarity
+from forum.models import User
+from forum.services.search_services import normalize_user_query, _ranked_user_ids
+
+SYLLABLES = tuple(
+    onset + vowel + coda
+    for onset in ('b', 'ch', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w', 'z')
+    for vowel in ('a', 'e', 'i', 'o', 'u')
+    for coda in ('', 'n', 'r', 'l')
+)
+
+
+def _word(rng, syllables):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def _seed(rng, start, count):
+    User.objects.bulk_create([
+        User(
+            username=f'usersearchbench{i}',
+            school_email=f'usersearchbench{i}@wpga.ca',
+            first_name=_word(rng, 2),
+            last_name=_word(rng, 3),
+        )
+        for i in range(start, start + count)
+    ], batch_size=1000)
+    with connection.cursor() as cursor:
+        # Merge the GIN pending list as autovacuum would between signups
+        cursor.execute("SELECT gin_clean_pending_list('user_full_name_trgm_gin'::regclass)")
+        cursor.execute('ANALYZE forum_user')
+
+
+def _full_scan(query):
+    """The former search: three similarities over every user row, no limit."""
+    return list(User.objects.annotate(
+        similarity=Greatest(
+            TrigramSimilarity('first_name', query),
+            TrigramSimilarity('last_name', query),
+            TrigramSimilarity(Concat(F('first_name'), Value(' '), F('last_name')), query),
+        )
+    ).filter(similarity__gte=0.1).order_by('-similarity').values_list('id', flat=True))
+
+
+def _percentiles(func, queries):
+    func(queries[0])  # Warm up connection and query compilation
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+
+class Command(BaseCommand):
+    help = 'Measure user search latency as the user table grows (seeded users are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,5000,20000,50000',
+            help='Comma-separated user table sizes to measure at (default: 1000,5000,20000,50000)'
+        )
+        parser.add_argument('--queries', type=int, default=100, help='Queries timed at each size (default: 100)')
+        parser.add_argument(
+            '--skip-full-scan',
+            action='store_true',
+            help='Only time the indexed search, not the former full-scan query'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('✗ --sizes must be a comma-separated list of integers')
+
+        rng = random.Random(0)
+        self.stdout.write(self.style.SUCCESS(f'Timing {options["queries"]} queries at {len(sizes)} table sizes...'))
+        self.stdout.write(f'  {"users":>8}  {"indexed p50":>12}  {"indexed p95":>12}  {"full scan p50":>14}  {"full scan p95":>14}')
+
+        with transaction.atomic():
+            seeded = 0
+            for size in sizes:
+                _seed(rng, seeded, max(size - seeded, 0))
+                seeded = max(size, seeded)
+
+                queries = [
+                    normalize_user_query(rng.choice((
+                        _word(rng, 2)[:rng.randint(2, 4)],
+                        _word(rng, 3),
+                        f'{_word(rng, 2)} {_word(rng, 1)}',
+                    )))
+                    for _ in range(options['queries'])
+                ]
+                # Time the ranking itself; search_users would answer repeats from the cache
+                indexed = _percentiles(_ranked_user_ids, queries)
+                line = f'  {size:>8}  {indexed[0]:>9.2f} ms  {indexed[1]:>9.2f} ms'
+                if not options['skip_full_scan']:
+                    full = _percentiles(_full_scan, queries)
+                    line += f'  {full[0]:>11.2f} ms  {full[1]:>11.2f} ms'
+                self.stdout.write(line)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete, seeded users rolled back'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from forum.services.related_posts_services import backfill_related_posts
+
+
+class Command(BaseCommand):
+    help = 'Compute the stored related posts of existing posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of posts loaded per batch (default: 200)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute every post, not just those never computed'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Computing related posts...'))
+
+        try:
+            computed = backfill_related_posts(
+                batch_size=options['batch_size'],
+                force=options['force'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ Computed related posts for {computed} posts'))
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Error computing related posts: {str(e)}')
+            )
+            raise
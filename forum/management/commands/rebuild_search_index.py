@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from forum.services.search_backends import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the shadow search index of the configured search backend from the posts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts indexed per batch (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if not backend.maintains_shadow_index:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {type(backend).__name__} indexes posts in the database; nothing to rebuild'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilding the {type(backend).__name__} index...'))
+        try:
+            indexed = backend.rebuild(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} posts'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Error rebuilding search index: {str(e)}'))
+            raise
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from forum.services.counter_services import reconcile_post_counters
+from forum.services.poll_vote_services import reconcile_poll_option_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount denormalized post engagement and poll option counters and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post-id',
+            type=int,
+            action='append',
+            dest='post_ids',
+            help='Only reconcile this post (can be given multiple times)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts recounted per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Reconciling post counters...'))
+
+        try:
+            repaired = reconcile_post_counters(
+                post_ids=options.get('post_ids'),
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Repaired counters for {repaired} posts')
+            )
+            repaired_options = reconcile_poll_option_counts(poll_ids=options.get('post_ids'))
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Repaired vote counts for {repaired_options} poll options')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Error reconciling post counters: {str(e)}')
+            )
+            raise
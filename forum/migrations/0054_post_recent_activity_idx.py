@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:47
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0053_post_post_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('last_activity_at', 'created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='post_recent_activity_idx'),
+        ),
+    ]
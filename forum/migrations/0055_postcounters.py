@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0054_post_recent_activity_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounters',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='forum.post')),
+                ('solution_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('like_count', models.IntegerField(default=0)),
+                ('follower_count', models.IntegerField(default=0)),
+                ('poll_vote_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Post Counters',
+                'verbose_name_plural': 'Post Counters',
+            },
+        ),
+        migrations.RunSQL(
+            sql='''
+                INSERT INTO forum_postcounters (
+                    post_id, solution_count, comment_count, like_count,
+                    follower_count, poll_vote_count, updated_at
+                )
+                SELECT
+                    p.id,
+                    (SELECT COUNT(*) FROM forum_solution s WHERE s.post_id = p.id),
+                    (SELECT COUNT(*) FROM forum_comment c
+                        JOIN forum_solution s ON s.id = c.solution_id
+                        WHERE s.post_id = p.id),
+                    (SELECT COUNT(*) FROM forum_postlike l WHERE l.post_id = p.id),
+                    (SELECT COUNT(*) FROM forum_followedpost f WHERE f.post_id = p.id),
+                    (SELECT COUNT(*) FROM forum_pollvote v WHERE v.poll_id = p.id),
+                    NOW()
+                FROM forum_post p
+                ON CONFLICT (post_id) DO NOTHING;
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
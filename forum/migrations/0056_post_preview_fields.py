@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0055_postcounters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='first_image_url',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='preview_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='preview_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='preview_version',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0057_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(models.OrderBy(models.F('hot_score'), descending=True), models.OrderBy(models.F('id'), descending=True), name='post_hot_score_idx'),
+        ),
+    ]
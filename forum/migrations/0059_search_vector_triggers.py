@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# Search vectors are owned by the database: the trigger recomputes them when
+# the indexed columns change and otherwise keeps the stored value, so saves
+# that write a stale in-memory search_vector cannot clobber it.
+POST_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION forum_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+        OR NEW.title IS DISTINCT FROM OLD.title
+        OR NEW.content IS DISTINCT FROM OLD.content
+    THEN
+        NEW.search_vector :=
+            setweight(to_tsvector(COALESCE(NEW.title, '')), 'A') ||
+            setweight(to_tsvector(COALESCE(NEW.content::text, '')), 'B');
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER forum_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON forum_post
+    FOR EACH ROW EXECUTE FUNCTION forum_post_search_vector_update();
+
+UPDATE forum_post SET search_vector =
+    setweight(to_tsvector(COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector(COALESCE(content::text, '')), 'B')
+WHERE search_vector IS NULL;
+"""
+
+REVERSE_POST_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS forum_post_search_vector_trigger ON forum_post;
+DROP FUNCTION IF EXISTS forum_post_search_vector_update();
+"""
+
+USER_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION forum_user_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+        OR NEW.first_name IS DISTINCT FROM OLD.first_name
+        OR NEW.last_name IS DISTINCT FROM OLD.last_name
+    THEN
+        NEW.search_vector :=
+            setweight(to_tsvector(COALESCE(NEW.first_name, '')), 'A') ||
+            setweight(to_tsvector(COALESCE(NEW.last_name, '')), 'A');
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER forum_user_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON forum_user
+    FOR EACH ROW EXECUTE FUNCTION forum_user_search_vector_update();
+
+UPDATE forum_user SET search_vector =
+    setweight(to_tsvector(COALESCE(first_name, '')), 'A') ||
+    setweight(to_tsvector(COALESCE(last_name, '')), 'A')
+WHERE search_vector IS NULL;
+"""
+
+REVERSE_USER_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS forum_user_search_vector_trigger ON forum_user;
+DROP FUNCTION IF EXISTS forum_user_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0058_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.RunSQL(POST_SEARCH_VECTOR_SQL, REVERSE_POST_SEARCH_VECTOR_SQL),
+        migrations.RunSQL(USER_SEARCH_VECTOR_SQL, REVERSE_USER_SEARCH_VECTOR_SQL),
+    ]
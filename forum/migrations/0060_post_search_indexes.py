@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:16
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0059_search_vector_triggers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='post_title_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
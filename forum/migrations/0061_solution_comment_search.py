@@ -0,0 +1,76 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# Same ownership rules as the post trigger (0059): the vector is recomputed
+# only when search_text changes and is otherwise carried over from the row.
+SEARCH_TEXT_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.search_text IS DISTINCT FROM OLD.search_text THEN
+        NEW.search_vector := to_tsvector(COALESCE(NEW.search_text, ''));
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+"""
+
+REVERSE_SEARCH_TEXT_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};
+DROP FUNCTION IF EXISTS {table}_search_vector_update();
+"""
+
+
+def search_text_trigger(table):
+    return migrations.RunSQL(
+        SEARCH_TEXT_TRIGGER_SQL.format(table=table),
+        REVERSE_SEARCH_TEXT_TRIGGER_SQL.format(table=table),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0060_post_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='search_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='solution_search_vector_gin'),
+        ),
+        search_text_trigger('forum_solution'),
+        search_text_trigger('forum_comment'),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:36
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import forum.models.user
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0062_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(forum.models.user.FullName(), name='gin_trgm_ops'), name='user_full_name_trgm_gin'),
+        ),
+    ]
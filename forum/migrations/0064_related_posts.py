@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0063_user_full_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='related_posts_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='forum.post')),
+                ('related_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='forum.post')),
+            ],
+            options={
+                'indexes': [models.Index(models.F('post'), models.OrderBy(models.F('score'), descending=True), name='related_post_score_idx')],
+                'unique_together': {('post', 'related_post')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Walk each thread down from its top-level comment; path segments match Comment.PATH_SEGMENT_WIDTH
+BACKFILL_COMMENT_TREE_SQL = """
+WITH RECURSIVE tree (id, root_id, depth, path) AS (
+    SELECT id, id, 0, lpad(id::text, 12, '0')
+    FROM forum_comment
+    WHERE parent_id IS NULL
+  UNION ALL
+    SELECT comment.id, tree.root_id, tree.depth + 1, tree.path || lpad(comment.id::text, 12, '0')
+    FROM forum_comment comment
+    JOIN tree ON comment.parent_id = tree.id
+)
+UPDATE forum_comment
+SET root_id = tree.root_id, depth = tree.depth, path = tree.path
+FROM tree
+WHERE forum_comment.id = tree.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0064_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, db_collation='C', default=''),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='forum.comment'),
+        ),
+        migrations.RunSQL(BACKFILL_COMMENT_TREE_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['solution', 'path'], name='comment_solution_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root', 'path'], name='comment_root_path_idx'),
+        ),
+    ]
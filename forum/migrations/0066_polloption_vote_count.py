@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:17
+
+from django.db import migrations, models
+
+BACKFILL_OPTION_VOTE_COUNTS_SQL = """
+UPDATE forum_polloption
+SET vote_count = (
+    SELECT COUNT(*)
+    FROM forum_pollvote_selected_options selection
+    WHERE selection.polloption_id = forum_polloption.id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0065_comment_tree_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='polloption',
+            name='vote_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of votes selecting this option (see poll_vote_services)'),
+        ),
+        migrations.RunSQL(BACKFILL_OPTION_VOTE_COUNTS_SQL, migrations.RunSQL.noop),
+    ]
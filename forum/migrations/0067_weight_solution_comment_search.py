@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Solution and comment text is body text, so it is weighted 'B' like post
+# content (0059) instead of defaulting to 'D'; otherwise ts_rank scores
+# every solution and comment fragment far below a post matching the same terms.
+SEARCH_TEXT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.search_text IS DISTINCT FROM OLD.search_text THEN
+        NEW.search_vector := {vector};
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# The trigger keeps the stored vector when search_text is unchanged, so it is
+# switched off while existing rows are rewritten.
+BACKFILL_SQL = """
+ALTER TABLE {table} DISABLE TRIGGER {table}_search_vector_trigger;
+UPDATE {table} SET search_vector = {vector} WHERE search_text IS NOT NULL;
+ALTER TABLE {table} ENABLE TRIGGER {table}_search_vector_trigger;
+"""
+
+WEIGHTED_VECTOR = "setweight(to_tsvector(COALESCE({row}search_text, '')), 'B')"
+UNWEIGHTED_VECTOR = "to_tsvector(COALESCE({row}search_text, ''))"
+
+
+def weigh_search_text(table):
+    def sql(vector):
+        return (
+            SEARCH_TEXT_FUNCTION_SQL.format(table=table, vector=vector.format(row='NEW.'))
+            + BACKFILL_SQL.format(table=table, vector=vector.format(row=''))
+        )
+
+    return migrations.RunSQL(sql(WEIGHTED_VECTOR), sql(UNWEIGHTED_VECTOR))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0066_polloption_vote_count'),
+    ]
+
+    operations = [
+        weigh_search_text('forum_solution'),
+        weigh_search_text('forum_comment'),
+    ]
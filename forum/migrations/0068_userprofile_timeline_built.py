@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:13
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_existing_timelines_built(apps, schema_editor):
+    """Timelines that already have entries were built by the old first-read check."""
+    UserProfile = apps.get_model('forum', 'UserProfile')
+    TimelineEntry = apps.get_model('forum', 'TimelineEntry')
+    UserProfile.objects.filter(
+        Exists(TimelineEntry.objects.filter(user_id=OuterRef('user_id')))
+    ).update(timeline_built=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0067_weight_solution_comment_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='timeline_built',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_timelines_built, migrations.RunPython.noop),
+    ]
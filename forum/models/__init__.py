@@ -1,7 +1,7 @@
 # Re-export all models for backward compatibility
 from .user import User, UserManager, UserProfile
 from .course import Block, Course, CourseAlias, UserCourseExperience, UserCourseHelp
-from .post import Post, StandardPost, SavedPost, FollowedPost, PostLike
+from .post import Post, StandardPost, PostCounters, TimelineEntry, RelatedPost, SavedPost, FollowedPost, PostLike
 from .poll import Poll, PollOption, PollVote
 from .solution import Solution, SavedSolution, Comment, SolutionUpvote, SolutionDownvote, CommentUpvote
 from .schedule import GradebookSnapshot, DailySchedule
@@ -26,6 +26,9 @@ __all__ = [
     # Post models
     'Post',
     'StandardPost',
+    'PostCounters',
+    'TimelineEntry',
+    'RelatedPost',
     'SavedPost',
     'FollowedPost',
     'PostLike',
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import OpClass
 
 
 class Block(models.Model):
@@ -16,6 +18,12 @@ class Course(models.Model):
     # Maximum grade level eligible for this course (e.g., 12). If null, course is available to all grades.
     max_grade = models.IntegerField(null=True, blank=True)
     blocks = models.ManyToManyField(Block, blank=True, related_name='courses')
+
+    class Meta:
+        indexes = [
+            # Case-insensitive prefix lookups for typeahead (see search_services.suggest)
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='course_name_prefix_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name}"
@@ -33,19 +33,13 @@ class Poll(Post):
 
     def get_vote_summary(self):
         """Get summary of poll options with vote counts"""
-        summary = []
-        total_votes = self.votes.count()
-        
-        for option in self.options.all():
-            vote_count = option.votes.count()
-            percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
-            summary.append({
-                'option': option,
-                'vote_count': vote_count,
-                'percentage': percentage
-            })
-        
-        return summary
+        from forum.services.poll_tally_services import get_poll_tally
+        tally = get_poll_tally(self.id)
+        return [{
+            'option': option,
+            'vote_count': tally.vote_count(option.id),
+            'percentage': tally.percentage(option.id)
+        } for option in self.options.all()]
 
 
 class PollOption(models.Model):
@@ -54,6 +48,10 @@ class PollOption(models.Model):
     """
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='options')
     text = models.CharField(max_length=500, help_text="The option text/choice")
+    vote_count = models.IntegerField(
+        default=0,
+        help_text="Denormalized number of votes selecting this option (see poll_vote_services)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
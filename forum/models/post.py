@@ -1,5 +1,8 @@
 from django.db import models
-from django.contrib.postgres.search import SearchVectorField, SearchVector
+from django.db.models import F
+from django.db.models.functions import Coalesce, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
 
 
@@ -19,7 +22,13 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_activity_at = models.DateTimeField(null=True, blank=True)
     author = models.ForeignKey('forum.User', on_delete=models.CASCADE, null=True, blank=True)
+    # Maintained by a database trigger from title and content (migration 0059)
     search_vector = SearchVectorField(null=True, blank=True)
+    # Card previews rendered from content at write time (see services.utils.build_post_preview_fields)
+    preview_text = models.TextField(blank=True, default='')
+    preview_html = models.TextField(blank=True, default='')
+    first_image_url = models.TextField(null=True, blank=True)
+    preview_version = models.PositiveSmallIntegerField(default=0, db_index=True)
     courses = models.ManyToManyField('forum.Course', related_name='posts', blank=True)
     is_anonymous = models.BooleanField(default=False)
     allow_teacher = models.BooleanField(
@@ -28,6 +37,11 @@ class Post(models.Model):
     )
     solved = models.BooleanField(default=False)
     views = models.IntegerField(default=0)
+    # Decayed engagement ranking, recomputed by the recompute_hot_scores task (see services.ranking_services)
+    hot_score = models.FloatField(default=0)
+    hot_score_updated_at = models.DateTimeField(null=True, blank=True)
+    # When the stored RelatedPost list was last computed (see services.related_posts_services)
+    related_posts_computed_at = models.DateTimeField(null=True, blank=True)
     accepted_solution = models.OneToOneField(
         'forum.Solution',
         null=True,
@@ -38,17 +52,38 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination order for activity feeds (see feed_services.paginate_by_cursor)
+            models.Index(
+                Coalesce('last_activity_at', 'created_at').desc(),
+                F('id').desc(),
+                name='post_recent_activity_idx',
+            ),
+            models.Index(F('hot_score').desc(), F('id').desc(), name='post_hot_score_idx'),
+            # Candidate lookups for search (see search_services.ranked_search_candidates)
+            GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='post_title_trgm_gin'),
+            # Case-insensitive prefix lookups for typeahead (see search_services.suggest)
+            models.Index(OpClass(Upper('title'), name='text_pattern_ops'), name='post_title_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
+        from forum.services.utils import PREVIEW_FIELDS
+
+        if self._state.adding and not self.hot_score:
+            from forum.services.ranking_services import compute_hot_score
+            self.hot_score = compute_hot_score(self.created_at)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.refresh_preview_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *PREVIEW_FIELDS}
+
         super().save(*args, **kwargs)
-        search_vector = (
-            SearchVector('title', weight='A') +
-            SearchVector('content', weight='B')
-        )
-        Post.objects.filter(id=self.id).update(search_vector=search_vector)
 
     def get_absolute_url(self):
         """Get URL for this post. Should be overridden in subclasses if needed."""
@@ -64,6 +99,20 @@ class Post(models.Model):
             return False
         return self.likes.filter(user=user).exists()
 
+    def refresh_preview_fields(self):
+        """Recompute the stored preview fields from content without saving"""
+        from forum.services.utils import build_post_preview_fields
+
+        for field, value in build_post_preview_fields(self).items():
+            setattr(self, field, value)
+
+    def get_counters(self):
+        """Return the denormalized engagement counters, or an all-zero unsaved row if none exist yet"""
+        try:
+            return self.counters
+        except PostCounters.DoesNotExist:
+            return PostCounters(post=self)
+
     def get_author(self, ignore_anonymous=False):
         """Return author object with anonymous profile picture if post is anonymous
         
@@ -83,29 +132,9 @@ class Post(models.Model):
     
     def get_first_image_url(self):
         """Extract the first image URL from the post content JSON"""
-        try:
-            import json
-            
-            content = self.content
-            if isinstance(content, str):
-                content = json.loads(content)
-            
-            if not isinstance(content, dict) or 'blocks' not in content:
-                return None
-            
-            for block in content.get('blocks', []):
-                if isinstance(block, dict) and block.get('type') == 'image':
-                    if 'data' in block and 'file' in block['data']:
-                        file_data = block['data']['file']
-                        if isinstance(file_data, dict) and 'url' in file_data:
-                            return file_data['url']
-                        elif isinstance(file_data, str):
-                            return file_data
-            
-            return None
-            
-        except (json.JSONDecodeError, AttributeError, TypeError):
-            return None
+        from forum.services.content_compiler import compile_post_content
+
+        return compile_post_content(self.content).first_image_url
 
 
 class StandardPost(Post):
@@ -118,6 +147,82 @@ class StandardPost(Post):
         verbose_name_plural = "Standard Posts"
 
 
+class PostCounters(models.Model):
+    """
+    Denormalized engagement counts for a post.
+
+    Kept up to date on write by the signal handlers in forum/signals.py so feed
+    cards can read counts without aggregation joins. Drift can be repaired with
+    the reconcile_post_counters management command.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    solution_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    like_count = models.IntegerField(default=0)
+    follower_count = models.IntegerField(default=0)
+    poll_vote_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Post Counters"
+        verbose_name_plural = "Post Counters"
+
+    def __str__(self):
+        return f"Counters for post {self.post_id}"
+
+    @property
+    def total_response_count(self):
+        return self.solution_count + self.comment_count
+
+
+class TimelineEntry(models.Model):
+    """
+    A post fanned out into one user's For You timeline.
+
+    Rows are written when a post is created or edited (see
+    services.timeline_services) and activity_at is bumped on new solutions,
+    comments and poll activity, so the For You feed is a range read on
+    (user, activity_at, post).
+    """
+    user = models.ForeignKey('forum.User', on_delete=models.CASCADE, related_name="timeline_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    activity_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                F('user'), F('activity_at').desc(), F('post').desc(),
+                name='timeline_user_activity_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.user_id}'s timeline"
+
+
+class RelatedPost(models.Model):
+    """
+    One of a post's most similar posts in the same courses.
+
+    Each post's top list is written when it is created or edited and by the
+    compute_related_posts batch command (see services.related_posts_services),
+    so post pages read stored rows instead of running similarity queries.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="related_entries")
+    related_post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('post', 'related_post')
+        indexes = [
+            models.Index(F('post'), F('score').desc(), name='related_post_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.related_post_id} related to {self.post_id}"
+
+
 class SavedPost(models.Model):
     user = models.ForeignKey('forum.User', on_delete=models.CASCADE, related_name="saved_posts")
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="saves")
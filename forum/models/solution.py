@@ -1,4 +1,17 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+
+def _sync_search_text(instance, kwargs):
+    """Refresh instance.search_text from its content when the content is being saved."""
+    from forum.services.content_compiler import compile_post_content
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or 'content' in update_fields:
+        instance.search_text = compile_post_content(instance.content).preview_text
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
 
 
 class Solution(models.Model):
@@ -8,9 +21,21 @@ class Solution(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     upvotes = models.IntegerField(default=0)
     downvotes = models.IntegerField(default=0)
+    # Plain text of content, refreshed on save; search_vector is derived from it by a database trigger
+    search_text = models.TextField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='solution_search_vector_gin'),
+        ]
 
     def __str__(self):
         return f'Solution by {self.author.username} for {self.post.title}'
+
+    def save(self, *args, **kwargs):
+        _sync_search_text(self, kwargs)
+        super().save(*args, **kwargs)
     
     def get_absolute_url(self):
         """
@@ -19,6 +44,9 @@ class Solution(models.Model):
         return f"{self.post.get_absolute_url()}#solution-{self.id}"
     
     def root_comments_count(self):
+        comments = getattr(self, '_prefetched_objects_cache', {}).get('comments')
+        if comments is not None:
+            return sum(1 for comment in comments if comment.parent_id is None)
         return self.comments.filter(parent__isnull=True).count()
 
 
@@ -35,33 +63,61 @@ class SavedSolution(models.Model):
 
 
 class Comment(models.Model):
+    # Digits per id in a comment path; zero-padding keeps paths sortable as strings
+    PATH_SEGMENT_WIDTH = 12
+
     solution = models.ForeignKey(Solution, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey('forum.User', on_delete=models.CASCADE)
     content = models.JSONField() 
     created_at = models.DateTimeField(auto_now_add=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies') 
+    # Position in the thread, set once on creation: the top-level comment of the thread,
+    # the nesting depth, and the ids from the root down to this comment as a sortable path
+    root = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='+', db_index=False
+    )
+    depth = models.PositiveIntegerField(default=0)
+    path = models.TextField(default='', blank=True, db_collation='C')
+    # Plain text of content, refreshed on save; search_vector is derived from it by a database trigger
+    search_text = models.TextField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='comment_search_vector_gin'),
+            models.Index(fields=['solution', 'path'], name='comment_solution_path_idx'),
+            models.Index(fields=['root', 'path'], name='comment_root_path_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author.username}'
-    
-    @property
-    def replies(self):
-        return Comment.objects.filter(parent=self).order_by('created_at')
+
+    @classmethod
+    def path_segment(cls, comment_id):
+        return str(comment_id).zfill(cls.PATH_SEGMENT_WIDTH)
+
+    def save(self, *args, **kwargs):
+        _sync_search_text(self, kwargs)
+        adding = self._state.adding
+        if adding and self.parent_id is not None:
+            self.depth = self.parent.depth + 1
+            self.root_id = self.parent.root_id
+        super().save(*args, **kwargs)
+
+        if adding:
+            # The path ends with the comment's own id, so it is only known after the insert
+            self.path = (self.parent.path if self.parent_id is not None else '') + self.path_segment(self.pk)
+            if self.root_id is None:
+                self.root_id = self.pk
+            Comment.objects.filter(pk=self.pk).update(path=self.path, root_id=self.root_id)
     
     def get_absolute_url(self):
         return f'#comment-{self.id}'
     
     def get_depth(self):
-        """Calculate the nesting depth of this comment"""
-        depth = 0
-        parent = self.parent
-        while parent:
-            depth += 1
-            parent = parent.parent
-        return min(depth, 5)  # Limit maximum nesting depth to 5
+        """Nesting depth of this comment, limited to 5 for display"""
+        return min(self.depth, 5)
 
 
 class SolutionUpvote(models.Model):
@@ -1,7 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
-from django.contrib.postgres.search import SearchVectorField, SearchVector
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django.utils import timezone
 from django.conf import settings
@@ -12,6 +14,21 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class FullName(models.Func):
+    """
+    first_name || ' ' || last_name.
+
+    Unlike CONCAT() the || operator is immutable, so the expression can be
+    indexed and queries using it are served by user_full_name_trgm_gin.
+    """
+    template = '(%(expressions)s)'
+    arg_joiner = ' || '
+    output_field = models.CharField()
+
+    def __init__(self, **extra):
+        super().__init__(models.F('first_name'), models.Value(' '), models.F('last_name'), **extra)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, school_email, first_name, last_name, password=None, **extra_fields):
         if not school_email:
@@ -125,6 +142,15 @@ class User(AbstractUser):
     
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive prefix lookups for typeahead (see search_services.suggest)
+            models.Index(OpClass(Upper('first_name'), name='text_pattern_ops'), name='user_first_name_prefix_idx'),
+            models.Index(OpClass(Upper('last_name'), name='text_pattern_ops'), name='user_last_name_prefix_idx'),
+            # Trigram word-similarity candidate lookups for user search (see search_services.search_users)
+            GinIndex(OpClass(FullName(), name='gin_trgm_ops'), name='user_full_name_trgm_gin'),
+        ]
+
     USERNAME_FIELD = 'school_email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
@@ -134,6 +160,7 @@ class User(AbstractUser):
     def get_absolute_url(self):
         return reverse('profile', args=[str(self.username)])
     
+    # Maintained by a database trigger from first and last name (migration 0059)
     search_vector = SearchVectorField(null=True, blank=True)
 
     def save(self, *args, **kwargs):
@@ -147,11 +174,6 @@ class User(AbstractUser):
                 self.student_id = numbers_only
         
         super().save(*args, **kwargs)
-        search_vector = (
-            SearchVector('first_name', weight='A') +
-            SearchVector('last_name', weight='A')
-        )
-        User.objects.filter(id=self.id).update(search_vector=search_vector)
 
 
 class UserProfile(models.Model):
@@ -217,6 +239,9 @@ class UserProfile(models.Model):
         null=True,
         help_text="Expo push notification token for mobile app notifications"
     )
+
+    # Set once the user's For You timeline has been built (see services.timeline_services)
+    timeline_built = models.BooleanField(default=False)
     
     # User Preferences
     allow_schedule_comparison = models.BooleanField(
@@ -8,6 +8,8 @@ from .user import (
     BlockSerializer,
 )
 from .post import (
+    PostViewerState,
+    overlay_viewer_fields,
     PostListSerializer,
     PostDetailSerializer,
     AnonPostDetailSerializer,
@@ -22,6 +24,7 @@ from .poll import (
     PollOptionSerializer,
     PollSerializer,
     serialize_poll_display_data,
+    serialize_poll_display_data_bulk,
     attach_poll_data_to_posts,
 )
 from .notification import (
@@ -39,6 +42,8 @@ __all__ = [
     'AnonUserSerializer',
     'BlockSerializer',
     # Post serializers
+    'PostViewerState',
+    'overlay_viewer_fields',
     'PostListSerializer',
     'PostDetailSerializer',
     'AnonPostDetailSerializer',
@@ -51,6 +56,7 @@ __all__ = [
     'PollOptionSerializer',
     'PollSerializer',
     'serialize_poll_display_data',
+    'serialize_poll_display_data_bulk',
     'attach_poll_data_to_posts',
     # Notification serializers
     'NotificationSerializer',
@@ -1,93 +1,73 @@
 from rest_framework import serializers
-from forum.models import Poll, PollOption, PollVote
+from forum.models import Poll, PollOption
 from django.conf import settings
 
 ANONYMOUS_PROFILE_PICTURE = f"{settings.MEDIA_URL}profile_pictures/default.png"
 
 
+def serialize_voter(voter):
+    """Public identity of a poll voter, for option avatars and voter lists."""
+    profile_picture_url = ANONYMOUS_PROFILE_PICTURE
+
+    try:
+        user_profile = voter.userprofile
+    except Exception:
+        user_profile = None
+
+    if user_profile is not None:
+        from .user import UserProfileSerializer
+        profile_picture_url = UserProfileSerializer().get_profile_picture(user_profile) or ANONYMOUS_PROFILE_PICTURE
+
+    return {
+        'id': voter.id,
+        'username': voter.username,
+        'full_name': voter.get_full_name() or voter.username,
+        'profile_picture_url': profile_picture_url,
+        'profile_url': voter.get_absolute_url()
+    }
+
+
 class PollOptionSerializer(serializers.ModelSerializer):
-    """Serializer for poll options"""
+    """Serializer for poll options. Full voter lists are paged by the poll voters API."""
     vote_count = serializers.SerializerMethodField()
     percentage = serializers.SerializerMethodField()
     user_voted = serializers.SerializerMethodField()
     recent_voters = serializers.SerializerMethodField()
-    voters = serializers.SerializerMethodField()
     
     class Meta:
         model = PollOption
-        fields = ['id', 'text', 'vote_count', 'percentage', 'user_voted', 'recent_voters', 'voters']
+        fields = ['id', 'text', 'vote_count', 'percentage', 'user_voted', 'recent_voters']
 
-    def _serialize_voter(self, voter, profile_serializer):
-        profile_picture_url = ANONYMOUS_PROFILE_PICTURE
+    def _get_tally(self, obj):
+        """The poll's tally, passed down by PollSerializer or counted for a standalone option."""
+        tally = self.context.get('tally')
+        if tally is None:
+            from forum.services.poll_tally_services import get_poll_tally
+            request = self.context.get('request')
+            tally = self.context['tally'] = get_poll_tally(obj.poll_id, getattr(request, 'user', None))
+        return tally
 
-        try:
-            user_profile = voter.userprofile
-        except Exception:
-            user_profile = None
-
-        if user_profile is not None:
-            profile_picture_url = profile_serializer.get_profile_picture(user_profile) or ANONYMOUS_PROFILE_PICTURE
-
-        return {
-            'id': voter.id,
-            'username': voter.username,
-            'full_name': voter.get_full_name() or voter.username,
-            'profile_picture_url': profile_picture_url,
-            'profile_url': voter.get_absolute_url()
-        }
-    
     def get_vote_count(self, obj):
-        """Get the number of votes for this option"""
-        return obj.votes.count()
+        """Get the number of votes for this option from the poll's tally"""
+        return self._get_tally(obj).vote_count(obj.id)
     
     def get_percentage(self, obj):
         """Get the percentage of votes for this option"""
-        poll = obj.poll
-        total_votes = poll.votes.count()
-        if total_votes == 0:
-            return 0
-        return round((obj.votes.count() / total_votes) * 100, 2)
+        return round(self._get_tally(obj).percentage(obj.id), 2)
     
     def get_user_voted(self, obj):
-        """Check if the current user voted for this option using cached PollVote from context."""
-        user_vote = self.context.get('user_vote')
-        
-        # If no user_vote in context, user is not authenticated or didn't vote
-        if user_vote is None:
-            return False
-        
-        # Check if this option is in the user's selected options
-        return user_vote.selected_options.filter(id=obj.id).exists()
+        """Check if the current user voted for this option using the poll's tally"""
+        return obj.id in self._get_tally(obj).selected_option_ids
 
     def get_recent_voters(self, obj):
         """Get up to three most recent voters for this option when voting is public."""
-        if not obj.poll.is_public_voting:
-            return []
-
-        recent_votes = obj.votes.select_related('user', 'user__userprofile').order_by('-updated_at')[:3]
-        from .user import UserProfileSerializer
-        profile_serializer = UserProfileSerializer(context=self.context)
-        recent_voters = []
-
-        for vote in recent_votes:
-            recent_voters.append(self._serialize_voter(vote.user, profile_serializer))
-
-        return recent_voters
-
-    def get_voters(self, obj):
-        """Get all voters for this option when voting is public."""
-        if not obj.poll.is_public_voting:
-            return []
-
-        votes = obj.votes.select_related('user', 'user__userprofile').order_by('-updated_at')
-        from .user import UserProfileSerializer
-        profile_serializer = UserProfileSerializer(context=self.context)
-        voters = []
-
-        for vote in votes:
-            voters.append(self._serialize_voter(vote.user, profile_serializer))
-
-        return voters
+        recent_voters = self.context.get('recent_voters')
+        if recent_voters is None:
+            if not obj.poll.is_public_voting:
+                return []
+            from forum.services.poll_tally_services import get_recent_voters
+            recent_voters = self.context['recent_voters'] = get_recent_voters([obj.poll_id])[obj.poll_id]
+        return recent_voters.get(obj.id, [])
 
 
 class PollSerializer(serializers.ModelSerializer):
@@ -100,28 +80,45 @@ class PollSerializer(serializers.ModelSerializer):
         model = Poll
         fields = ['poll_options', 'poll_info', 'user_vote']
 
+    def _get_tally(self, obj):
+        """Vote counts and the request user's selections, from context['poll_tallies'] when preloaded."""
+        tallies = self.context.get('poll_tallies')
+        if tallies is not None and obj.id in tallies:
+            return tallies[obj.id]
+
+        if not hasattr(self, '_tally_cache'):
+            self._tally_cache = {}
+        if obj.id not in self._tally_cache:
+            from forum.services.poll_tally_services import get_poll_tally
+            request = self.context.get('request')
+            self._tally_cache[obj.id] = get_poll_tally(obj.id, getattr(request, 'user', None))
+        return self._tally_cache[obj.id]
+
+    def _get_recent_voters(self, obj):
+        """Newest voters per option of a public poll, from context['poll_recent_voters'] when preloaded."""
+        if not obj.is_public_voting:
+            return {}
+
+        preloaded = self.context.get('poll_recent_voters')
+        if preloaded is not None and obj.id in preloaded:
+            return preloaded[obj.id]
+
+        from forum.services.poll_tally_services import get_recent_voters
+        return get_recent_voters([obj.id])[obj.id]
+
     def get_poll_info(self, obj):
         return {
             'allow_multiple_choice': obj.allow_multiple_choice,
             'is_public_voting': obj.is_public_voting,
-            'total_votes': obj.votes.count()
+            'total_votes': self._get_tally(obj).total_votes
         }
 
     def get_poll_options(self, obj):
-        """Fetch user's vote once and pass it to child serializer to avoid N+1 queries."""
-        request = self.context.get('request')
-        user_vote = None
-        
-        if request and request.user.is_authenticated:
-            try:
-                user_vote = PollVote.objects.get(poll=obj, user=request.user)
-            except PollVote.DoesNotExist:
-                pass
-        
-        # Create child serializer context with cached user_vote
+        """Serialize options against the poll's tally so counts and selections cost no queries."""
         child_context = self.context.copy()
-        child_context['user_vote'] = user_vote
+        child_context['tally'] = self._get_tally(obj)
         child_context['poll_id'] = obj.id
+        child_context['recent_voters'] = self._get_recent_voters(obj)
         
         serializer = PollOptionSerializer(
             obj.options.all(),
@@ -131,18 +128,45 @@ class PollSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_user_vote(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
+        tally = self._get_tally(obj)
+        if tally.user_vote_id is None:
             return None
 
-        try:
-            poll_vote = PollVote.objects.get(poll=obj, user=request.user)
-            return {
-                'id': poll_vote.id,
-                'selected_option_ids': list(poll_vote.selected_options.values_list('id', flat=True))
-            }
-        except PollVote.DoesNotExist:
-            return None
+        return {
+            'id': tally.user_vote_id,
+            'selected_option_ids': list(tally.selected_option_ids)
+        }
+
+
+def _poll_display_queryset():
+    """Polls with their options preloaded for PollSerializer."""
+    return Poll.objects.prefetch_related('options')
+
+
+def serialize_poll_display_data_bulk(posts, request=None):
+    """
+    Build poll display payloads for many posts in a fixed number of queries.
+
+    Returns:
+        dict: {post_id: poll payload} for the posts that are polls.
+    """
+    poll_ids = [
+        post.id for post in posts
+        if isinstance(post, Poll) or getattr(post, 'post_type', None) == 'poll'
+    ]
+    if not poll_ids:
+        return {}
+
+    from forum.services.poll_tally_services import get_poll_tallies, get_recent_voters
+    polls = list(_poll_display_queryset().filter(post_ptr_id__in=poll_ids))
+    context = {
+        'poll_tallies': get_poll_tallies(poll_ids, getattr(request, 'user', None)),
+        'poll_recent_voters': get_recent_voters([poll.id for poll in polls if poll.is_public_voting]),
+    }
+    if request is not None:
+        context['request'] = request
+
+    return {poll.id: PollSerializer(poll, context=context).data for poll in polls}
 
 
 def serialize_poll_display_data(post_or_poll, request=None):
@@ -150,18 +174,7 @@ def serialize_poll_display_data(post_or_poll, request=None):
     if not post_or_poll:
         return None
 
-    poll = post_or_poll if isinstance(post_or_poll, Poll) else None
-
-    if poll is None:
-        if getattr(post_or_poll, 'post_type', None) != 'poll':
-            return None
-        try:
-            poll = Poll.objects.get(post_ptr_id=post_or_poll.id)
-        except Poll.DoesNotExist:
-            return None
-
-    context = {'request': request} if request is not None else {}
-    return PollSerializer(poll, context=context).data
+    return serialize_poll_display_data_bulk([post_or_poll], request=request).get(post_or_poll.id)
 
 
 def attach_poll_data_to_posts(posts, serialized_posts):
@@ -1,10 +1,209 @@
+import copy
 from rest_framework import serializers
-from forum.models import Post
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
+from forum.models import Post, PostCounters, PostLike, FollowedPost, UserCourseExperience, UserCourseHelp
 from django.utils.timezone import localtime
-from forum.services.utils import process_post_preview, process_post_preview_html
+from forum.services.utils import ensure_post_previews
 from .user import AnonUserSerializer, UserSerializer
 
 
+class PostViewerState:
+    """
+    Viewer-specific state for a page of posts, loaded in a fixed number of queries.
+
+    Holds the requesting user's likes, follows and course flags plus the poll
+    payloads for every post on the page, so PostListSerializer can read them
+    from memory instead of querying per post.
+    """
+
+    def __init__(self, posts, request=None):
+        from .poll import serialize_poll_display_data_bulk
+
+        self._load_viewer_sets([post.id for post in posts], request)
+        prefetch_related_objects(posts, 'author__userprofile', 'courses__blocks', 'counters')
+        self.poll_data = serialize_poll_display_data_bulk(posts, request=request)
+        self._author_data = {}
+
+    @classmethod
+    def for_post_ids(cls, post_ids, request=None):
+        """
+        Viewer sets plus current like and follower counts, without poll or
+        author payloads, for overlaying cached cards.
+        """
+        state = cls.__new__(cls)
+        state._load_viewer_sets(post_ids, request)
+        state.engagement_counts = {
+            post_id: (like_count, follower_count)
+            for post_id, like_count, follower_count in PostCounters.objects.filter(
+                post_id__in=post_ids
+            ).values_list('post_id', 'like_count', 'follower_count')
+        }
+        state.poll_data = {}
+        state._author_data = {}
+        return state
+
+    def _load_viewer_sets(self, post_ids, request):
+        user = getattr(request, 'user', None)
+
+        self.liked_post_ids = set()
+        self.followed_post_ids = set()
+        self.experienced_course_ids = set()
+        self.help_needed_course_ids = set()
+
+        if user is not None and user.is_authenticated:
+            self.liked_post_ids = set(
+                PostLike.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+            )
+            self.followed_post_ids = set(
+                FollowedPost.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+            )
+            self.experienced_course_ids = set(
+                UserCourseExperience.objects.filter(user=user).values_list('course_id', flat=True)
+            )
+            self.help_needed_course_ids = set(
+                UserCourseHelp.objects.filter(user=user, active=True).values_list('course_id', flat=True)
+            )
+
+    def get_author_data(self, post, serializer_class, context):
+        """Serialize each (author, anonymity) pair once per page."""
+        key = (post.author_id, serializer_class)
+        if key not in self._author_data:
+            self._author_data[key] = serializer_class(post.author, context=context).data
+        return self._author_data[key]
+
+
+SCHEDULE_BLOCKS = ('1A', '1B', '1D', '1E', '2A', '2B', '2C', '2D', '2E')
+
+
+def _overlay_course_flags(value, viewer_state):
+    """Set is_experienced/needs_help on every serialized course nested in value."""
+    if isinstance(value, list):
+        for item in value:
+            _overlay_course_flags(item, viewer_state)
+    elif isinstance(value, dict):
+        if 'is_experienced' in value and 'needs_help' in value and 'id' in value:
+            value['is_experienced'] = value['id'] in viewer_state.experienced_course_ids
+            value['needs_help'] = value['id'] in viewer_state.help_needed_course_ids
+        for item in value.values():
+            if isinstance(item, (dict, list)):
+                _overlay_course_flags(item, viewer_state)
+
+
+def _overlay_author_fields(author, user):
+    """Apply UserProfileSerializer's viewer-dependent fields to an author rendered without a viewer."""
+    profile = author.get('userprofile') if isinstance(author, dict) else None
+    if not profile or 'can_compare' not in profile:
+        return
+
+    is_self = author.get('id') == user.id
+    allows_comparison = profile.get('allow_schedule_comparison')
+
+    if not is_self and not allows_comparison:
+        for block in SCHEDULE_BLOCKS:
+            profile[f'block_{block}'] = None
+        profile['schedule_blocks'] = None
+
+    profile['can_compare'] = not is_self
+    profile['initial_users'] = None
+    if not is_self and allows_comparison:
+        viewer_profile = user.userprofile
+        profile['initial_users'] = [
+            {
+                'id': user.id,
+                'username': user.username,
+                'full_name': user.get_full_name(),
+                'school_email': user.school_email,
+                'profile_picture_url': viewer_profile.profile_picture.url if viewer_profile.profile_picture else None,
+            },
+            {
+                'id': author.get('id'),
+                'username': author.get('username'),
+                'full_name': author.get('full_name'),
+                'school_email': author.get('school_email'),
+                'profile_picture_url': author.get('profile_picture_url'),
+            }
+        ]
+
+
+def _overlay_poll_tallies(posts_data, user):
+    """Refresh poll counts, recent voters and the viewer's selections from the current poll tallies."""
+    from forum.services.poll_tally_services import get_poll_tallies, get_recent_voters
+
+    poll_ids = [post['id'] for post in posts_data if post.get('poll_data')]
+    if not poll_ids:
+        return
+    tallies = get_poll_tallies(poll_ids, user)
+    recent_voters = get_recent_voters([
+        post['id'] for post in posts_data
+        if post.get('poll_data') and post['poll_data']['poll_info'].get('is_public_voting')
+    ])
+
+    for post in posts_data:
+        poll_data = post.get('poll_data')
+        if not poll_data:
+            continue
+        tally = tallies[post['id']]
+        option_voters = recent_voters.get(post['id'], {})
+        poll_data['poll_info']['total_votes'] = tally.total_votes
+        poll_data['user_vote'] = {
+            'id': tally.user_vote_id,
+            'selected_option_ids': list(tally.selected_option_ids)
+        } if tally.user_vote_id is not None else None
+        for option in poll_data.get('poll_options') or []:
+            option['vote_count'] = tally.vote_count(option['id'])
+            option['percentage'] = round(tally.percentage(option['id']), 2)
+            option['user_voted'] = option['id'] in tally.selected_option_ids
+            option['recent_voters'] = option_voters.get(option['id'], [])
+
+
+def overlay_viewer_fields(posts_data, request):
+    """
+    Apply the requesting user's state to card payloads rendered without a viewer.
+
+    Shared feed caches store PostListSerializer output rendered as an anonymous
+    viewer; this fills in likes, follows, course flags, poll votes and the
+    author profile fields that depend on who is looking, in a fixed number of
+    queries. Like and follower counts and poll results are refreshed for every
+    viewer, since likes, follows and votes do not invalidate cached pages.
+    Returns new payloads and leaves posts_data untouched.
+    """
+    posts_data = copy.deepcopy(posts_data)
+    user = getattr(request, 'user', None)
+    viewer_state = PostViewerState.for_post_ids([post['id'] for post in posts_data], request)
+    for post in posts_data:
+        if post['id'] in viewer_state.engagement_counts:
+            post['like_count'], post['followers_count'] = viewer_state.engagement_counts[post['id']]
+
+    if user is None or not user.is_authenticated:
+        _overlay_poll_tallies(posts_data, None)
+        return posts_data
+
+    _overlay_poll_tallies(posts_data, user)
+
+    for post in posts_data:
+        post['is_liked'] = post['id'] in viewer_state.liked_post_ids
+        post['is_following'] = post['id'] in viewer_state.followed_post_ids
+        _overlay_course_flags(post.get('courses'), viewer_state)
+        _overlay_course_flags(post.get('author'), viewer_state)
+        if not post.get('is_anonymous'):
+            _overlay_author_fields(post.get('author'), user)
+
+    return posts_data
+
+
+class PostListBatchSerializer(serializers.ListSerializer):
+    """List serializer that loads PostViewerState for the whole page before serializing each post."""
+
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, BaseManager) else data)
+        self._context = {
+            **self.context,
+            'viewer_state': PostViewerState(posts, request=self.context.get('request')),
+        }
+        return super().to_representation(posts)
+
+
 class PostListSerializer(serializers.ModelSerializer):
     """Serializer for post list/feed views - matches paginate_posts structure"""
     author = serializers.SerializerMethodField()
@@ -32,35 +231,51 @@ class PostListSerializer(serializers.ModelSerializer):
             'first_image_url', 'is_anonymous', 'allow_teacher', 'poll_data',
             'followers_count'
         ]
+        list_serializer_class = PostListBatchSerializer
+
+    def _get_viewer_state(self):
+        return self.context.get('viewer_state')
     
     def get_author(self, obj):
         """Return author data with anonymous serializer if post is anonymous"""
         author_info = obj.get_author()
         
         # Use anonymous serializer if post is anonymous
-        if author_info['is_anonymous']:
-            return AnonUserSerializer(author_info['user'], context=self.context).data
-        else:
-            return UserSerializer(author_info['user'], context=self.context).data
+        serializer_class = AnonUserSerializer if author_info['is_anonymous'] else UserSerializer
+        viewer_state = self._get_viewer_state()
+        if viewer_state is not None:
+            return viewer_state.get_author_data(obj, serializer_class, self.context)
+        return serializer_class(author_info['user'], context=self.context).data
     
     def get_preview_text(self, obj):
         # Return HTML-preserving preview for API consumers that expect preview_text
-        return process_post_preview_html(obj)
+        return ensure_post_previews(obj).preview_html
     
     def get_preview_html(self, obj):
-        return process_post_preview_html(obj)
+        return ensure_post_previews(obj).preview_html
 
     def get_created_at(self, obj):
         return localtime(obj.created_at).isoformat()
     
     def get_courses(self, obj):
         from .user import CourseSerializer
-        return CourseSerializer(obj.courses.all(), many=True, context=self.context).data
+        context = self.context
+        viewer_state = self._get_viewer_state()
+        if viewer_state is not None:
+            context = {
+                **context,
+                'experienced_course_ids': viewer_state.experienced_course_ids,
+                'help_needed_course_ids': viewer_state.help_needed_course_ids,
+            }
+        return CourseSerializer(obj.courses.all(), many=True, context=context).data
     
     def get_reply_count(self, obj):
-        return getattr(obj, 'total_response_count', 0)
+        return obj.total_response_count if hasattr(obj, 'total_response_count') else obj.get_counters().total_response_count
     
     def get_is_liked(self, obj):
+        viewer_state = self._get_viewer_state()
+        if viewer_state is not None:
+            return obj.id in viewer_state.liked_post_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.is_liked_by(request.user)
@@ -68,36 +283,41 @@ class PostListSerializer(serializers.ModelSerializer):
     
     def get_is_following(self, obj):
         """Check if the current user is following this post"""
+        viewer_state = self._get_viewer_state()
+        if viewer_state is not None:
+            return obj.id in viewer_state.followed_post_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            from forum.models import FollowedPost
             return FollowedPost.objects.filter(user=request.user, post=obj).exists()
         return False
     
     def get_like_count(self, obj):
-        return obj.like_count()
+        return obj.get_counters().like_count
     
     def get_solution_count(self, obj):
-        return getattr(obj, 'solution_count', obj.solutions.count())
+        return obj.solution_count if hasattr(obj, 'solution_count') else obj.get_counters().solution_count
     
     def get_comment_count(self, obj):
-        return getattr(obj, 'comment_count', 0)
+        return obj.comment_count if hasattr(obj, 'comment_count') else obj.get_counters().comment_count
     
     def get_solved(self, obj):
         return obj.solved
     
     def get_first_image_url(self, obj):
-        """Extract the first image URL from the post content JSON"""
-        return obj.get_first_image_url()
+        """First image URL stored from the post content JSON"""
+        return ensure_post_previews(obj).first_image_url
 
     def get_poll_data(self, obj):
         """Get normalized poll payload for list/card display."""
+        viewer_state = self._get_viewer_state()
+        if viewer_state is not None:
+            return viewer_state.poll_data.get(obj.id)
         from .poll import serialize_poll_display_data
         request = self.context.get('request')
         return serialize_poll_display_data(obj, request=request)
 
     def get_followers_count(self, obj):
-        return obj.followers.count()
+        return obj.get_counters().follower_count
 
 
 class PostDetailSerializer(serializers.ModelSerializer):
@@ -160,6 +380,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
     def get_solutions(self, obj):
         """Return solutions using appropriate serializer based on anonymity"""
         from django.db.models import F, Case, When, IntegerField
+        from forum.services.comment_tree_services import load_comment_trees
         from .solution import AnonSolutionSerializer, SolutionSerializer
         
         solutions = obj.solutions.select_related('author').annotate(
@@ -180,7 +401,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
         
         # Serialize each solution with appropriate serializer
         solutions_data = []
-        for solution in solutions:
+        for solution in load_comment_trees(solutions):
             # Use anonymous serializer if post is anonymous and solution author is post author
             should_be_anon = obj.is_anonymous and solution.author_id == obj.author_id
             if should_be_anon:
@@ -290,6 +511,7 @@ class AnonPostDetailSerializer(serializers.ModelSerializer):
     def get_solutions(self, obj):
         """Return solutions, using anonymous serializer for post author's solutions"""
         from django.db.models import F, Case, When, IntegerField
+        from forum.services.comment_tree_services import load_comment_trees
         from .solution import AnonSolutionSerializer, SolutionSerializer
         
         solutions = obj.solutions.select_related('author').annotate(
@@ -310,7 +532,7 @@ class AnonPostDetailSerializer(serializers.ModelSerializer):
         
         # Serialize each solution with appropriate serializer
         solutions_data = []
-        for solution in solutions:
+        for solution in load_comment_trees(solutions):
             # Use anonymous serializer if solution author is post author
             should_be_anon = solution.author_id == obj.author_id
             if should_be_anon:
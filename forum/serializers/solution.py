@@ -4,6 +4,15 @@ from django.utils.timezone import localtime
 from .user import AnonUserSerializer, UserSerializer
 
 
+def _comment_author_data(comment, serializer_class, context):
+    """Serialize a comment author once per response; threads repeat the same few authors."""
+    authors = context.setdefault('comment_authors', {})
+    key = (serializer_class, comment.author_id)
+    if key not in authors:
+        authors[key] = serializer_class(comment.author, context=context).data
+    return authors[key]
+
+
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.SerializerMethodField()
     created_at = serializers.SerializerMethodField()
@@ -25,9 +34,9 @@ class CommentSerializer(serializers.ModelSerializer):
                          obj.author_id == post.author_id)
         
         if should_be_anon:
-            return AnonUserSerializer(obj.author, context=self.context).data
+            return _comment_author_data(obj, AnonUserSerializer, self.context)
         else:
-            return UserSerializer(obj.author, context=self.context).data
+            return _comment_author_data(obj, UserSerializer, self.context)
     
     def get_created_at(self, obj):
         return localtime(obj.created_at).isoformat()
@@ -68,7 +77,7 @@ class AnonCommentSerializer(serializers.ModelSerializer):
     
     def get_author(self, obj):
         """Return anonymous author data"""
-        return AnonUserSerializer(obj.author, context=self.context).data
+        return _comment_author_data(obj, AnonUserSerializer, self.context)
     
     def get_created_at(self, obj):
         return localtime(obj.created_at).isoformat()
@@ -140,7 +149,8 @@ class SolutionSerializer(serializers.ModelSerializer):
     
     def get_comments(self, obj):
         """Get formatted comments for this solution, using anon serializer when appropriate"""
-        comments = obj.comments.select_related('author').order_by('created_at')
+        from forum.services.comment_tree_services import get_solution_comments
+        comments = get_solution_comments(obj)
         post = self.context.get('post')
         comments_data = []
         
@@ -207,7 +217,8 @@ class AnonSolutionSerializer(serializers.ModelSerializer):
     
     def get_comments(self, obj):
         """Get formatted comments for this solution, using anon serializer when appropriate"""
-        comments = obj.comments.select_related('author').order_by('created_at')
+        from forum.services.comment_tree_services import get_solution_comments
+        comments = get_solution_comments(obj)
         post = self.context.get('post')
         comments_data = []
         
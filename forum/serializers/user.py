@@ -15,6 +15,9 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'category', 'description', 'is_experienced', 'needs_help', 'blocks']
     
     def get_is_experienced(self, obj):
+        experienced_course_ids = self.context.get('experienced_course_ids')
+        if experienced_course_ids is not None:
+            return obj.id in experienced_course_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             experienced_courses = getattr(request, '_experienced_courses', None)
@@ -26,6 +29,9 @@ class CourseSerializer(serializers.ModelSerializer):
         return False
     
     def get_needs_help(self, obj):
+        help_needed_course_ids = self.context.get('help_needed_course_ids')
+        if help_needed_course_ids is not None:
+            return obj.id in help_needed_course_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             help_needed_courses = getattr(request, '_help_needed_courses', None)
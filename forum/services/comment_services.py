@@ -3,6 +3,8 @@ from django.contrib import messages
 from forum.models import Solution, Comment
 from forum.services.notification_services import send_comment_notifications_service
 from forum.services.post_services import _check_teacher_visibility
+from forum.services.feed_cache_services import bump_feed_generations
+from forum.services.comment_tree_services import get_solution_comments
 from forum.services.utils import process_messages_to_json, detect_bad_words
 from django.template.loader import render_to_string
 
@@ -28,7 +30,8 @@ def create_comment_service(request, solution_id, data):
     if content:
         parent_comment = None
         if parent_id:
-            parent_comment = get_object_or_404(Comment, id=parent_id)
+            # Replies stay in their parent's thread, whose path they extend
+            parent_comment = get_object_or_404(Comment, id=parent_id, solution=solution)
         comment = Comment.objects.create(
             solution=solution,
             author=request.user,
@@ -36,6 +39,7 @@ def create_comment_service(request, solution_id, data):
             parent=parent_comment
         )
         send_comment_notifications_service(comment, solution, parent_comment)
+        bump_feed_generations()
         messages.success(request, 'Comment created succesfully')
         return {'status': 'success', 'id': comment.id, 'messages': process_messages_to_json(request)}
     messages.error(request, 'Invalid comment data.')
@@ -52,6 +56,7 @@ def edit_comment_service(request, comment_id, data):
             return {'status': 'error', 'messages': process_messages_to_json(request)}
         comment.content = content
         comment.save()
+        bump_feed_generations()
         messages.success(request, 'Solution edited succesfully')
         return {'status': 'success', 'messages': process_messages_to_json(request)}
     messages.error(request, 'Invalid comment data.')
@@ -60,12 +65,13 @@ def edit_comment_service(request, comment_id, data):
 def delete_comment_service(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id, author=request.user)
     comment.delete()
+    bump_feed_generations()
     messages.success(request, 'Solution deleted succesfully')
     return {'status': 'success', 'messages': process_messages_to_json(request)}
 
 def get_comments_service(request, solution_id):
     solution = get_object_or_404(Solution, id=solution_id)
-    comments = Comment.objects.filter(solution=solution).order_by('created_at')
+    comments = get_solution_comments(solution)
 
     def process_comment(comment):
         return {
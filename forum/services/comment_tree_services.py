@@ -0,0 +1,85 @@
+from collections import defaultdict
+from forum.models import Comment
+
+
+def _cache_related(instance, name, objects):
+    """Store objects as the prefetched result of instance's reverse relation name."""
+    queryset = getattr(instance, name).get_queryset()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+def load_comment_trees(solutions):
+    """
+    Load the comments of solutions in one query and assemble them into trees.
+
+    Afterwards solution.comments.all() holds every comment of a solution in
+    creation order and comment.replies.all() the direct replies of a comment,
+    both without further queries. Each comment's parent, solution and author
+    (with profile) are cached.
+
+    Returns:
+        list: The solutions, in the order given.
+    """
+    solutions = list(solutions)
+    solutions_by_id = {solution.id: solution for solution in solutions}
+    if not solutions_by_id:
+        return solutions
+
+    comments = list(
+        Comment.objects.filter(solution_id__in=solutions_by_id).select_related(
+            'author__userprofile'
+        ).order_by('created_at', 'id')
+    )
+    comments_by_id = {comment.id: comment for comment in comments}
+    by_solution = defaultdict(list)
+    replies = defaultdict(list)
+
+    for comment in comments:
+        by_solution[comment.solution_id].append(comment)
+        replies[comment.parent_id].append(comment)
+        Comment.solution.field.set_cached_value(comment, solutions_by_id[comment.solution_id])
+        parent = comments_by_id.get(comment.parent_id)
+        if parent is not None:
+            Comment.parent.field.set_cached_value(comment, parent)
+
+    for comment in comments:
+        _cache_related(comment, 'replies', replies[comment.id])
+    for solution in solutions:
+        _cache_related(solution, 'comments', by_solution[solution.id])
+    return solutions
+
+
+def get_solution_comments(solution):
+    """Every comment of solution in creation order, loading its comment tree if needed."""
+    if 'comments' not in getattr(solution, '_prefetched_objects_cache', {}):
+        load_comment_trees([solution])
+    return solution.comments.all()
+
+
+def get_thread(solution):
+    """Every comment of solution in thread order: each comment followed by its replies."""
+    return Comment.objects.filter(solution=solution).order_by('path')
+
+
+def get_subtree(comment):
+    """comment and all of its nested replies, in thread order."""
+    return Comment.objects.filter(
+        solution_id=comment.solution_id, path__startswith=comment.path
+    ).order_by('path')
+
+
+def get_replies_after(comment, limit=None):
+    """
+    The comments of comment's thread that come after it in thread order.
+
+    Used to continue a thread from the last comment shown. A range scan of
+    comment_root_path_idx.
+    """
+    replies = Comment.objects.filter(root_id=comment.root_id, path__gt=comment.path).order_by('path')
+    if limit is not None:
+        replies = replies[:limit]
+    return replies
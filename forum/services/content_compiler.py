@@ -0,0 +1,369 @@
+import re
+import json
+from html import unescape, escape
+from django.utils.html import strip_tags
+
+PREVIEW_FALLBACK_KEYS = (
+    'text',
+    'content',
+    'caption',
+    'title',
+    'message',
+    'code',
+    'math',
+    'value',
+)
+
+LINK_RE = re.compile(r'<a\s+[^>]*href=["\']([^"\']*)["\'][^>]*>([^<]*)</a>', re.IGNORECASE)
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+INLINE_SPACE_RE = re.compile(r'[\t\f\v ]+')
+NEWLINE_PADDING_RE = re.compile(r' *\n *')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+REPEATED_LETTER_RE = re.compile(r'(.)\1{2,}')
+
+leet_mapping = str.maketrans({
+    '4': 'a', '@': 'a',
+    '8': 'b',
+    '(': 'c', '{': 'c', '[': 'c', '<': 'c',
+    '3': 'e',
+    '6': 'g', '9': 'g',
+    '1': 'i', '!': 'i', '|': 'i',
+    '0': 'o',
+    '5': 's', '$': 's',
+    '7': 't', '+': 't',
+    '2': 'z'
+})
+
+bad_word_list = ['fuck', 'bitch', 'shit', 'ass', 'dick', 'cunt', 'cock', 'pussy']
+bad_word_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, bad_word_list)) + r')\b', re.IGNORECASE)
+
+
+class CompiledContent:
+    """
+    Everything derived from one Editor.js payload.
+
+    Attributes:
+        preview_text: Plain-text preview.
+        preview_html: Preview with sanitized <a> tags kept and all other HTML stripped.
+        first_image_url: URL of the first image block's file, or None.
+        file_urls: Every image URL referenced by the content.
+        moderation_findings: Bad word messages in content order, or None when
+            the content format cannot be moderated.
+    """
+
+    __slots__ = ('preview_text', 'preview_html', 'first_image_url', 'file_urls', 'moderation_findings')
+
+    def __init__(self, preview_text='', preview_html='', first_image_url=None, file_urls=None, moderation_findings=None):
+        self.preview_text = preview_text
+        self.preview_html = preview_html
+        self.first_image_url = first_image_url
+        self.file_urls = file_urls if file_urls is not None else []
+        self.moderation_findings = moderation_findings
+
+
+def coerce_content(content):
+    """Parse JSON-string content where possible so block extraction can run."""
+    if isinstance(content, str):
+        stripped = content.strip()
+        if stripped.startswith('{') or stripped.startswith('['):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                return content
+    return content
+
+
+def normalize_text(text):
+    """
+    Normalize text by converting leetspeak, removing special characters, and reducing repeated letters.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: Normalized, lowercase text.
+    """
+    if not text:
+        return ""
+
+    text = text.translate(leet_mapping)  # Convert leetspeak
+    text = NON_ALPHA_RE.sub('', text)  # Remove non-alphabetic characters, keep spaces
+    text = WHITESPACE_RE.sub(' ', text).strip()  # Normalize spaces
+    text = REPEATED_LETTER_RE.sub(r'\1', text)  # Reduce repeated letters (e.g., "loooool" -> "lol")
+
+    return text.lower()
+
+
+def contains_bad_word(text):
+    return bad_word_pattern.search(normalize_text(text)) is not None
+
+
+def _sanitize_href(href):
+    """
+    Validate and sanitize href attributes to prevent XSS attacks.
+    Allows http, https, mailto, and relative URLs only.
+    """
+    if not href:
+        return None
+
+    href = href.strip()
+
+    # Allow relative URLs
+    if href.startswith('/') or href.startswith('#'):
+        return escape(href)
+
+    # Allow safe protocols
+    if href.startswith(('http://', 'https://', 'mailto:')):
+        # Basic URL validation - check for obvious XSS patterns
+        if 'javascript:' in href.lower() or 'data:' in href.lower():
+            return None
+        return escape(href)
+
+    return None
+
+
+def _prepare_text(value, preserve_newlines):
+    text = str(value).replace('&nbsp;', ' ')
+    return BR_RE.sub('\n' if preserve_newlines else ' ', text)
+
+
+def _finish_text(text, preserve_newlines):
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = INLINE_SPACE_RE.sub(' ', text)
+    text = NEWLINE_PADDING_RE.sub('\n', text)
+
+    if preserve_newlines:
+        text = BLANK_LINES_RE.sub('\n\n', text)
+    else:
+        text = text.replace('\n', ' ')
+
+    return text.strip()
+
+
+def _normalize(value, preserve_newlines=True):
+    """Normalize Editor.js-derived text while keeping meaningful line breaks."""
+    if value is None:
+        return ''
+    text = _prepare_text(value, preserve_newlines)
+    return _finish_text(unescape(strip_tags(text)), preserve_newlines)
+
+
+def _normalize_pair(value):
+    """
+    Plain and link-preserving normalizations of the same value from one strip_tags pass.
+
+    Links are swapped for placeholders before tags are stripped, then restored
+    as their text in the plain version and as sanitized <a> tags in the HTML one.
+    """
+    if value is None:
+        return '', ''
+    text = _prepare_text(value, True)
+    if LINK_RE.search(text) is None:
+        plain = _finish_text(unescape(strip_tags(text)), True)
+        return plain, plain
+
+    links = []
+
+    def replace_link(match):
+        placeholder = f'__LINK_PLACEHOLDER_{len(links)}__'
+        label = match.group(2)
+        sanitized_href = _sanitize_href(match.group(1))
+        # Links with unsafe hrefs keep only their text
+        anchor = f'<a href="{sanitized_href}">{escape(label)}</a>' if sanitized_href else label
+        links.append((placeholder, label, anchor))
+        return placeholder
+
+    stripped = strip_tags(LINK_RE.sub(replace_link, text))
+    plain = stripped
+    html = unescape(stripped)
+    for placeholder, label, anchor in links:
+        plain = plain.replace(placeholder, label)
+        html = html.replace(placeholder, anchor)
+    return _finish_text(unescape(plain), True), _finish_text(html, True)
+
+
+def _list_item_lines(items):
+    """Extract text from Editor.js list/checklist item structures."""
+    lines = []
+    if not isinstance(items, list):
+        return lines
+
+    for item in items:
+        if isinstance(item, str):
+            text = _normalize(item)
+            if text:
+                lines.append(text)
+            continue
+
+        if not isinstance(item, dict):
+            continue
+
+        text = _normalize(item.get('content') or item.get('text') or '')
+        if text:
+            lines.append(text)
+
+        nested_items = item.get('items')
+        if nested_items:
+            lines.extend(_list_item_lines(nested_items))
+
+    return lines
+
+
+def _fallback_fragments(value):
+    """Recursively extract common textual fields from unknown block payloads."""
+    if isinstance(value, str):
+        text = _normalize(value)
+        return [text] if text else []
+
+    if isinstance(value, list):
+        fragments = []
+        for item in value:
+            fragments.extend(_fallback_fragments(item))
+        return fragments
+
+    if isinstance(value, dict):
+        fragments = []
+        for key in PREVIEW_FALLBACK_KEYS:
+            if key in value:
+                fragments.extend(_fallback_fragments(value.get(key)))
+        return fragments
+
+    return []
+
+
+def _join(fragments):
+    return '\n'.join([fragment for fragment in fragments if fragment])
+
+
+def _block_previews(block_type, data):
+    """Plain and HTML previews of one block. Quote, table and warning HTML uses the generic fallback."""
+    if block_type in {'paragraph', 'header'}:
+        return _normalize_pair(data.get('text', ''))
+
+    if block_type in {'list', 'checklist'}:
+        text = '\n'.join(_list_item_lines(data.get('items', [])))
+        return text, text
+
+    if block_type == 'code':
+        return _normalize_pair(data.get('code', ''))
+
+    if block_type == 'math':
+        return _normalize_pair(data.get('math') or data.get('text') or data.get('formula') or '')
+
+    if block_type == 'image':
+        return _normalize_pair(data.get('caption', ''))
+
+    if block_type == 'delimiter':
+        return '', ''
+
+    fallback = '\n'.join(_fallback_fragments(data))
+
+    if block_type == 'quote':
+        return _join([_normalize(data.get('text', '')), _normalize(data.get('caption', ''))]), fallback
+
+    if block_type == 'table':
+        rows = []
+        for row in data.get('content', []):
+            if not isinstance(row, list):
+                continue
+            cells = [cell for cell in (_normalize(cell, preserve_newlines=False) for cell in row) if cell]
+            if cells:
+                rows.append(' | '.join(cells))
+        return '\n'.join(rows), fallback
+
+    if block_type == 'warning':
+        return _join([_normalize(data.get('title', '')), _normalize(data.get('message', ''))]), fallback
+
+    return fallback, fallback
+
+
+def _block_findings(block_type, data):
+    """Bad words in a block's text and list items."""
+    findings = []
+    if contains_bad_word(data.get('text', '')):
+        findings.append(f"Bad word detected in block of type '{block_type}'.")
+
+    for item in data.get('items', []):
+        item_text = item if isinstance(item, str) else item.get('content') if isinstance(item, dict) else None
+        if contains_bad_word(item_text):
+            findings.append(f"Bad word detected in list item in block of type '{block_type}'.")
+    return findings
+
+
+def _image_file_url(data):
+    """The file URL of an image block, as (found, url); blocks without a file entry are skipped."""
+    file_data = data.get('file')
+    if isinstance(file_data, dict) and 'url' in file_data:
+        return True, file_data['url']
+    if isinstance(file_data, str):
+        return True, file_data
+    return False, None
+
+
+def _compile_blocks(blocks, compiled):
+    text_fragments = []
+    html_fragments = []
+    first_image_found = False
+    findings = []
+
+    for block in blocks if isinstance(blocks, list) else []:
+        if not isinstance(block, dict):
+            continue
+        block_type = block.get('type', '')
+        data = block.get('data', {})
+        if not isinstance(data, dict):
+            continue
+
+        text, html = _block_previews(block_type, data)
+        if text:
+            text_fragments.append(text)
+        if html:
+            html_fragments.append(html)
+
+        if block_type == 'image':
+            found, url = _image_file_url(data)
+            if found and not first_image_found:
+                first_image_found = True
+                compiled.first_image_url = url
+            file_url = url or data.get('url')
+            if file_url:
+                compiled.file_urls.append(file_url)
+
+        findings.extend(_block_findings(block_type, data))
+
+    compiled.preview_text = '\n'.join(text_fragments)
+    compiled.preview_html = '\n'.join(html_fragments)
+    compiled.moderation_findings = findings
+
+
+def compile_post_content(content):
+    """
+    Parse Editor.js content once and derive previews, file references and moderation findings.
+
+    Args:
+        content: Editor.js payload as a dict, a JSON string, or plain text.
+
+    Returns:
+        CompiledContent
+    """
+    compiled = CompiledContent()
+    parsed = coerce_content(content)
+
+    if isinstance(parsed, dict) and 'blocks' in parsed:
+        _compile_blocks(parsed.get('blocks'), compiled)
+    elif isinstance(parsed, (dict, list)):
+        fragments = _fallback_fragments(parsed)
+        compiled.preview_text = compiled.preview_html = '\n'.join(fragments)
+    else:
+        compiled.preview_text, compiled.preview_html = _normalize_pair(parsed)
+
+    if isinstance(content, str):
+        # Plain text, or JSON that arrived as a string, is moderated as a whole
+        compiled.moderation_findings = (
+            ["Bad word detected in text."] if contains_bad_word(content) else []
+        )
+
+    return compiled
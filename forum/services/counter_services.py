@@ -0,0 +1,125 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from forum.models import Post, PostCounters, Solution, Comment, PostLike, FollowedPost, PollVote
+
+COUNTER_FIELDS = (
+    'solution_count',
+    'comment_count',
+    'like_count',
+    'follower_count',
+    'poll_vote_count',
+)
+
+
+def _count_subquery(queryset, post_lookup):
+    """Correlated COUNT(*) of rows in queryset that belong to the outer post."""
+    counts = queryset.filter(
+        **{post_lookup: OuterRef('pk')}
+    ).order_by().values(post_lookup).annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def compute_post_counters(post_ids):
+    """
+    Count engagement for the given posts directly from the source tables.
+
+    Returns:
+        dict: {post_id: {counter_field: count}}
+    """
+    rows = Post.objects.filter(id__in=post_ids).annotate(
+        solution_total=_count_subquery(Solution.objects.all(), 'post'),
+        comment_total=_count_subquery(Comment.objects.all(), 'solution__post'),
+        like_total=_count_subquery(PostLike.objects.all(), 'post'),
+        follower_total=_count_subquery(FollowedPost.objects.all(), 'post'),
+        poll_vote_total=_count_subquery(PollVote.objects.all(), 'poll'),
+    ).values('id', 'solution_total', 'comment_total', 'like_total', 'follower_total', 'poll_vote_total')
+
+    return {
+        row['id']: {
+            'solution_count': row['solution_total'],
+            'comment_count': row['comment_total'],
+            'like_count': row['like_total'],
+            'follower_count': row['follower_total'],
+            'poll_vote_count': row['poll_vote_total'],
+        }
+        for row in rows
+    }
+
+
+def reconcile_post_counters(post_ids=None, batch_size=500):
+    """
+    Recount post counters from the source tables and repair missing or drifted rows.
+
+    Args:
+        post_ids: Optional iterable of post ids to limit the repair to. All posts when None.
+        batch_size: Number of posts recounted and upserted per round trip.
+
+    Returns:
+        int: Number of posts whose counters were created or corrected.
+    """
+    id_queryset = Post.objects.order_by('id').values_list('id', flat=True)
+    if post_ids is not None:
+        id_queryset = id_queryset.filter(id__in=list(post_ids))
+
+    repaired = 0
+    last_id = 0
+    while True:
+        batch_ids = list(id_queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch_ids:
+            break
+        last_id = batch_ids[-1]
+
+        actual = compute_post_counters(batch_ids)
+        stored = {
+            row.pop('post_id'): row
+            for row in PostCounters.objects.filter(post_id__in=batch_ids).values('post_id', *COUNTER_FIELDS)
+        }
+
+        now = timezone.now()
+        drifted = [
+            PostCounters(post_id=post_id, updated_at=now, **counts)
+            for post_id, counts in actual.items()
+            if stored.get(post_id) != counts
+        ]
+        if drifted:
+            PostCounters.objects.bulk_create(
+                drifted,
+                update_conflicts=True,
+                unique_fields=['post'],
+                update_fields=[*COUNTER_FIELDS, 'updated_at'],
+            )
+            repaired += len(drifted)
+
+    return repaired
+
+
+def ensure_post_counters(post_id):
+    """Create an all-zero counters row for a newly created post."""
+    PostCounters.objects.get_or_create(post_id=post_id)
+
+
+def adjust_post_counter(post_id, field, delta):
+    """
+    Atomically apply delta to one counter of a post.
+
+    Posts that predate the counters table get their row rebuilt from the
+    source tables on their first increment.
+    """
+    if post_id is None:
+        return
+
+    updated = PostCounters.objects.filter(post_id=post_id).update(
+        **{field: F(field) + delta},
+        updated_at=timezone.now(),
+    )
+    if not updated and delta > 0:
+        reconcile_post_counters([post_id])
+
+
+def adjust_comment_counter(comment, delta):
+    """Apply delta to the comment counter of the post a comment belongs to."""
+    post_id = Solution.objects.filter(
+        id=comment.solution_id
+    ).values_list('post_id', flat=True).first()
+    adjust_post_counter(post_id, 'comment_count', delta)
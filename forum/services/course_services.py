@@ -1,10 +1,21 @@
+import re
+import time
+import threading
+from collections import Counter
+from django.core.cache import cache
+from django.db import transaction
 from django.http import JsonResponse
-from forum.models import Course, UserCourseExperience, UserCourseHelp
-from django.db.models import Q, F, Value, IntegerField, Case, When
-from django.db.models.functions import Concat
-from django.contrib.postgres.search import TrigramSimilarity
-from functools import reduce
-from operator import or_
+from forum.models import Course, CourseAlias, UserCourseExperience, UserCourseHelp
+
+COURSE_SEARCH_LIMIT = 10
+# Weight of an alias match relative to a course name match
+ALIAS_SIMILARITY_WEIGHT = 1.25
+# Rebuild even without an invalidation, in case a bump was lost (e.g. a rolled-back write)
+COURSE_INDEX_MAX_AGE = 60 * 10
+
+_COURSE_INDEX_GENERATION_KEY = 'course_index:generation'
+_WORD_RE = re.compile(r'[^\W_]+')
+
 
 def get_user_courses(user):
     """Get user's experienced and help-needed courses"""
@@ -26,65 +37,186 @@ def get_user_courses(user):
     
     return experienced_courses, help_needed_courses
 
-def course_search(request):
-    query = request.GET.get('q', '').strip().lower()
-    
-    if not query:
-        courses = Course.objects.all().distinct()[:10]
-    else:
+
+def trigrams(text):
+    """
+    The trigram set pg_trgm builds for text: lowercased words padded with two
+    leading spaces and one trailing space.
+    """
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(grams, other):
+    """Shared trigrams over distinct trigrams, matching pg_trgm's similarity()."""
+    if not grams or not other:
+        return 0.0
+    shared = len(grams & other)
+    return shared / (len(grams) + len(other) - shared)
+
+
+class _IndexedCourse:
+    __slots__ = ('id', 'name', 'category', 'experienced_count', 'name_lower', 'name_trigrams', 'aliases')
+
+    def __init__(self, course_id, name, category):
+        self.id = course_id
+        self.name = name
+        self.category = category
+        self.experienced_count = 0
+        self.name_lower = name.lower()
+        self.name_trigrams = trigrams(name)
+        # (lowercased alias, alias trigrams)
+        self.aliases = []
+
+
+class CourseIndex:
+    """
+    The whole course catalog held in process memory for course autocomplete.
+
+    Built with three queries (courses, aliases, experienced counts) and
+    tagged with the cache generation it was built at.
+    """
+
+    def __init__(self, courses, generation):
+        self.courses = courses
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, generation):
+        courses = {
+            course_id: _IndexedCourse(course_id, name, category)
+            for course_id, name, category in Course.objects.order_by('id').values_list('id', 'name', 'category')
+        }
+        for course_id, name in CourseAlias.objects.order_by('id').values_list('course_id', 'name'):
+            if course_id in courses:
+                courses[course_id].aliases.append((name.lower(), trigrams(name)))
+        experienced = Counter(UserCourseExperience.objects.values_list('course_id', flat=True))
+        for course_id, count in experienced.items():
+            if course_id in courses:
+                courses[course_id].experienced_count = count
+        return cls(list(courses.values()), generation)
+
+    def _rank(self, course, query, tokens, token_trigrams):
+        """
+        The (starts_with_score, similarity) of a course's best alias row, or None if it does not match.
+
+        Mirrors the former SQL: each token scores name similarity plus weighted
+        alias similarity, a full-query prefix scores 2 on the name or 3 on an
+        alias, and a course matches on any token prefix or positive similarity.
+        """
+        name_similarity = sum(trigram_similarity(course.name_trigrams, grams) for grams in token_trigrams)
+        name_prefix = any(course.name_lower.startswith(token) for token in tokens)
+        name_starts = course.name_lower.startswith(query)
+
+        best = None
+        for alias_lower, alias_trigrams in course.aliases or [(None, None)]:
+            similarity = name_similarity
+            matches = name_prefix
+            starts_with_score = 2 if name_starts else 0
+            if alias_lower is not None:
+                similarity += sum(
+                    trigram_similarity(alias_trigrams, grams) for grams in token_trigrams
+                ) * ALIAS_SIMILARITY_WEIGHT
+                matches = matches or any(alias_lower.startswith(token) for token in tokens)
+                if not name_starts and alias_lower.startswith(query):
+                    starts_with_score = 3
+            if matches or similarity > 0:
+                rank = (starts_with_score, similarity)
+                best = rank if best is None else max(best, rank)
+        return best
+
+    def search(self, query, limit=COURSE_SEARCH_LIMIT):
+        """Courses matching query, best first; substring matches are the fallback."""
+        if not query:
+            return self.courses[:limit]
+
         tokens = query.split()
+        token_trigrams = [trigrams(token) for token in tokens]
+        ranked = []
+        for course in self.courses:
+            rank = self._rank(course, query, tokens, token_trigrams)
+            if rank is not None:
+                ranked.append((rank, course))
+        if ranked:
+            ranked.sort(key=lambda item: (-item[0][0], -item[0][1], item[1].id))
+            return [course for _, course in ranked[:limit]]
 
-        # Construct similarity annotation (weighted aliases)
-        similarity_score = None
-        for token in tokens:
-            sim = TrigramSimilarity('name', token) + TrigramSimilarity('aliases__name', token) * 1.25
-            similarity_score = sim if similarity_score is None else similarity_score + sim
-
-        # Build prefix (istartswith) Q object
-        starts_with_q = reduce(
-            or_,
-            [Q(name__istartswith=token) | Q(aliases__name__istartswith=token) for token in tokens]
-        )
-
-        # Build starts_with_score boost: exact prefix match on full query string
-        starts_with_score = Case(
-            When(name__istartswith=query, then=Value(2)),
-            When(aliases__name__istartswith=query, then=Value(3)),
-            default=Value(0),
-            output_field=IntegerField()
-        )
-
-        # First pass: fetch matching IDs with deduplication
-        course_ids = Course.objects.annotate(
-            similarity=similarity_score,
-            starts_with_score=starts_with_score
-        ).filter(
-            starts_with_q | Q(similarity__gt=0)
-        ).order_by(
-            '-starts_with_score', '-similarity'
-        ).values_list('id', flat=True).distinct()[:10]
-
-        # Fetch full course objects (deduplicated and ordered)
-        courses = Course.objects.filter(id__in=course_ids)
-        course_id_list = list(course_ids)  # preserve order
-        courses = sorted(courses, key=lambda c: course_id_list.index(c.id))
-
-        # Fallback if nothing matched
-        if not courses:
-            fallback_filter = reduce(
-                or_,
-                [Q(name__icontains=token) | Q(aliases__name__icontains=token) for token in tokens]
+        return [
+            course for course in self.courses
+            if any(
+                token in course.name_lower or any(token in alias for alias, _ in course.aliases)
+                for token in tokens
             )
-            fallback_ids = Course.objects.filter(fallback_filter).values_list('id', flat=True).distinct()[:10]
-            courses = Course.objects.filter(id__in=fallback_ids)
-            course_id_list = list(fallback_ids)
-            courses = sorted(courses, key=lambda c: course_id_list.index(c.id))
+        ][:limit]
+
+
+_course_index = None
+_course_index_lock = threading.Lock()
+
+
+def get_course_index_generation():
+    generation = cache.get(_COURSE_INDEX_GENERATION_KEY)
+    if generation is None:
+        cache.add(_COURSE_INDEX_GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(_COURSE_INDEX_GENERATION_KEY, 1)
+    return generation
+
+
+def _is_current(index, generation):
+    return (
+        index is not None
+        and index.generation == generation
+        and time.monotonic() - index.built_at <= COURSE_INDEX_MAX_AGE
+    )
+
+
+def get_course_index():
+    """This process's course index, rebuilt when the catalog generation moves on or it grows old."""
+    global _course_index
+    generation = get_course_index_generation()
+    index = _course_index
+    if not _is_current(index, generation):
+        with _course_index_lock:
+            index = _course_index
+            if not _is_current(index, generation):
+                index = _course_index = CourseIndex.build(generation)
+    return index
+
+
+def _bump_course_index_generation():
+    global _course_index
+    _course_index = None
+    try:
+        cache.incr(_COURSE_INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.add(_COURSE_INDEX_GENERATION_KEY, 2, timeout=None)
+
+
+def invalidate_course_index():
+    """
+    Drop every process's course index after a catalog or experience change.
+
+    This process's copy is dropped straight away; other processes see the
+    generation bump once the change commits.
+    """
+    global _course_index
+    _course_index = None
+    transaction.on_commit(_bump_course_index_generation)
+
+
+def course_search(request):
+    query = request.GET.get('q', '').strip().lower()
+    courses = get_course_index().search(query)
 
     data = [{
         "id": course.id,
         "name": course.name,
         "category": course.category,
-        "experienced_count": UserCourseExperience.objects.filter(course=course).count()
+        "experienced_count": course.experienced_count
     } for course in courses]
 
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    return JsonResponse(data, safe=False)
@@ -0,0 +1,92 @@
+import hashlib
+from django.core.cache import cache
+from forum.services.feed_services import get_all_posts, build_feed_pagination_data, FEED_SORT_FIELDS
+
+# Shared pages only need to survive between writes; likes and views refresh on expiry
+FEED_CACHE_TIMEOUT = 60 * 2
+
+FEED_KINDS = tuple(FEED_SORT_FIELDS)
+
+
+def _generation_key(kind):
+    return f'feed:generation:{kind}'
+
+
+def get_feed_generation(kind):
+    """Current generation of a feed; cached pages from older generations are never read again."""
+    generation = cache.get(_generation_key(kind))
+    if generation is None:
+        cache.add(_generation_key(kind), 1, timeout=None)
+        generation = cache.get(_generation_key(kind), 1)
+    return generation
+
+
+def bump_feed_generations(*kinds):
+    """
+    Invalidate every cached page of the given feeds (all feeds by default).
+
+    Called by the post, solution and comment write services. Old pages are
+    left to expire instead of being scanned for and deleted.
+    """
+    for kind in kinds or FEED_KINDS:
+        key = _generation_key(kind)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Missing counter: start past the generation any reader may have assumed
+            cache.add(key, 2, timeout=None)
+
+
+def audience_segment(user):
+    """Viewers in the same segment see the same posts in the shared feeds."""
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_teacher:
+        return 'teacher'
+    return 'student'
+
+
+def _feed_page_cache_key(kind, segment, page, per_page, cursor):
+    position = f'c:{cursor}' if cursor is not None else f'p:{page}'
+    position = hashlib.md5(position.encode()).hexdigest()
+    generation = get_feed_generation(kind)
+    return f'feed:page:{kind}:{segment}:g{generation}:{per_page}:{position}'
+
+
+def get_cached_all_posts_page(request, page=1, per_page=8, cursor=None, sort='recent'):
+    """
+    Return an all-posts feed page, shared between viewers of the same audience segment.
+
+    The cached entry holds the post ids, card payloads rendered without a
+    viewer and the pagination fields; the requesting user's likes, follows,
+    votes and course flags are overlaid on every read.
+
+    Returns:
+        dict: post_ids, posts (serialized cards) and the pagination fields.
+
+    Raises:
+        ValueError: If the page, sort or cursor is invalid.
+    """
+    from forum.serializers import PostListSerializer, overlay_viewer_fields
+
+    page = int(page)
+    if sort not in FEED_SORT_FIELDS:
+        raise ValueError('Invalid sort')
+
+    key = _feed_page_cache_key(sort, audience_segment(request.user), page, per_page, cursor)
+    entry = cache.get(key)
+    if entry is None:
+        page_obj = get_all_posts(request.user, '', page, per_page, cursor=cursor, sort=sort)
+        posts = list(page_obj.object_list)
+        entry = {
+            'post_ids': [post.id for post in posts],
+            'posts': PostListSerializer(posts, many=True, context={}).data,
+            'pagination': build_feed_pagination_data(page_obj, cursor),
+        }
+        cache.set(key, entry, FEED_CACHE_TIMEOUT)
+
+    return {
+        'post_ids': entry['post_ids'],
+        'posts': overlay_viewer_fields(entry['posts'], request),
+        **entry['pagination'],
+    }
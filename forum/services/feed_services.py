@@ -1,56 +1,218 @@
-from django.db.models import Q, F, Count
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+import base64
+import json
+from types import SimpleNamespace
+from django.db.models import Q, F
 from django.db.models.functions import Coalesce
-from forum.models import Post, Course
-from forum.services.course_services import get_user_courses
+from forum.models import Post
+from forum.services.timeline_services import get_user_timeline
 from forum.services.utils import process_post_preview, add_course_context, annotate_post_card_context
 from django.core.paginator import Paginator
+from django.utils.dateparse import parse_datetime
+from django.utils.safestring import mark_safe
 from django.utils.timezone import localtime
 
 
+class CursorPage:
+    """
+    Page-like result for keyset pagination.
+
+    Exposes the parts of Django's Page that feed views and APIs rely on
+    (object_list, has_next) plus the opaque cursor for the following page.
+    """
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+# Sortable feed columns and the key each one's cursor value is stored under
+FEED_SORT_FIELDS = {
+    'recent': 'recent_updated_at',
+    'hot': 'hot_score',
+}
+_CURSOR_KEYS = {
+    'recent_updated_at': 't',
+    'hot_score': 'h',
+    'rank': 'r',  # Search relevance (see search_services.search_posts)
+    'voted_at': 'v',  # Poll voter lists (see poll_tally_services.get_option_voters)
+}
+# Cursor sort values stored as ISO timestamps rather than numbers
+_DATETIME_SORT_FIELDS = {'recent_updated_at', 'voted_at'}
+
+
 def _order_by_recent_activity(queryset):
     """Order by most recent activity, falling back to creation time."""
     return queryset.annotate(
         recent_updated_at=Coalesce('last_activity_at', 'created_at')
-    ).order_by('-recent_updated_at', '-created_at')
+    ).order_by('-recent_updated_at', '-id')
+
+
+def _order_by_hot(queryset):
+    """Order by the precomputed hot score (see ranking_services)."""
+    return queryset.order_by('-hot_score', '-id')
+
+
+def encode_feed_cursor(sort_value, post_id, sort_field='recent_updated_at'):
+    """Encode a (sort value, id) feed position as an opaque URL-safe token."""
+    if sort_field in _DATETIME_SORT_FIELDS:
+        sort_value = sort_value.isoformat()
+    payload = json.dumps({_CURSOR_KEYS[sort_field]: sort_value, 'id': post_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_feed_cursor(cursor, sort_field='recent_updated_at'):
+    """
+    Decode a cursor produced by encode_feed_cursor for the same sort_field.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        sort_value = payload[_CURSOR_KEYS[sort_field]]
+        if sort_field in _DATETIME_SORT_FIELDS:
+            sort_value = parse_datetime(sort_value)
+        else:
+            sort_value = float(sort_value)
+        post_id = int(payload['id'])
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+    if sort_value is None:
+        raise ValueError('Invalid cursor')
+    return sort_value, post_id
+
+
+def paginate_by_cursor(queryset, cursor=None, per_page=8, id_field='id', sort_field='recent_updated_at'):
+    """
+    Keyset-paginate a queryset ordered descending by (sort_field, id).
+
+    Seeks past the cursor position with an index range condition instead of
+    OFFSET and skips the COUNT query, so every page costs the same whatever
+    the scroll depth. id_field names the post id column for querysets over
+    other models (e.g. 'post_id' for timeline entries).
+
+    Returns:
+        tuple: (list of post ids on this page, next cursor or None)
+    """
+    if cursor:
+        sort_value, post_id = decode_feed_cursor(cursor, sort_field)
+        queryset = queryset.filter(
+            Q(**{f'{sort_field}__lt': sort_value}) |
+            Q(**{sort_field: sort_value, f'{id_field}__lt': post_id})
+        )
+
+    rows = list(queryset.values_list(id_field, sort_field)[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_feed_cursor(rows[-1][1], rows[-1][0], sort_field)
+
+    return [post_id for post_id, _ in rows], next_cursor
+
+
+def _page_next_cursor(page_obj, id_field='id', sort_field='recent_updated_at'):
+    """Cursor pointing after the last post on a page-number page, so clients can switch modes."""
+    posts = list(page_obj.object_list)
+    if not page_obj.has_next() or not posts:
+        return None
+    last_post = posts[-1]
+    return encode_feed_cursor(getattr(last_post, sort_field), getattr(last_post, id_field), sort_field)
+
+
+def build_feed_pagination_data(page_obj, cursor):
+    """
+    Pagination fields for feed API responses.
+
+    Cursor requests get only has_next/next_cursor; legacy page-number requests
+    also get page/total_pages, plus a next_cursor so clients can switch over.
+    """
+    data = {
+        'has_next': page_obj.has_next(),
+        'next_cursor': getattr(page_obj, 'next_cursor', None),
+    }
+    if cursor is None:
+        data['page'] = page_obj.number
+        data['total_pages'] = page_obj.paginator.num_pages
+    return data
+
+
+def load_post_cards(post_ids, user):
+    """Fetch posts by id with card annotations, preserving the order of post_ids."""
+    posts = Post.objects.filter(id__in=post_ids).select_related(
+        'author', 'counters'
+    ).prefetch_related('courses')
+
+    posts_dict = {post.id: post for post in posts}
+    ordered_posts = [posts_dict[pid] for pid in post_ids if pid in posts_dict]
+    return annotate_post_card_context(ordered_posts, user)
+
+
+class PostCard:
+    """
+    A post card rendered from a PostListSerializer payload instead of a Post.
+
+    Exposes the attributes post_card.html reads from posts annotated by
+    load_post_cards, so cached feed pages render without loading posts.
+    """
+
+    def __init__(self, data):
+        author = data['author']
+        self.id = data['id']
+        self.title = data['title']
+        self.is_anonymous = data['is_anonymous']
+        self.author = SimpleNamespace(
+            username=author['username'],
+            first_name=author['first_name'],
+            last_name=author['last_name'],
+            userprofile=SimpleNamespace(profile_picture=SimpleNamespace(url=author.get('profile_picture_url') or '')),
+        )
+        self.created_at = parse_datetime(data['created_at'])
+        self.preview_html = mark_safe(data['preview_html'] or '')
+        self.first_image_url = data['first_image_url']
+        self.poll_data = data['poll_data']
+        self.post_type = 'poll' if self.poll_data else 'standard'
+        self.accepted_solution = data['solved']
+        self.course_context = [
+            {'name': course['name'], 'is_experienced': course['is_experienced'], 'needs_help': course['needs_help']}
+            for course in data['courses']
+        ]
+        self.views = data['views']
+        self.total_response_count = data['reply_count']
+        self.is_liked_by_user = data['is_liked']
+        self.is_following = data['is_following']
+        self._counters = SimpleNamespace(like_count=data['like_count'], follower_count=data['followers_count'])
+
+    def get_counters(self):
+        return self._counters
 
-def get_for_you_posts(user, page=1, per_page=8):
+def get_for_you_posts(user, page=1, per_page=8, cursor=None):
     """
-    Return a tuple of (annotated posts on the current page, page_obj).
+    Return the page of annotated For You posts.
+
+    When cursor is given (an empty string requests the first page) the feed is
+    keyset-paginated and a CursorPage is returned; otherwise a legacy
+    page-number Page is returned.
     """
     page = int(page)
     
     # Non-authenticated users should not see personalized feed
     if not user.is_authenticated:
+        if cursor is not None:
+            return CursorPage([])
         paginator = Paginator(Post.objects.none(), per_page)
         return paginator.get_page(1)
     
-    experienced_courses, help_needed_courses = get_user_courses(user)
-    profile = user.userprofile
-
-    current_courses = list(filter(None, [
-        profile.block_1A, profile.block_1B, profile.block_1D, profile.block_1E,
-        profile.block_2A, profile.block_2B, profile.block_2C, profile.block_2D, profile.block_2E
-    ]))
-
-    try:
-        school_life_course = Course.objects.get(name="School Life")
-    except Course.DoesNotExist:
-        school_life_course = None
-
-    base_qs = Post.objects.filter(
-        Q(courses__in=experienced_courses) | 
-        Q(courses__in=help_needed_courses) | 
-        Q(author=user) |
-        Q(courses__in=current_courses) |
-        Q(courses__isnull=True) |
-        (Q(courses=school_life_course) if school_life_course else Q())
-    ).distinct()
-    
-    if user.is_authenticated and user.is_teacher:
-        base_qs = base_qs.filter(allow_teacher=True)
+    # Posts are fanned out into per-user timelines on write (see timeline_services)
+    base_qs = get_user_timeline(user)
 
-    base_qs = _order_by_recent_activity(base_qs)
+    if cursor is not None:
+        post_ids, next_cursor = paginate_by_cursor(base_qs, cursor, per_page, id_field='post_id')
+        return CursorPage(load_post_cards(post_ids, user), next_cursor)
 
     paginator = Paginator(base_qs, per_page)
     
@@ -58,32 +220,34 @@ def get_for_you_posts(user, page=1, per_page=8):
     if page > paginator.num_pages and paginator.num_pages > 0:
         empty_page = paginator.get_page(paginator.num_pages)
         empty_page.object_list = []
+        empty_page.next_cursor = None
         return empty_page
     
     page_obj = paginator.get_page(page)
+    page_obj.next_cursor = _page_next_cursor(page_obj, id_field='post_id')
 
-    post_ids = [post.id for post in page_obj.object_list]
-
-    posts = Post.objects.filter(id__in=post_ids).annotate(
-        solution_count=Count('solutions', distinct=True),
-        comment_count=Count('solutions__comments', distinct=True),
-        total_response_count=Count('solutions', distinct=True) + Count('solutions__comments', distinct=True)
-    ).select_related('author').prefetch_related('courses', 'solutions__comments')
-
-    posts_dict = {post.id: post for post in posts}
-    ordered_posts = [posts_dict[pid] for pid in post_ids if pid in posts_dict]
-    ordered_posts = annotate_post_card_context(ordered_posts, user)
+    post_ids = [entry.post_id for entry in page_obj.object_list]
     
     # Replace page_obj's object_list with annotated posts
-    page_obj.object_list = ordered_posts
+    page_obj.object_list = load_post_cards(post_ids, user)
 
     return page_obj
 
-def get_all_posts(user, query='', page=1, per_page=8):
+def get_all_posts(user, query='', page=1, per_page=8, cursor=None, sort='recent'):
     """
-    Returns a dict with page_obj, similar to get_for_you_posts.
+    Returns the page of annotated posts, similar to get_for_you_posts.
+
+    sort is 'recent' (latest activity first) or 'hot' (precomputed hot
+    score). Cursor pagination only applies to these sorted feeds; search
+    queries are ranked by relevance and always use page numbers.
+
+    Raises:
+        ValueError: If sort is not one of FEED_SORT_FIELDS.
     """
     page = int(page)
+    if sort not in FEED_SORT_FIELDS:
+        raise ValueError('Invalid sort')
+    sort_field = FEED_SORT_FIELDS[sort]
     base_qs = Post.objects.all().distinct()
 
     # Anonymous users and teachers should only see posts marked visible to teachers.
@@ -91,13 +255,15 @@ def get_all_posts(user, query='', page=1, per_page=8):
         base_qs = base_qs.filter(allow_teacher=True)
 
     if query:
-        search_query = SearchQuery(query)
-        base_qs = base_qs.annotate(
-            rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query),
+        from forum.services.search_services import ranked_search_candidates
+        base_qs = ranked_search_candidates(base_qs, query).annotate(
             recent_updated_at=Coalesce('last_activity_at', 'created_at')
-        ).filter(rank__gte=0.3).order_by('-rank', '-recent_updated_at', '-created_at')
+        ).order_by('-rank', '-recent_updated_at', '-created_at')
     else:
-        base_qs = _order_by_recent_activity(base_qs)
+        base_qs = _order_by_hot(base_qs) if sort == 'hot' else _order_by_recent_activity(base_qs)
+        if cursor is not None:
+            post_ids, next_cursor = paginate_by_cursor(base_qs, cursor, per_page, sort_field=sort_field)
+            return CursorPage(load_post_cards(post_ids, user), next_cursor)
 
     # Paginate the base queryset first to preserve ordering
     paginator = Paginator(base_qs, per_page)
@@ -106,25 +272,17 @@ def get_all_posts(user, query='', page=1, per_page=8):
     if page > paginator.num_pages and paginator.num_pages > 0:
         empty_page = paginator.get_page(paginator.num_pages)
         empty_page.object_list = []
+        empty_page.next_cursor = None
         return empty_page
     
     page_obj = paginator.get_page(page)
+    page_obj.next_cursor = None if query else _page_next_cursor(page_obj, sort_field=sort_field)
 
     # Fetch the posts for this page with useful annotations and relations
     post_ids = [post.id for post in page_obj.object_list]
-
-    posts_qs = Post.objects.filter(id__in=post_ids).annotate(
-        solution_count=Count('solutions', distinct=True),
-        comment_count=Count('solutions__comments', distinct=True),
-        total_response_count=Count('solutions', distinct=True) + Count('solutions__comments', distinct=True)
-    ).select_related('author').prefetch_related('courses', 'solutions__comments')
-    post_dic = {post.id: post for post in posts_qs}
-    ordered_posts = [post_dic[pid] for pid in post_ids if pid in post_dic]
-
-    ordered_posts = annotate_post_card_context(ordered_posts, user)
     
     # Replace page_obj's object_list with annotated posts
-    page_obj.object_list = ordered_posts
+    page_obj.object_list = load_post_cards(post_ids, user)
 
     return page_obj
 
@@ -151,12 +309,17 @@ def paginate_posts(posts_queryset, page=1, limit=10):
         "has_next": page_obj.has_next()
     }
 
-def get_user_posts(user, page=1, per_page=8):
+def get_user_posts(user, page=1, per_page=8, cursor=None):
     page = int(page)
     posts = _order_by_recent_activity(Post.objects.filter(author=user))
+
+    if cursor is not None:
+        post_ids, next_cursor = paginate_by_cursor(posts, cursor, per_page)
+        return CursorPage(load_post_cards(post_ids, user), next_cursor)
     
     paginator = Paginator(posts, per_page)
     page_obj = paginator.get_page(page)
+    page_obj.next_cursor = _page_next_cursor(page_obj)
     
     # Annotate the posts on this page
     annotated_posts = annotate_post_card_context(list(page_obj.object_list), user)
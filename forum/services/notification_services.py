@@ -1,20 +1,30 @@
 from django.shortcuts import get_object_or_404
 from django.conf import settings
-from django.db.models import Q
-from forum.models import UserCourseExperience, UserProfile, Notification, Post, Solution
-from forum.services.utils import process_post_preview
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from forum.models import UserCourseExperience, Notification, Post, Solution, User
+from forum.services.timeline_services import SCHEDULE_BLOCK_FIELDS
+from forum.services.utils import ensure_post_previews
+from functools import lru_cache
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Recipients per batch of course notifications; also the most messages Expo accepts per request
+COURSE_NOTIFICATION_BATCH_SIZE = 100
 
-def _load_email_template(template_name: str) -> str:
-    """Load an email template from the email_templates folder next to this file."""
+
+@lru_cache(maxsize=None)
+def _read_email_template(template_name: str) -> str:
     base = Path(__file__).resolve().parent
-    tpl_path = base / 'email_templates' / template_name
+    return (base / 'email_templates' / template_name).read_text(encoding='utf-8')
+
+
+def _load_email_template(template_name: str) -> str:
+    """Load an email template from the email_templates folder next to this file, read once per process."""
     try:
-        return tpl_path.read_text(encoding='utf-8')
+        return _read_email_template(template_name)
     except Exception:
         logger.exception(f"Failed to load email template: {template_name}")
         return ""
@@ -28,91 +38,160 @@ def _render_email(template_name: str, **context) -> str:
         logger.exception(f"Failed to render email template: {template_name}")
         return tpl
 
-def send_course_notifications_service(post, courses):
+
+def schedule_course_notifications(post, courses):
+    """
+    Queue course notifications for a new post once it commits.
+
+    The fan-out runs in the send_course_notifications Celery task, so the
+    request that created the post returns without waiting on it. If the
+    broker cannot be reached the failure is logged and the post is saved
+    without notifications; the fan-out is never run inside the request.
+    """
+    course_ids = [course.id for course in courses]
+    if not course_ids:
+        return
+
+    def enqueue():
+        from forum.tasks import send_course_notifications
+        try:
+            send_course_notifications.delay(post.id, course_ids)
+        except Exception:
+            logger.exception(f"Could not queue course notifications for post {post.id}")
+
+    transaction.on_commit(enqueue)
+
+
+def _course_recipients(courses, exclude_user_id):
+    """
+    Users to notify about a post in courses, in one query.
+
+    Returns:
+        list: (user, experienced) pairs; experienced is True for users with
+        experience in one of the courses and False for users who only have
+        one in their schedule. Each user appears once, with profile loaded.
+    """
+    course_ids = [course.id for course in courses]
+    experienced = Exists(UserCourseExperience.objects.filter(user=OuterRef('pk'), course_id__in=course_ids))
+    in_schedule = Q()
+    for field in SCHEDULE_BLOCK_FIELDS:
+        in_schedule |= Q(**{f'userprofile__{field}_id__in': course_ids})
+
+    users = User.objects.annotate(experienced=experienced).filter(
+        Q(experienced=True) | in_schedule
+    ).exclude(id=exclude_user_id).select_related('userprofile').order_by('id')
+    return [(user, user.experienced) for user in users]
+
+
+def send_course_notifications_service(post, courses, batch_size=COURSE_NOTIFICATION_BATCH_SIZE):
     """
     Send notifications to users who:
     1. Have experience in the course (UserCourseExperience)
     2. Currently have the course in their schedule (any block)
+
+    Recipients are resolved in one query. Their notifications are created,
+    and their push messages and emails handed off, batch_size at a time.
+
+    Returns:
+        int: Number of users notified.
     """
-    notified_users = set()
-    
     # Handle anonymous posts - extract actual user from dict
     actual_author = post.author
     if isinstance(actual_author, dict):
         actual_author = actual_author.get('user')
-    
-    # Get users with experience in these courses
-    experienced_users = UserCourseExperience.objects.filter(
-        course__in=courses
-    ).select_related('user').distinct('user')
-    experienced_users = experienced_users.exclude(user=actual_author)
-    
-    # Get users who currently have these courses in their schedule
-    schedule_query = Q()
-    for course in courses:
-        schedule_query |= (
-            Q(block_1A=course) | Q(block_1B=course) | Q(block_1D=course) | Q(block_1E=course) |
-            Q(block_2A=course) | Q(block_2B=course) | Q(block_2C=course) | Q(block_2D=course) | Q(block_2E=course)
-        )
-    
-    current_students = UserProfile.objects.filter(
-        schedule_query
-    ).select_related('user').exclude(user=actual_author)
-    
-    # Send notifications to users with experience
-    for exp_user in experienced_users:
-        recipient = exp_user.user
-        notified_users.add(recipient.id)
-        message = process_post_preview(post)
-        url = post.get_absolute_url()
-        email_subject = f'New post in your experienced course: {post.title}'
-        email_message = _render_email(
-            'course_experienced.txt',
-            recipient_full_name=recipient.get_full_name(),
-            post_title=post.title,
-            courses=', '.join(c.name for c in courses),
-            site_url=settings.SITE_URL,
-            post_url=url,
-        )
-        send_notification_service(
-            recipient=recipient,
-            sender=actual_author,
-            notification_type='post',
-            message=message,
-            url=url,
-            post=post,
-            email_subject=email_subject,
-            email_message=email_message,
-        )
-    
-    # Send notifications to current students (if not already notified)
-    for profile in current_students:
-        recipient = profile.user
-        if recipient.id not in notified_users:
-            notified_users.add(recipient.id)
-            message = process_post_preview(post)
-            url = post.get_absolute_url()
-            email_subject = f'New post in your course: {post.title}'
-            email_message = _render_email(
-                'course_current.txt',
-                recipient_full_name=recipient.get_full_name(),
-                post_title=post.title,
-                courses=', '.join(c.name for c in courses),
-                site_url=settings.SITE_URL,
-                post_url=url,
-            )
-            send_notification_service(
+
+    recipients = _course_recipients(courses, getattr(actual_author, 'id', None))
+    if not recipients:
+        return 0
+
+    # Everything but the recipient's name is the same for every notification
+    message = ensure_post_previews(post).preview_text
+    url = post.get_absolute_url()
+    course_names = ', '.join(c.name for c in courses)
+    push_body = message[:100] + "..." if len(message) > 100 else message
+    push_data = {'notification_type': 'post', 'post_id': str(post.id), 'solution_id': None}
+    try:
+        from forum.services.deep_link_service import create_notification_deep_link
+        push_data.update(create_notification_deep_link(notification_type='post', post=post, user=actual_author))
+    except Exception as e:
+        logger.error(f"Failed to build notification deep link: {str(e)}")
+
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        notifications = Notification.objects.bulk_create([
+            Notification(
                 recipient=recipient,
                 sender=actual_author,
                 notification_type='post',
-                message=message,
-                url=url,
                 post=post,
-                email_subject=email_subject,
-                email_message=email_message,
+                message=message,
             )
-    
-    logger.info(f"Sent notifications for post {post.id} to {len(notified_users)} users (experienced + current students)")
+            for recipient, _ in batch
+        ])
+        _send_course_emails(post, batch, course_names, url)
+        _send_course_pushes(post, batch, notifications, push_body, push_data)
+
+    logger.info(f"Sent notifications for post {post.id} to {len(recipients)} users (experienced + current students)")
+    return len(recipients)
+
+
+def _send_course_emails(post, batch, course_names, url):
+    """Queue one email task for a batch of course notification recipients."""
+    emails = []
+    for recipient, experienced in batch:
+        if not recipient.personal_email:
+            continue
+        if experienced:
+            subject, template_name = f'New post in your experienced course: {post.title}', 'course_experienced.txt'
+        else:
+            subject, template_name = f'New post in your course: {post.title}', 'course_current.txt'
+        emails.append([recipient.personal_email, subject, _render_email(
+            template_name,
+            recipient_full_name=recipient.get_full_name(),
+            post_title=post.title,
+            courses=course_names,
+            site_url=settings.SITE_URL,
+            post_url=url,
+        )])
+
+    if emails:
+        from forum.tasks import send_bulk_email_notifications
+        send_bulk_email_notifications.delay(emails)
+
+
+def _send_course_pushes(post, batch, notifications, push_body, push_data):
+    """Send a batch's push messages in one Expo request, with unread badges counted in one query."""
+    tokens = {}
+    for recipient, _ in batch:
+        profile = getattr(recipient, 'userprofile', None)
+        if profile is not None and profile.expo_push_token:
+            tokens[recipient.id] = profile.expo_push_token
+    if not tokens:
+        return
+
+    unread_counts = dict(
+        Notification.objects.filter(recipient_id__in=tokens, is_read=False).values('recipient_id').annotate(
+            total=Count('id')
+        ).values_list('recipient_id', 'total')
+    )
+    messages = [
+        {
+            'to': tokens[notification.recipient_id],
+            'title': post.title,
+            'body': push_body,
+            'data': {**push_data, 'notification_id': str(notification.id)},
+            'badge': unread_counts.get(notification.recipient_id, 0),
+            'sound': 'default',
+            'priority': 'high',
+            'channelId': 'default'
+        }
+        for notification in notifications if notification.recipient_id in tokens
+    ]
+    try:
+        from forum.services.expo_push_service import expo_push_service
+        expo_push_service.send_bulk_push_notifications(messages)
+    except Exception as e:
+        logger.error(f"Failed to send push notifications: {str(e)}")
 
 def send_solution_notification_service(solution):
     post = solution.post
@@ -0,0 +1,226 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from forum.models import PollOption, PollVote
+from forum.services.feed_services import CursorPage, paginate_by_cursor
+
+# Seconds a poll's counts stay cached; votes invalidate them sooner
+POLL_TALLY_TIMEOUT = 600
+# Newest voters shown beside each option of a public poll
+RECENT_VOTERS_LIMIT = 3
+# Voters per page of an option's full voter list
+POLL_VOTERS_PAGE_SIZE = 20
+
+
+class PollTally:
+    """
+    Vote counts of one poll, plus the viewer's own vote when one was asked for.
+
+    Attributes:
+        poll_id: The poll counted.
+        total_votes: Number of voters (a multiple-choice vote counts once).
+        option_counts: {option_id: votes}, for every option of the poll.
+        user_vote_id: The viewer's PollVote id, or None.
+        selected_option_ids: Options the viewer chose, in option order.
+    """
+
+    __slots__ = ('poll_id', 'total_votes', 'option_counts', 'user_vote_id', 'selected_option_ids')
+
+    def __init__(self, poll_id, total_votes=0, option_counts=None, user_vote_id=None, selected_option_ids=None):
+        self.poll_id = poll_id
+        self.total_votes = total_votes
+        self.option_counts = option_counts if option_counts is not None else {}
+        self.user_vote_id = user_vote_id
+        self.selected_option_ids = selected_option_ids if selected_option_ids is not None else []
+
+    def vote_count(self, option_id):
+        return self.option_counts.get(option_id, 0)
+
+    def percentage(self, option_id):
+        if not self.total_votes:
+            return 0
+        return self.vote_count(option_id) / self.total_votes * 100
+
+
+def _cache_key(poll_id):
+    return f'poll_tally:{poll_id}'
+
+
+def _recent_voters_cache_key(poll_id):
+    return f'poll_recent_voters:{poll_id}'
+
+
+def _count_polls(poll_ids, user):
+    """Read the vote counters of every option in poll_ids, with user's selections, in one query."""
+    voter_totals = PollVote.objects.filter(poll_id=OuterRef('poll_id')).order_by().values('poll_id').annotate(
+        total=Count('id')
+    ).values('total')
+    # Polls without a counters row (see counter_services) fall back to counting their votes
+    annotations = {'poll_total': Coalesce(F('poll__counters__poll_vote_count'), Subquery(voter_totals))}
+    if user is not None:
+        annotations['user_vote_id'] = Subquery(
+            PollVote.selected_options.through.objects.filter(
+                polloption_id=OuterRef('id'), pollvote__user_id=user.id
+            ).values('pollvote_id')[:1]
+        )
+
+    tallies = {poll_id: PollTally(poll_id) for poll_id in poll_ids}
+    rows = PollOption.objects.filter(poll_id__in=poll_ids).annotate(**annotations).values(
+        'poll_id', 'id', 'vote_count', *annotations
+    ).order_by('created_at', 'id')
+    for row in rows:
+        tally = tallies[row['poll_id']]
+        tally.total_votes = row['poll_total'] or 0
+        tally.option_counts[row['id']] = row['vote_count']
+        if row.get('user_vote_id') is not None:
+            tally.user_vote_id = row['user_vote_id']
+            tally.selected_option_ids.append(row['id'])
+    return tallies
+
+
+def _attach_user_votes(tallies, user):
+    """Fill in user's selections for tallies whose counts came from the cache."""
+    selections = PollVote.selected_options.through.objects.filter(
+        pollvote__user_id=user.id, pollvote__poll_id__in=list(tallies)
+    ).values_list('pollvote__poll_id', 'pollvote_id', 'polloption_id').order_by(
+        'polloption__created_at', 'polloption_id'
+    )
+    for poll_id, vote_id, option_id in selections:
+        tally = tallies[poll_id]
+        tally.user_vote_id = vote_id
+        tally.selected_option_ids.append(option_id)
+
+
+def get_poll_tallies(poll_ids, user=None):
+    """
+    Vote counts for many polls, and user's selections in them.
+
+    Counts are cached per poll. Polls missing from the cache have their
+    option counters (see poll_vote_services) read together in one query that
+    also finds user's selections; the selections for cached polls cost one
+    more query.
+
+    Returns:
+        dict: {poll_id: PollTally} for every id in poll_ids.
+    """
+    poll_ids = list(dict.fromkeys(poll_ids))
+    if not poll_ids:
+        return {}
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    cached = cache.get_many([_cache_key(poll_id) for poll_id in poll_ids])
+    tallies = {}
+    for poll_id in poll_ids:
+        counts = cached.get(_cache_key(poll_id))
+        if counts is not None:
+            tallies[poll_id] = PollTally(poll_id, counts['total_votes'], dict(counts['option_counts']))
+    if user is not None and tallies:
+        _attach_user_votes(tallies, user)
+
+    missing = [poll_id for poll_id in poll_ids if poll_id not in tallies]
+    if missing:
+        counted = _count_polls(missing, user)
+        cache.set_many({
+            _cache_key(poll_id): {'total_votes': tally.total_votes, 'option_counts': tally.option_counts}
+            for poll_id, tally in counted.items()
+        }, POLL_TALLY_TIMEOUT)
+        tallies.update(counted)
+
+    return {poll_id: tallies[poll_id] for poll_id in poll_ids}
+
+
+def get_poll_tally(poll_id, user=None):
+    return get_poll_tallies([poll_id], user)[poll_id]
+
+
+def _load_recent_voters(poll_ids):
+    """The newest RECENT_VOTERS_LIMIT voters of every option of the polls, in one windowed query."""
+    from forum.serializers.poll import serialize_voter
+
+    recent = {poll_id: {} for poll_id in poll_ids}
+    selections = PollVote.selected_options.through.objects.filter(
+        pollvote__poll_id__in=poll_ids
+    ).annotate(
+        voter_rank=Window(
+            RowNumber(),
+            partition_by=F('polloption_id'),
+            order_by=[F('pollvote__updated_at').desc(), F('pollvote_id').desc()],
+        )
+    ).filter(voter_rank__lte=RECENT_VOTERS_LIMIT).select_related(
+        'pollvote__user__userprofile'
+    ).order_by('polloption_id', 'voter_rank')
+    for selection in selections:
+        vote = selection.pollvote
+        recent[vote.poll_id].setdefault(selection.polloption_id, []).append(serialize_voter(vote.user))
+    return recent
+
+
+def get_recent_voters(poll_ids):
+    """
+    The newest voters of each option of many polls, for option avatars.
+
+    Cached per poll alongside the counts and dropped with them.
+
+    Returns:
+        dict: {poll_id: {option_id: [voter data, newest first]}} for every id
+        in poll_ids; options without votes are left out.
+    """
+    poll_ids = list(dict.fromkeys(poll_ids))
+    if not poll_ids:
+        return {}
+
+    cached = cache.get_many([_recent_voters_cache_key(poll_id) for poll_id in poll_ids])
+    recent = {
+        poll_id: cached[_recent_voters_cache_key(poll_id)]
+        for poll_id in poll_ids if _recent_voters_cache_key(poll_id) in cached
+    }
+    missing = [poll_id for poll_id in poll_ids if poll_id not in recent]
+    if missing:
+        loaded = _load_recent_voters(missing)
+        cache.set_many({
+            _recent_voters_cache_key(poll_id): voters for poll_id, voters in loaded.items()
+        }, POLL_TALLY_TIMEOUT)
+        recent.update(loaded)
+
+    return {poll_id: recent[poll_id] for poll_id in poll_ids}
+
+
+def get_option_voters(option, cursor=None, per_page=POLL_VOTERS_PAGE_SIZE):
+    """
+    One page of the voters of a poll option, newest vote first.
+
+    Keyset-paginated on (vote time, vote id), so pages stay stable while
+    votes come in. The vote time lives on PollVote, not on the selection
+    rows, so each page still sorts all of the option's selections; that is
+    bounded by the poll's voter count.
+
+    Returns:
+        CursorPage: Voter data, with the cursor of the following page.
+
+    Raises:
+        ValueError: If cursor is malformed.
+    """
+    from forum.serializers.poll import serialize_voter
+
+    selections = PollVote.selected_options.through.objects.filter(polloption_id=option.id).annotate(
+        voted_at=F('pollvote__updated_at')
+    ).order_by('-voted_at', '-pollvote_id')
+    vote_ids, next_cursor = paginate_by_cursor(
+        selections, cursor, per_page, id_field='pollvote_id', sort_field='voted_at'
+    )
+    votes = PollVote.objects.select_related('user__userprofile').in_bulk(vote_ids)
+    return CursorPage([serialize_voter(votes[vote_id].user) for vote_id in vote_ids], next_cursor)
+
+
+def invalidate_poll_tally(poll_id):
+    """
+    Drop a poll's cached counts and recent voters after a vote or option change.
+
+    The keys are deleted straight away and again once the change commits, so
+    a reader that counted the old rows in the meantime cannot leave them cached.
+    """
+    keys = [_cache_key(poll_id), _recent_voters_cache_key(poll_id)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
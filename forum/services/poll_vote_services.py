@@ -0,0 +1,174 @@
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from forum.models import Post, PostCounters, PollOption, PollVote
+from forum.services.counter_services import reconcile_post_counters
+from forum.services.poll_tally_services import invalidate_poll_tally
+from forum.services.timeline_services import bump_timeline_activity
+
+# A poll's activity is bumped once per this many voters, so busy polls don't dominate the feed
+ACTIVITY_VOTE_INTERVAL = 5
+
+_UPSERT_VOTE_SQL = f"""
+INSERT INTO {PollVote._meta.db_table} (poll_id, user_id, created_at, updated_at)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (poll_id, user_id) DO UPDATE SET updated_at = EXCLUDED.updated_at
+RETURNING id, (xmax = 0)
+"""
+
+_INCREMENT_VOTER_COUNT_SQL = f"""
+UPDATE {PostCounters._meta.db_table}
+SET poll_vote_count = poll_vote_count + 1, updated_at = %s
+WHERE post_id = %s
+RETURNING poll_vote_count
+"""
+
+
+def adjust_option_counters(deltas):
+    """
+    Atomically apply {option_id: delta} to poll option vote counters.
+
+    Rows are locked in id order first when several change, so concurrent
+    votes moving between the same options cannot deadlock.
+    """
+    deltas = {option_id: delta for option_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    options = PollOption.objects.filter(id__in=deltas)
+    if len(deltas) > 1:
+        list(options.order_by('id').select_for_update().values_list('id', flat=True))
+    options.update(vote_count=F('vote_count') + Case(
+        *[When(id=option_id, then=Value(delta)) for option_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+
+
+def count_new_voter(poll_id):
+    """
+    Add a voter to a poll's counters and bump its activity every ACTIVITY_VOTE_INTERVAL voters.
+
+    Returns:
+        int: The poll's voter count after this vote.
+    """
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(_INCREMENT_VOTER_COUNT_SQL, [now, poll_id])
+        row = cursor.fetchone()
+    if row is None:
+        # Polls from before the counters table: rebuild the row, which already counts this vote
+        reconcile_post_counters([poll_id])
+        voter_count = PostCounters.objects.filter(post_id=poll_id).values_list('poll_vote_count', flat=True).first() or 0
+    else:
+        voter_count = row[0]
+
+    if voter_count and voter_count % ACTIVITY_VOTE_INTERVAL == 0:
+        Post.objects.filter(id=poll_id).update(last_activity_at=now)
+        bump_timeline_activity(poll_id, now)
+    return voter_count
+
+
+def _clean_option_ids(poll, option_ids):
+    """
+    The poll's options among option_ids.
+
+    Returns:
+        tuple: (set of option ids, error message or None)
+    """
+    try:
+        option_ids = {int(option_id) for option_id in option_ids}
+    except (TypeError, ValueError):
+        return set(), 'Invalid option selection'
+    if not option_ids:
+        return set(), 'No options selected'
+
+    valid_option_ids = set(poll.options.filter(id__in=option_ids).values_list('id', flat=True))
+    if not valid_option_ids:
+        return set(), 'No valid options selected'
+    if not poll.allow_multiple_choice and len(valid_option_ids) > 1:
+        return set(), 'You may only select one option for this poll'
+    return valid_option_ids, None
+
+
+def cast_poll_vote(poll, user, option_ids):
+    """
+    Record user's vote on poll, replacing any earlier choice.
+
+    The vote row is upserted on its (poll, user) key, so concurrent votes by
+    the same user cannot collide on the unique constraint; the upsert also
+    locks the row until commit, so the option set is replaced by one vote at
+    a time. Only changed selections are written, and option and voter
+    counters move by atomic increments.
+
+    Returns:
+        dict: vote_id, created and selected_option_ids, or an 'error' key.
+    """
+    valid_option_ids, error = _clean_option_ids(poll, option_ids)
+    if error:
+        return {'error': error}
+
+    through = PollVote.selected_options.through
+    with transaction.atomic():
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(_UPSERT_VOTE_SQL, [poll.id, user.id, now, now])
+            vote_id, created = cursor.fetchone()
+
+        previous = set() if created else set(
+            through.objects.filter(pollvote_id=vote_id).values_list('polloption_id', flat=True)
+        )
+        added = valid_option_ids - previous
+        removed = previous - valid_option_ids
+
+        if removed:
+            through.objects.filter(pollvote_id=vote_id, polloption_id__in=removed).delete()
+        if added:
+            through.objects.bulk_create([
+                through(pollvote_id=vote_id, polloption_id=option_id) for option_id in sorted(added)
+            ])
+        adjust_option_counters({
+            **{option_id: 1 for option_id in added},
+            **{option_id: -1 for option_id in removed},
+        })
+        if created:
+            count_new_voter(poll.id)
+        if added or removed:
+            invalidate_poll_tally(poll.id)
+
+    return {'vote_id': vote_id, 'created': created, 'selected_option_ids': sorted(valid_option_ids)}
+
+
+def remove_poll_vote(poll, user):
+    """
+    Delete user's vote on poll. Counters are adjusted by the PollVote delete signals.
+
+    Returns:
+        dict: success, or an 'error' key when user has not voted.
+    """
+    deleted, _ = PollVote.objects.filter(poll=poll, user=user).delete()
+    if not deleted:
+        return {'error': 'No vote found to remove'}
+    return {'success': True}
+
+
+def reconcile_poll_option_counts(poll_ids=None):
+    """
+    Recount option vote counters from the selections and repair drifted rows.
+
+    Returns:
+        int: Number of options corrected.
+    """
+    counts = PollVote.selected_options.through.objects.filter(
+        polloption_id=OuterRef('id')
+    ).order_by().values('polloption_id').annotate(total=Count('*')).values('total')
+    options = PollOption.objects.annotate(
+        actual=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    ).exclude(vote_count=F('actual'))
+    if poll_ids is not None:
+        options = options.filter(poll_id__in=list(poll_ids))
+
+    repaired = 0
+    for option_id, actual in options.values_list('id', 'actual'):
+        repaired += PollOption.objects.filter(id=option_id).update(vote_count=actual)
+    return repaired
@@ -1,8 +1,15 @@
 from django.shortcuts import get_object_or_404
 from django.db.models import F, Case, When, IntegerField
 from forum.models import Post, Course, PostLike, FollowedPost, Poll, PollOption
-from forum.services.utils import detect_bad_words, selective_quote_replace
-from forum.services.notification_services import send_course_notifications_service
+from forum.services.utils import detect_bad_words, selective_quote_replace, PREVIEW_VERSION, PREVIEW_FIELDS
+from forum.services.notification_services import schedule_course_notifications
+from forum.services.timeline_services import schedule_post_fan_out
+from forum.services.feed_cache_services import bump_feed_generations
+from forum.services.search_cache_services import bump_search_generation
+from forum.services.search_backends import get_search_backend
+from forum.services.related_posts_services import add_related_post, compute_related_posts
+from forum.services.comment_tree_services import load_comment_trees
+from forum.services.view_services import record_post_view
 import json
 import logging
 
@@ -24,7 +31,7 @@ def get_post_detail_service(post_id, user=None):
         # Check teacher visibility
         _check_teacher_visibility(user, post)
         
-        solutions = post.solutions.annotate(
+        solutions = post.solutions.select_related('author').annotate(
             vote_score=F('upvotes') - F('downvotes')
         ).order_by(
             Case(
@@ -35,6 +42,7 @@ def get_post_detail_service(post_id, user=None):
             '-vote_score',
             '-created_at'
         )
+        solutions = load_comment_trees(solutions)
 
         processed_solutions = []
         for solution in solutions:
@@ -44,7 +52,7 @@ def get_post_detail_service(post_id, user=None):
                     solution_content = selective_quote_replace(solution_content)
                     solution_content = json.loads(solution_content)
                 
-                comments = solution.comments.select_related('author').order_by('created_at')
+                comments = solution.comments.all()
                 processed_comments = [{
                     'id': comment.id,
                     'content': comment.content,
@@ -66,9 +74,7 @@ def get_post_detail_service(post_id, user=None):
             except Exception as e:
                 logger.error(f"Error processing solution {solution.id}: {e}")
 
-        post = Post.objects.get(id=post_id)
-        post.views += 1
-        post.save()
+        record_post_view(post.id, user)
 
         return {
             'id': post.id,
@@ -119,7 +125,12 @@ def create_post_service(user, data):
         if course_ids:
             courses = Course.objects.filter(id__in=course_ids)
             post.courses.set(courses)
-            send_course_notifications_service(post, courses)
+            schedule_course_notifications(post, courses)
+
+        schedule_post_fan_out(post)
+        add_related_post(post)
+        bump_feed_generations()
+        bump_search_generation()
 
         return {
             'id': post.id,
@@ -158,12 +169,60 @@ def update_post_service(user, post_id, data):
             post.courses.set(courses)
 
         post.save()
+
+        # Course or teacher visibility changes alter who should see the post
+        if 'courses' in data or 'allow_teacher' in data:
+            schedule_post_fan_out(post)
+        if 'title' in data or 'courses' in data:
+            compute_related_posts(post)
+        bump_feed_generations()
+        bump_search_generation()
+
         return {'message': 'Post updated successfully'}
     except ValueError as e:
         return {'error': f"{str(e)}"}
     except Exception as e:
         return {'error': str(e)}
 
+def backfill_post_previews_service(batch_size=500, force=False):
+    """
+    Regenerate stored previews for posts rendered by an older PREVIEW_VERSION.
+
+    bulk_update skips post_save, so each batch is also re-indexed directly
+    when the search backend keeps a shadow index of preview text.
+
+    Args:
+        batch_size: Number of posts loaded and updated per round trip.
+        force: Regenerate every post regardless of its stored version.
+
+    Returns:
+        int: Number of posts updated.
+    """
+    backend = get_search_backend()
+    fields = ['id', 'content', 'preview_version']
+    if backend.maintains_shadow_index:
+        fields.append('title')
+    queryset = Post.objects.order_by('id').only(*fields)
+    if not force:
+        queryset = queryset.exclude(preview_version=PREVIEW_VERSION)
+
+    updated = 0
+    last_id = 0
+    while True:
+        posts = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not posts:
+            break
+        last_id = posts[-1].id
+
+        for post in posts:
+            post.refresh_preview_fields()
+        Post.objects.bulk_update(posts, PREVIEW_FIELDS)
+        if backend.maintains_shadow_index:
+            backend.index_posts(posts)
+        updated += len(posts)
+
+    return updated
+
 def delete_post_service(user, post_id):
     try:
         post = get_object_or_404(Post, id=post_id)
@@ -172,6 +231,8 @@ def delete_post_service(user, post_id):
             return {'error': 'Permission denied'}
             
         post.delete()
+        bump_feed_generations()
+        bump_search_generation()
         return {'message': 'Post deleted successfully'}
     except Exception as e:
         return {'error': str(e)}
@@ -358,7 +419,12 @@ def create_poll_service(user, data):
         if course_ids:
             courses = Course.objects.filter(id__in=course_ids)
             poll.courses.set(courses)
-            send_course_notifications_service(poll, courses)
+            schedule_course_notifications(poll, courses)
+
+        schedule_post_fan_out(poll)
+        add_related_post(poll)
+        bump_feed_generations()
+        bump_search_generation()
 
         return {
             'id': poll.id,
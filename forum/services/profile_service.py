@@ -3,14 +3,19 @@ import os
 from PIL import Image
 from io import BytesIO
 from django.core.paginator import Paginator
-from django.db.models import Count
-from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from forum.models import User, Course, Post, Solution, UserCourseExperience, UserCourseHelp, UserProfile
 from forum.forms import UserCourseExperienceForm, UserCourseHelpForm
-from forum.services.utils import detect_bad_words, annotate_post_card_context
+from forum.services.utils import detect_bad_words
+from forum.services.feed_services import (
+    CursorPage,
+    _order_by_recent_activity,
+    _page_next_cursor,
+    load_post_cards,
+    paginate_by_cursor,
+)
 from forum.serializers import BlockSerializer
 
 
@@ -48,8 +53,13 @@ def compress_image(image_file, max_width=1200, quality=85):
     return ContentFile(output.getvalue())
 
 
-def get_profile_posts_page(viewing_user, profile_user, page=1, per_page=8):
-    """Return paginated public profile posts for a target user."""
+def get_profile_posts_page(viewing_user, profile_user, page=1, per_page=8, cursor=None):
+    """
+    Return paginated public profile posts for a target user.
+
+    Passing cursor (an empty string for the first page) switches to keyset
+    pagination and returns a CursorPage.
+    """
     page = int(page)
     per_page = int(per_page)
 
@@ -61,9 +71,11 @@ def get_profile_posts_page(viewing_user, profile_user, page=1, per_page=8):
     if viewing_user.is_authenticated and viewing_user.is_teacher:
         base_qs = base_qs.filter(allow_teacher=True)
 
-    base_qs = base_qs.annotate(
-        recent_updated_at=Coalesce('last_activity_at', 'created_at')
-    ).order_by('-recent_updated_at', '-created_at')
+    base_qs = _order_by_recent_activity(base_qs)
+
+    if cursor is not None:
+        post_ids, next_cursor = paginate_by_cursor(base_qs, cursor, per_page)
+        return CursorPage(load_post_cards(post_ids, viewing_user), next_cursor)
 
     paginator = Paginator(base_qs, per_page)
 
@@ -71,22 +83,14 @@ def get_profile_posts_page(viewing_user, profile_user, page=1, per_page=8):
     if page > paginator.num_pages and paginator.num_pages > 0:
         empty_page = paginator.get_page(paginator.num_pages)
         empty_page.object_list = []
+        empty_page.next_cursor = None
         return empty_page
 
     page_obj = paginator.get_page(page)
+    page_obj.next_cursor = _page_next_cursor(page_obj)
     post_ids = [post.id for post in page_obj.object_list]
 
-    posts_qs = Post.objects.filter(id__in=post_ids).annotate(
-        solution_count=Count('solutions', distinct=True),
-        comment_count=Count('solutions__comments', distinct=True),
-        total_response_count=Count('solutions', distinct=True) + Count('solutions__comments', distinct=True)
-    ).select_related('author').prefetch_related('courses', 'solutions__comments')
-
-    posts_dict = {post.id: post for post in posts_qs}
-    ordered_posts = [posts_dict[pid] for pid in post_ids if pid in posts_dict]
-    ordered_posts = annotate_post_card_context(ordered_posts, viewing_user)
-
-    page_obj.object_list = ordered_posts
+    page_obj.object_list = load_post_cards(post_ids, viewing_user)
     return page_obj
 
 def get_profile_context(request, username):
@@ -0,0 +1,85 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import F, Q
+from django.utils import timezone
+from forum.models import Post
+
+# Engagement weights: answers matter most, passive signals least
+LIKE_WEIGHT = 1.0
+SOLUTION_WEIGHT = 3.0
+COMMENT_WEIGHT = 1.5
+POLL_VOTE_WEIGHT = 0.5
+VIEW_WEIGHT = 0.05
+
+# Seconds of post age worth one order of magnitude of engagement
+HOT_SCORE_TIME_SCALE = 45000
+HOT_SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def compute_hot_score(created_at=None, likes=0, solutions=0, comments=0, poll_votes=0, views=0):
+    """
+    Decayed hot score for a post.
+
+    log10 of weighted engagement plus a term that grows with creation time,
+    so a post needs ten times the engagement to outrank one created
+    HOT_SCORE_TIME_SCALE seconds later. Scores only change when engagement
+    does, which lets them be recomputed incrementally instead of on a clock.
+    """
+    engagement = (
+        likes * LIKE_WEIGHT +
+        solutions * SOLUTION_WEIGHT +
+        comments * COMMENT_WEIGHT +
+        poll_votes * POLL_VOTE_WEIGHT +
+        views * VIEW_WEIGHT
+    )
+    created_at = created_at or timezone.now()
+    age_term = (created_at - HOT_SCORE_EPOCH).total_seconds() / HOT_SCORE_TIME_SCALE
+    return round(math.log10(max(engagement, 1)) + age_term, 7)
+
+
+def _post_hot_score(post):
+    counters = post.get_counters()
+    return compute_hot_score(
+        post.created_at,
+        likes=counters.like_count,
+        solutions=counters.solution_count,
+        comments=counters.comment_count,
+        poll_votes=counters.poll_vote_count,
+        views=post.views,
+    )
+
+
+def stale_hot_score_posts():
+    """Posts never scored, or whose counters or activity changed since they were last scored."""
+    return Post.objects.filter(
+        Q(hot_score_updated_at__isnull=True) |
+        Q(counters__updated_at__gt=F('hot_score_updated_at')) |
+        Q(last_activity_at__gt=F('hot_score_updated_at'))
+    )
+
+
+def recompute_hot_scores(batch_size=500):
+    """
+    Recompute hot scores for posts touched since they were last scored.
+
+    Returns:
+        int: Number of posts rescored.
+    """
+    queryset = stale_hot_score_posts().select_related('counters').order_by('id')
+
+    rescored = 0
+    last_id = 0
+    while True:
+        posts = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not posts:
+            break
+        last_id = posts[-1].id
+
+        now = timezone.now()
+        for post in posts:
+            post.hot_score = _post_hot_score(post)
+            post.hot_score_updated_at = now
+        Post.objects.bulk_update(posts, ['hot_score', 'hot_score_updated_at'])
+        rescored += len(posts)
+
+    return rescored
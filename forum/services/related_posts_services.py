@@ -0,0 +1,179 @@
+import re
+from functools import reduce
+from operator import or_
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+from forum.models import Post, RelatedPost
+
+# Related posts stored per post and returned while composing
+RELATED_POSTS_LIMIT = 5
+# Minimum title trigram similarity plus full-text rank for a post to count as related
+RELATED_MIN_SCORE = 0.15
+# Shorter titles are too vague to look up while composing
+RELATED_MIN_TITLE_LENGTH = 8
+# Title words used for the full-text half of the match
+RELATED_MAX_TITLE_WORDS = 16
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _title_search_query(title):
+    """A full-text query matching posts containing any word of title, or None if it has none."""
+    words = list(dict.fromkeys(word.lower() for word in _WORD_RE.findall(title)))[:RELATED_MAX_TITLE_WORDS]
+    if not words:
+        return None
+    return reduce(or_, (SearchQuery(word) for word in words))
+
+
+def find_related_posts(title, course_ids, exclude_ids=(), limit=RELATED_POSTS_LIMIT):
+    """
+    Posts whose titles or text are most similar to title, in any of course_ids.
+
+    Candidates are served by the post title trigram and search vector GIN
+    indexes. Without course_ids every post is a candidate.
+
+    Returns:
+        list: Up to limit (post_id, score) pairs, most similar first.
+    """
+    title = title.strip()
+    if len(title) < RELATED_MIN_TITLE_LENGTH:
+        return []
+
+    posts = Post.objects.exclude(id__in=exclude_ids)
+    if course_ids:
+        posts = posts.filter(
+            id__in=Post.courses.through.objects.filter(course_id__in=course_ids).values('post_id')
+        )
+
+    candidates = Q(title__trigram_similar=title)
+    score = TrigramSimilarity('title', title)
+    search_query = _title_search_query(title)
+    if search_query is not None:
+        candidates |= Q(search_vector=search_query)
+        score = score + SearchRank(F('search_vector'), search_query)
+
+    return list(
+        posts.filter(candidates).annotate(score=score).filter(
+            score__gte=RELATED_MIN_SCORE
+        ).order_by('-score', '-id').values_list('id', 'score')[:limit]
+    )
+
+
+def compute_related_posts(post):
+    """
+    Replace post's stored related posts with its current top matches.
+
+    Returns:
+        list: The stored (post_id, score) pairs.
+    """
+    course_ids = list(post.courses.values_list('id', flat=True))
+    matches = find_related_posts(post.title, course_ids, exclude_ids=[post.id])
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post=post).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post=post, related_post_id=related_id, score=score)
+            for related_id, score in matches
+        ])
+        Post.objects.filter(id=post.id).update(related_posts_computed_at=timezone.now())
+    return matches
+
+
+def add_related_post(post):
+    """
+    Store the related posts of a new post and offer it to the lists of those posts.
+
+    A match shares a course with the post, so the post is a candidate for
+    the match's own list: it is added there and each list is trimmed back
+    to its top RELATED_POSTS_LIMIT. Other posts pick up the new post when
+    they are next recomputed.
+    """
+    matches = compute_related_posts(post)
+    if not matches:
+        return matches
+
+    with transaction.atomic():
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=related_id, related_post=post, score=score)
+            for related_id, score in matches
+        ], ignore_conflicts=True)
+        for related_id, _ in matches:
+            entries = RelatedPost.objects.filter(post_id=related_id)
+            keep = list(entries.order_by('-score', '-related_post_id').values_list('id', flat=True)[:RELATED_POSTS_LIMIT])
+            entries.exclude(id__in=keep).delete()
+    return matches
+
+
+def backfill_related_posts(batch_size=200, force=False):
+    """
+    Compute stored related posts for posts that have never had them computed.
+
+    Args:
+        batch_size: Number of posts loaded per round trip.
+        force: Recompute every post.
+
+    Returns:
+        int: Number of posts computed.
+    """
+    queryset = Post.objects.order_by('id').only('id', 'title')
+    if not force:
+        queryset = queryset.filter(related_posts_computed_at__isnull=True)
+
+    computed = 0
+    last_id = 0
+    while True:
+        posts = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not posts:
+            break
+        last_id = posts[-1].id
+        for post in posts:
+            compute_related_posts(post)
+        computed += len(posts)
+    return computed
+
+
+def _visible_to(queryset, user, allow_teacher_field='allow_teacher'):
+    # Anonymous users and teachers only see posts marked visible to teachers (as in the feeds)
+    if user is None or not user.is_authenticated or user.is_teacher:
+        return queryset.filter(**{allow_teacher_field: True})
+    return queryset
+
+
+def _related_post_data(post, score):
+    return {
+        'id': post.id,
+        'title': post.title,
+        'url': reverse('post_detail', args=[post.id]),
+        'solved': post.solved,
+        'score': round(score, 3),
+    }
+
+
+def get_related_posts(post, user):
+    """
+    The stored related posts of post that user may see, most similar first.
+
+    Posts created before related posts were stored are computed once on
+    first read.
+    """
+    if post.related_posts_computed_at is None:
+        compute_related_posts(post)
+
+    entries = _visible_to(
+        RelatedPost.objects.filter(post=post), user, 'related_post__allow_teacher'
+    ).select_related('related_post').order_by('-score', '-related_post_id')
+    return [_related_post_data(entry.related_post, entry.score) for entry in entries]
+
+
+def suggest_related_posts(user, title, course_ids):
+    """Posts similar to a post being composed, for duplicate-question hints."""
+    matches = find_related_posts(title, course_ids, limit=RELATED_POSTS_LIMIT * 2)
+    if not matches:
+        return []
+    scores = dict(matches)
+    posts = _visible_to(Post.objects.filter(id__in=scores), user)
+    ranked = sorted(posts.only('id', 'title', 'solved'), key=lambda match: (-scores[match.id], -match.id))
+    return [_related_post_data(match, scores[match.id]) for match in ranked[:RELATED_POSTS_LIMIT]]
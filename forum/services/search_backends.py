@@ -0,0 +1,257 @@
+import re
+import sqlite3
+import threading
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchHeadline, TrigramSimilarity
+from django.db.models import F, Q, Case, When, Value, FloatField
+from django.db.models.functions import Cast
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+from forum.models import Post
+
+# Minimum combined full-text rank and title similarity for a post to match (Postgres backend)
+SEARCH_MIN_RANK = 0.3
+# Best FTS5 matches turned into candidates per query (SQLite backend)
+FTS5_CANDIDATE_LIMIT = 1000
+# bm25 weight of the title column relative to the post text, like setweight 'A' over 'B'
+FTS5_TITLE_WEIGHT = 10.0
+
+# Headline markers; control characters cannot collide with escaped post text
+HEADLINE_START = '\x02'
+HEADLINE_STOP = '\x03'
+
+_FTS5_TOKEN_RE = re.compile(r'\w+')
+
+
+def render_headline(headline):
+    """Escape a highlighted snippet and turn its markers into <mark> tags."""
+    return mark_safe(
+        escape(headline).replace(HEADLINE_START, '<mark>').replace(HEADLINE_STOP, '</mark>')
+    )
+
+
+class SearchBackend:
+    """
+    Ranks posts for search_services.
+
+    candidates() must return the matching posts of a queryset annotated with
+    a float `rank` (higher is more relevant), so callers can order and
+    keyset-paginate on (rank, id) whatever the backend.
+    """
+
+    # Whether the backend keeps its own copy of post text that must be told about writes
+    maintains_shadow_index = False
+
+    def candidates(self, queryset, query):
+        raise NotImplementedError
+
+    def headlines(self, post_ids, query):
+        """Highlighted snippets of each post's text around the query terms, as {post_id: safe HTML}."""
+        raise NotImplementedError
+
+    def prepare(self):
+        """Called once when the backend is first used in a process."""
+
+    def index_posts(self, posts):
+        """Add or refresh posts in the shadow index."""
+
+    def remove_posts(self, post_ids):
+        """Drop posts from the shadow index."""
+
+    def rebuild(self, batch_size=1000):
+        """Re-index every post. Returns the number of posts indexed."""
+        return 0
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Full-text search over Post.search_vector plus title trigram similarity.
+
+    The vector is maintained by a database trigger and the candidate filter
+    is served by the post_search_vector_gin and post_title_trgm_gin indexes,
+    so rank is only computed for rows that can reach SEARCH_MIN_RANK.
+    The rank is cast to double precision: ts_rank and similarity are real,
+    and a real compared with the float8 decoded from a cursor almost never
+    equals it, which would break the (rank, id) tie-break between pages.
+    """
+
+    def candidates(self, queryset, query):
+        search_query = SearchQuery(query)
+        return queryset.filter(
+            Q(search_vector=search_query) | Q(title__trigram_similar=query)
+        ).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query), FloatField())
+        ).filter(rank__gte=SEARCH_MIN_RANK)
+
+    def headlines(self, post_ids, query):
+        return postgres_headlines(Post.objects.all(), post_ids, 'preview_text', query)
+
+
+def postgres_headlines(queryset, ids, text_field, query):
+    """ts_headline snippets of text_field for the rows of queryset with the given ids."""
+    rows = queryset.filter(id__in=ids).annotate(
+        headline=SearchHeadline(
+            text_field,
+            SearchQuery(query),
+            start_sel=HEADLINE_START,
+            stop_sel=HEADLINE_STOP,
+            max_words=35,
+            min_words=15,
+        )
+    ).values_list('id', 'headline')
+    return {row_id: render_headline(headline or '') for row_id, headline in rows}
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """
+    Search through an SQLite FTS5 shadow table of post titles and preview text.
+
+    The shadow table lives in its own SQLite database (SEARCH_FTS5_PATH,
+    in memory by default) keyed by post id, and is kept current by the post
+    save and delete signals; rebuild() repopulates it from the posts table,
+    as happens when a process first uses an empty index. An in-memory index
+    only sees the writes of its own process, so servers with several worker
+    processes should point SEARCH_FTS5_PATH at a file.
+
+    Ranking uses bm25 with the title weighted above the text, so it needs
+    neither tsvector columns nor pg_trgm, and the index can be built and
+    queried on a machine without a Postgres server (see
+    benchmark_search_backend). Matching is by whole (stemmed) words: there
+    is no fuzzy title match as in the Postgres backend.
+    """
+
+    maintains_shadow_index = True
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(title, body, tokenize='porter unicode61')"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def match_expression(query):
+        """
+        An FTS5 query matching every word of query, or None if it has no words.
+
+        Words are quoted so FTS5 operators and column filters typed by users
+        are searched for literally.
+        """
+        tokens = _FTS5_TOKEN_RE.findall(query)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"' for token in tokens)
+
+    def index_documents(self, documents):
+        """Write (post_id, title, body) rows to the shadow table, replacing existing rows."""
+        documents = list(documents)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'DELETE FROM post_fts WHERE rowid = ?', [(post_id,) for post_id, _, _ in documents]
+            )
+            self._connection.executemany(
+                'INSERT INTO post_fts (rowid, title, body) VALUES (?, ?, ?)',
+                [(post_id, title or '', body or '') for post_id, title, body in documents]
+            )
+
+    def prepare(self):
+        # A new in-memory (or never populated) index starts from the posts table
+        with self._lock:
+            empty = self._connection.execute('SELECT NOT EXISTS (SELECT 1 FROM post_fts)').fetchone()[0]
+        if empty:
+            self.rebuild()
+
+    def index_posts(self, posts):
+        self.index_documents((post.pk, post.title, post.preview_text) for post in posts)
+
+    def remove_posts(self, post_ids):
+        with self._lock, self._connection:
+            self._connection.executemany('DELETE FROM post_fts WHERE rowid = ?', [(post_id,) for post_id in post_ids])
+
+    def rebuild(self, batch_size=1000):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM post_fts')
+        indexed = 0
+        rows = Post.objects.order_by('id').values_list('id', 'title', 'preview_text')
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.index_documents(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            self.index_documents(batch)
+            indexed += len(batch)
+        return indexed
+
+    def search(self, query, limit=FTS5_CANDIDATE_LIMIT):
+        """
+        The best-matching post ids for query.
+
+        Returns:
+            list: Up to limit (post_id, rank) pairs, most relevant first.
+        """
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        with self._lock:
+            return self._connection.execute(
+                'SELECT rowid, -bm25(post_fts, ?, 1.0) AS rank FROM post_fts '
+                'WHERE post_fts MATCH ? ORDER BY rank DESC, rowid DESC LIMIT ?',
+                (FTS5_TITLE_WEIGHT, expression, limit)
+            ).fetchall()
+
+    def candidates(self, queryset, query):
+        ranked = self.search(query)
+        if not ranked:
+            return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+        return queryset.filter(id__in=[post_id for post_id, _ in ranked]).annotate(
+            rank=Case(
+                *[When(id=post_id, then=Value(rank)) for post_id, rank in ranked],
+                output_field=FloatField(),
+            )
+        )
+
+    def headlines(self, post_ids, query):
+        expression = self.match_expression(query)
+        post_ids = list(post_ids)
+        if expression is None or not post_ids:
+            return {}
+        placeholders = ', '.join('?' * len(post_ids))
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT rowid, snippet(post_fts, 1, ?, ?, '…', 35) FROM post_fts "
+                f"WHERE post_fts MATCH ? AND rowid IN ({placeholders})",
+                (HEADLINE_START, HEADLINE_STOP, expression, *post_ids)
+            ).fetchall()
+        return {post_id: render_headline(snippet or '') for post_id, snippet in rows}
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    The configured post search backend.
+
+    SEARCH_BACKEND is the dotted path of a SearchBackend class;
+    SEARCH_BACKEND_OPTIONS are passed to its constructor. One instance is
+    kept per process for each configuration.
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', 'forum.services.search_backends.PostgresSearchBackend')
+    options = getattr(settings, 'SEARCH_BACKEND_OPTIONS', {})
+    key = (path, tuple(sorted(options.items())))
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend = import_string(path)(**options)
+                backend.prepare()
+                _backends[key] = backend
+    return backend
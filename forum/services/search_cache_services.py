@@ -0,0 +1,137 @@
+import hashlib
+from django.core.cache import cache
+from forum.services.feed_services import encode_feed_cursor, decode_feed_cursor
+from forum.services.search_services import SEARCH_PAGE_SIZE, rank_posts, build_search_page, search_posts
+
+# Ranked post ids kept per cached query; deeper pages are read from Postgres
+SEARCH_CACHE_MAX_RESULTS = 200
+SEARCH_CACHE_TIMEOUT = 60 * 5
+
+_SEARCH_GENERATION_KEY = 'search:generation'
+_SEARCH_HITS_KEY = 'search:metrics:hits'
+_SEARCH_MISSES_KEY = 'search:metrics:misses'
+
+
+def normalize_search_query(query):
+    """
+    Lowercase and collapse whitespace.
+
+    Full-text and trigram matching are case-insensitive, so equivalent
+    queries rank the same posts and can share a cache entry.
+    """
+    return ' '.join(query.lower().split())
+
+
+def get_search_generation():
+    """Current search generation; cached rankings from older generations are never read again."""
+    generation = cache.get(_SEARCH_GENERATION_KEY)
+    if generation is None:
+        cache.add(_SEARCH_GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(_SEARCH_GENERATION_KEY, 1)
+    return generation
+
+
+def bump_search_generation():
+    """Invalidate every cached search ranking. Called when posts are created, edited or deleted."""
+    try:
+        cache.incr(_SEARCH_GENERATION_KEY)
+    except ValueError:
+        cache.add(_SEARCH_GENERATION_KEY, 2, timeout=None)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_search_cache_stats():
+    """
+    Hits and misses of the search ranking cache since the counters were created.
+
+    Returns:
+        dict: hits, misses and hit_rate (None before any search).
+    """
+    counts = cache.get_many([_SEARCH_HITS_KEY, _SEARCH_MISSES_KEY])
+    hits = counts.get(_SEARCH_HITS_KEY, 0)
+    misses = counts.get(_SEARCH_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else None,
+    }
+
+
+def _audience(user):
+    """Teachers cannot see posts that exclude them; everyone else searches the same posts."""
+    return 'teacher' if user.is_authenticated and user.is_teacher else 'student'
+
+
+def _ranking_cache_key(user, query):
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'search:ranking:{_audience(user)}:g{get_search_generation()}:{digest}'
+
+
+def _page_of(ranking, cursor, per_page):
+    """
+    The (post ids, next cursor) of one page of a cached ranking, or None if
+    the page runs past the cached entries.
+    """
+    entries = ranking['entries']
+    start = 0
+    if cursor:
+        rank, post_id = decode_feed_cursor(cursor, 'rank')
+        start = next(
+            (i for i, (entry_id, entry_rank) in enumerate(entries) if (entry_rank, entry_id) < (rank, post_id)),
+            len(entries)
+        )
+
+    rows = entries[start:start + per_page + 1]
+    if len(rows) <= per_page and not ranking['complete']:
+        return None
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_feed_cursor(rows[-1][1], rows[-1][0], 'rank')
+    return [post_id for post_id, _ in rows], next_cursor
+
+
+def get_cached_search_page(user, query, cursor=None, per_page=SEARCH_PAGE_SIZE):
+    """
+    search_posts, answered from a cached ranking when possible.
+
+    The ranking of the top SEARCH_CACHE_MAX_RESULTS post ids is cached per
+    normalized query and audience until the search generation moves on or
+    it expires. Cards and headlines are always loaded fresh for the page.
+
+    Returns:
+        CursorPage: Annotated posts with a search_headline attribute.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    query = normalize_search_query(query)
+    key = _ranking_cache_key(user, query)
+    ranking = cache.get(key)
+    hit = ranking is not None
+    if ranking is None:
+        entries = rank_posts(user, query, SEARCH_CACHE_MAX_RESULTS + 1)
+        ranking = {
+            'entries': entries[:SEARCH_CACHE_MAX_RESULTS],
+            'complete': len(entries) <= SEARCH_CACHE_MAX_RESULTS,
+        }
+        cache.set(key, ranking, SEARCH_CACHE_TIMEOUT)
+
+    page = _page_of(ranking, cursor, per_page)
+    if page is None:
+        # Deeper than the cached ranking reaches
+        _count(_SEARCH_MISSES_KEY)
+        return search_posts(user, query, cursor=cursor, per_page=per_page)
+
+    _count(_SEARCH_HITS_KEY if hit else _SEARCH_MISSES_KEY)
+    post_ids, next_cursor = page
+    return build_search_page(user, query, post_ids, next_cursor)
@@ -1,45 +1,359 @@
-from django.db.models import Value, F, Count, Q
-from django.db.models.functions import Concat, Greatest
+import hashlib
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Upper
+from django.urls import reverse
 from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
-from forum.models import Post, User
-from forum.services.utils import process_post_preview, add_course_context, annotate_post_card_context
-from forum.services.course_services import get_user_courses
+from forum.models import Post, User, Solution, Comment, Course
+from forum.models.user import FullName
+from forum.services.search_backends import get_search_backend, postgres_headlines
+from forum.services.feed_services import (
+    CursorPage,
+    paginate_by_cursor,
+    load_post_cards,
+    encode_feed_cursor,
+    decode_feed_cursor,
+)
 
-def search_posts(user, query):
-    search_query = SearchQuery(query)
-    posts = Post.objects.annotate(
-        rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query),
-        solution_count=Count('solutions', distinct=True),
-        comment_count=Count('solutions__comments', distinct=True),
-        total_response_count=Count('solutions', distinct=True) + Count('solutions__comments', distinct=True)
-    ).filter(rank__gte=0.3)
-    
+# Ranked search results per page
+SEARCH_PAGE_SIZE = 10
+# Top-ranked matches of each kind (post, solution, comment) grouped into search_content results
+SEARCH_FRAGMENT_LIMIT = 500
+
+# Suggestions returned per group, and prefix matches read before picking the top posts
+SUGGEST_LIMIT = 5
+SUGGEST_CANDIDATES = 50
+SUGGEST_MIN_PREFIX = 2
+# p95 latency the suggest benchmark must stay under
+SUGGEST_P95_BUDGET_MS = 50
+
+# Users ranked per search query, shown per page, and how long the ranking is cached
+USER_SEARCH_MAX_RESULTS = 100
+USER_SEARCH_PAGE_SIZE = 20
+USER_SEARCH_CACHE_TIMEOUT = 60
+USER_SEARCH_MIN_TRIGRAM_QUERY = 3
+
+
+def ranked_search_candidates(queryset, query):
+    """
+    Posts in queryset matching query, annotated with their relevance rank.
+
+    Matching and ranking are done by the configured search backend (see
+    search_backends.get_search_backend).
+    """
+    return get_search_backend().candidates(queryset, query)
+
+
+def search_headlines(post_ids, query):
+    """
+    Highlighted snippets of each post's preview text around the query terms.
+
+    Returns:
+        dict: {post_id: safe HTML snippet}
+    """
+    return get_search_backend().headlines(post_ids, query)
+
+
+def _searchable_posts(user):
+    posts = Post.objects.all()
     if user.is_authenticated and user.is_teacher:
         posts = posts.filter(allow_teacher=True)
-    
-    posts = posts.order_by('-rank')
-
-    posts = annotate_post_card_context(posts, user)
     return posts
 
-def search_users(user, query):
-    query = query.strip()
-
-    qs = User.objects.annotate(
-        trigram_first=TrigramSimilarity('first_name', query),
-        trigram_last=TrigramSimilarity('last_name', query),
-        trigram_full=TrigramSimilarity(
-            Concat(F('first_name'), Value(' '), F('last_name')),
-            query
-        ),
-        similarity=Greatest(
-            F('trigram_first'),
-            F('trigram_last'),
-            F('trigram_full'),
-        )
-    ).filter(
-        similarity__gte=0.1
-    ).order_by('-similarity')
-
-    return qs
 
+def rank_posts(user, query, limit):
+    """
+    The ids and ranks of the best posts for query, most relevant first.
+
+    Returns:
+        list: Up to limit (post_id, rank) pairs.
+    """
+    candidates = ranked_search_candidates(_searchable_posts(user), query).order_by('-rank', '-id')
+    return list(candidates.values_list('id', 'rank')[:limit])
+
+
+def build_search_page(user, query, post_ids, next_cursor):
+    """Load the cards and headlines of one page of ranked post ids."""
+    posts = load_post_cards(post_ids, user)
+    headlines = search_headlines(post_ids, query)
+    for post in posts:
+        post.search_headline = headlines.get(post.id, '')
+    return CursorPage(posts, next_cursor)
+
+
+def search_posts(user, query, cursor=None, per_page=SEARCH_PAGE_SIZE):
+    """
+    Return one page of posts matching query, most relevant first.
+
+    Only the ids of the page are selected from the ranked candidates; card
+    annotations and headlines are then computed for those posts alone. Pages
+    are keyset-paginated on (rank, id): pass the previous page's next_cursor
+    to continue. See search_cache_services.get_cached_search_page for the
+    cached entry point used by views.
+
+    Returns:
+        CursorPage: Annotated posts with a search_headline attribute.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    candidates = ranked_search_candidates(_searchable_posts(user), query).order_by('-rank', '-id')
+    post_ids, next_cursor = paginate_by_cursor(candidates, cursor, per_page, sort_field='rank')
+    return build_search_page(user, query, post_ids, next_cursor)
+
+
+def _searchable_fragments(user):
+    """
+    (kind, queryset, post id field, headline text field) for every searchable kind of content.
+
+    Solutions and comments are searched through their own search_vector and
+    inherit the teacher visibility of the post they belong to.
+    """
+    posts = Post.objects.all()
+    solutions = Solution.objects.all()
+    comments = Comment.objects.all()
+    if user.is_authenticated and user.is_teacher:
+        posts = posts.filter(allow_teacher=True)
+        solutions = solutions.filter(post__allow_teacher=True)
+        comments = comments.filter(solution__post__allow_teacher=True)
+
+    return (
+        ('post', posts, 'id', 'preview_text'),
+        ('solution', solutions, 'post_id', 'search_text'),
+        ('comment', comments, 'solution__post_id', 'search_text'),
+    )
+
+
+def _best_fragments(user, query):
+    """
+    Each matching post's best fragment: the post itself, one of its solutions or one of their comments.
+
+    Every kind is matched through its GIN index and capped at
+    SEARCH_FRAGMENT_LIMIT top-ranked rows before grouping.
+
+    Returns:
+        dict: {post_id: (rank, kind, fragment_id)}
+    """
+    search_query = SearchQuery(query)
+    best = {}
+    for kind, queryset, post_field, _ in _searchable_fragments(user):
+        ranked = queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            fragment_post_id=F(post_field),
+        ).order_by('-rank')
+        for fragment_id, post_id, rank in ranked.values_list('id', 'fragment_post_id', 'rank')[:SEARCH_FRAGMENT_LIMIT]:
+            if post_id not in best or rank > best[post_id][0]:
+                best[post_id] = (rank, kind, fragment_id)
+    return best
+
+
+def search_content(user, query, cursor=None, per_page=SEARCH_PAGE_SIZE):
+    """
+    Search posts, solutions and comments together, grouped by post.
+
+    A post is ranked by its best-matching fragment, so a question whose
+    accepted answer matches well ranks above one that mentions the term in
+    passing. Headlines are computed only for the fragments on the returned
+    page. Pages are keyset-paginated on (rank, post id).
+
+    Returns:
+        CursorPage: Annotated posts, each with a search_match dict
+            (type, id, rank, headline).
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    matches = sorted(
+        ((rank, post_id, kind, fragment_id) for post_id, (rank, kind, fragment_id) in _best_fragments(user, query).items()),
+        reverse=True,
+    )
+    if cursor:
+        after = decode_feed_cursor(cursor, 'rank')
+        matches = [match for match in matches if match[:2] < after]
+
+    page = matches[:per_page]
+    next_cursor = encode_feed_cursor(page[-1][0], page[-1][1], 'rank') if len(matches) > per_page else None
+
+    headlines = {}
+    for kind, queryset, _, text_field in _searchable_fragments(user):
+        fragment_ids = [fragment_id for _, _, match_kind, fragment_id in page if match_kind == kind]
+        if fragment_ids:
+            headlines[kind] = postgres_headlines(queryset, fragment_ids, text_field, query)
+
+    posts = load_post_cards([post_id for _, post_id, _, _ in page], user)
+    matches_by_post = {post_id: (rank, kind, fragment_id) for rank, post_id, kind, fragment_id in page}
+    for post in posts:
+        rank, kind, fragment_id = matches_by_post[post.id]
+        post.search_match = {
+            'type': kind,
+            'id': fragment_id,
+            'rank': rank,
+            'headline': headlines.get(kind, {}).get(fragment_id, ''),
+        }
+    return CursorPage(posts, next_cursor)
+
+
+def backfill_search_text(batch_size=500, force=False):
+    """
+    Fill search_text for solutions and comments saved before they were searchable.
+
+    The database trigger derives each row's search_vector from the new text.
+
+    Args:
+        batch_size: Number of rows loaded and updated per round trip.
+        force: Recompute every row, not just those without search text.
+
+    Returns:
+        dict: {'solutions': count, 'comments': count} of rows updated.
+    """
+    from forum.services.content_compiler import compile_post_content
+
+    updated = {}
+    for label, model in (('solutions', Solution), ('comments', Comment)):
+        queryset = model.objects.order_by('id').only('id', 'content')
+        if not force:
+            queryset = queryset.filter(search_text__isnull=True)
+
+        updated[label] = 0
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                row.search_text = compile_post_content(row.content).preview_text
+            model.objects.bulk_update(rows, ['search_text'])
+            updated[label] += len(rows)
+
+    return updated
+
+
+def _suggest_posts(user, prefix):
+    posts = Post.objects.filter(title__istartswith=prefix)
+    if not user.is_authenticated or user.is_teacher:
+        posts = posts.filter(allow_teacher=True)
+
+    # Walk post_title_prefix_idx in order, then keep the hottest of the first candidates
+    candidates = posts.order_by(Upper('title')).values('id', 'title', 'hot_score')[:SUGGEST_CANDIDATES]
+    top = sorted(candidates, key=lambda post: post['hot_score'], reverse=True)[:SUGGEST_LIMIT]
+    return [
+        {'id': post['id'], 'title': post['title'], 'url': reverse('post_detail', args=[post['id']])}
+        for post in top
+    ]
+
+
+def _user_name_prefix_q(prefix):
+    """First or last name prefix match; a multi-word prefix matches first name then last name."""
+    first, _, rest = prefix.partition(' ')
+    if rest:
+        return Q(first_name__istartswith=first, last_name__istartswith=rest)
+    return Q(first_name__istartswith=prefix) | Q(last_name__istartswith=prefix)
+
+
+def _suggest_users(prefix):
+    users = User.objects.filter(_user_name_prefix_q(prefix))
+
+    users = users.order_by(Upper('first_name'), Upper('last_name')).values(
+        'id', 'username', 'first_name', 'last_name'
+    )[:SUGGEST_LIMIT]
+    return [
+        {
+            'id': user['id'],
+            'username': user['username'],
+            'full_name': f"{user['first_name']} {user['last_name']}",
+            'url': reverse('profile', args=[user['username']]) if user['username'] else None,
+        }
+        for user in users
+    ]
+
+
+def _suggest_courses(prefix):
+    courses = Course.objects.filter(
+        Q(name__istartswith=prefix) | Q(aliases__name__istartswith=prefix)
+    ).distinct().order_by('name').values('id', 'name', 'category')[:SUGGEST_LIMIT]
+    return list(courses)
+
+
+def suggest(user, prefix):
+    """
+    Typeahead suggestions for a search box prefix.
+
+    Each group is a case-insensitive prefix match served by a
+    text_pattern_ops expression index and capped at SUGGEST_LIMIT, so the
+    cost does not depend on table size the way trigram similarity does.
+    Multi-word prefixes match users by first name and last name prefix.
+
+    Returns:
+        dict: 'posts', 'users' and 'courses' suggestion lists.
+    """
+    prefix = ' '.join(prefix.split())
+    if len(prefix) < SUGGEST_MIN_PREFIX:
+        return {'posts': [], 'users': [], 'courses': []}
+
+    return {
+        'posts': _suggest_posts(user, prefix),
+        'users': _suggest_users(prefix),
+        'courses': _suggest_courses(prefix),
+    }
+
+
+def normalize_user_query(query):
+    """Lowercase and collapse whitespace so equivalent user searches share a cache entry."""
+    return ' '.join(query.lower().split())
+
+
+def _ranked_user_ids(query):
+    """
+    Ids of the best USER_SEARCH_MAX_RESULTS users for a normalized query.
+
+    Candidates are users with a word of their full name trigram-similar to
+    the query (served by user_full_name_trgm_gin) or a name starting with
+    it (served by the user_*_prefix_idx indexes), so only candidates are
+    scored instead of every user row. Queries shorter than a trigram only
+    match by prefix.
+    """
+    candidates = _user_name_prefix_q(query)
+    if len(query) >= USER_SEARCH_MIN_TRIGRAM_QUERY:
+        candidates |= Q(full_name__trigram_word_similar=query)
+
+    return list(
+        User.objects.annotate(
+            full_name=FullName(),
+        ).filter(candidates).annotate(
+            similarity=Greatest(
+                TrigramSimilarity('first_name', query),
+                TrigramSimilarity('last_name', query),
+                TrigramSimilarity('full_name', query),
+            )
+        ).order_by('-similarity', 'id').values_list('id', flat=True)[:USER_SEARCH_MAX_RESULTS]
+    )
+
+
+def search_users(user, query, page=1, per_page=USER_SEARCH_PAGE_SIZE):
+    """
+    One page of users matching query, most similar first.
+
+    At most USER_SEARCH_MAX_RESULTS users are ranked per query, and the
+    ranked ids are cached under the normalized query for
+    USER_SEARCH_CACHE_TIMEOUT seconds.
+
+    Returns:
+        Page: object_list holds User instances with their profiles loaded.
+    """
+    query = normalize_user_query(query)
+    if not query:
+        ids = []
+    else:
+        key = f'user_search:{hashlib.md5(query.encode()).hexdigest()}'
+        ids = cache.get(key)
+        if ids is None:
+            ids = _ranked_user_ids(query)
+            cache.set(key, ids, USER_SEARCH_CACHE_TIMEOUT)
+
+    page_obj = Paginator(ids, per_page).get_page(page)
+    users = User.objects.select_related('userprofile').in_bulk(page_obj.object_list)
+    page_obj.object_list = [users[user_id] for user_id in page_obj.object_list if user_id in users]
+    return page_obj
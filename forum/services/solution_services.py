@@ -3,6 +3,7 @@ from forum.models import Post, Solution, SolutionUpvote, SolutionDownvote, Saved
 from forum.services.utils import detect_bad_words, extract_and_delete_files_from_content
 from forum.services.notification_services import send_solution_notification_service
 from forum.services.post_services import _check_teacher_visibility
+from forum.services.feed_cache_services import bump_feed_generations
 from django.db.models import F
 import json
 
@@ -36,6 +37,7 @@ def create_solution_service(user, post_id, data):
         )
         if post.author != solution.author:
             send_solution_notification_service(solution)
+        bump_feed_generations()
 
         return {
             'id': solution.id,
@@ -59,6 +61,7 @@ def update_solution_service(user, solution_id, data):
         detect_bad_words(content)
         solution.content = content
         solution.save()
+        bump_feed_generations()
 
         return {
             'message': 'Solution updated successfully',
@@ -78,6 +81,7 @@ def delete_solution_service(user, solution_id):
             extract_and_delete_files_from_content(solution.content)
         
         solution.delete()
+        bump_feed_generations()
         return {'message': 'Solution deleted successfully'}
     except Exception as e:
         return {'error': str(e)}
@@ -156,6 +160,7 @@ def accept_solution_service(user, solution_id):
             post.accepted_solution = None
             post.solved = False
             post.save()
+            bump_feed_generations()
             return {
                 'success': True,
                 'message': 'Solution unmarked as accepted',
@@ -169,6 +174,7 @@ def accept_solution_service(user, solution_id):
             post.accepted_solution = solution
             post.solved = True
             post.save()
+            bump_feed_generations()
             return {
                 'success': True,
                 'message': 'Solution marked as accepted',
@@ -0,0 +1,242 @@
+import logging
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from forum.models import Post, Course, User, UserProfile, TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+# Entries kept per timeline: a new timeline is built from this many of the
+# most recent visible posts, and trim_timelines deletes anything older
+TIMELINE_MAX_ENTRIES = 1000
+
+_TRIM_TIMELINES_SQL = f"""
+DELETE FROM {TimelineEntry._meta.db_table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id ORDER BY activity_at DESC, post_id DESC
+        ) AS position
+        FROM {TimelineEntry._meta.db_table}
+    ) ranked
+    WHERE position > %s
+)
+"""
+
+SCHEDULE_BLOCK_FIELDS = (
+    'block_1A', 'block_1B', 'block_1D', 'block_1E',
+    'block_2A', 'block_2B', 'block_2C', 'block_2D', 'block_2E',
+)
+
+# Posts in this course (or in no course at all) are shown to everyone
+GLOBAL_COURSE_NAME = "School Life"
+
+
+def _post_activity_at(post):
+    return post.last_activity_at or post.created_at
+
+
+def _post_audience(post):
+    """Users whose For You feed should contain post."""
+    course_ids = list(post.courses.values_list('id', flat=True))
+    users = User.objects.all()
+
+    if not post.allow_teacher:
+        users = users.filter(is_teacher=False)
+
+    is_global = not course_ids or Course.objects.filter(
+        id__in=course_ids, name=GLOBAL_COURSE_NAME
+    ).exists()
+    if is_global:
+        return users
+
+    audience = (
+        Q(id=post.author_id) |
+        Q(experienced_courses__course_id__in=course_ids) |
+        Q(help_needed_courses__course_id__in=course_ids, help_needed_courses__active=True)
+    )
+    for field in SCHEDULE_BLOCK_FIELDS:
+        audience |= Q(**{f'userprofile__{field}__in': course_ids})
+
+    return users.filter(audience).distinct()
+
+
+def fan_out_post(post):
+    """
+    Write post into the timeline of every user in its audience.
+
+    Safe to call again after an edit: users who can no longer see the post
+    (courses or teacher visibility changed) are removed from its audience.
+
+    Returns:
+        int: Number of timelines the post is in.
+    """
+    user_ids = list(_post_audience(post).values_list('id', flat=True))
+    activity_at = _post_activity_at(post)
+
+    with transaction.atomic():
+        TimelineEntry.objects.filter(post=post).exclude(user_id__in=user_ids).delete()
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post.id, activity_at=activity_at) for user_id in user_ids],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+
+    return len(user_ids)
+
+
+def schedule_post_fan_out(post):
+    """
+    Queue fan_out_post for post once it commits.
+
+    Global posts reach every user, so the timeline writes run in the
+    fan_out_post_to_timelines Celery task instead of the request that saved
+    the post. If the broker cannot be reached the failure is logged and the
+    post stays out of For You feeds until it is next fanned out (an edit to
+    its courses or teacher visibility).
+    """
+    post_id = post.id
+
+    def enqueue():
+        from forum.tasks import fan_out_post_to_timelines
+        try:
+            fan_out_post_to_timelines.delay(post_id)
+        except Exception:
+            logger.exception(f"Could not queue timeline fan-out for post {post_id}")
+
+    transaction.on_commit(enqueue)
+
+
+def trim_timelines(limit=TIMELINE_MAX_ENTRIES):
+    """
+    Delete timeline entries beyond the limit most recent of each user.
+
+    Fan-out adds an entry per post and audience member, so without trimming
+    the table grows with every post. Trimmed posts are older than anything a
+    user scrolls to in For You; the all-posts feed still reaches them.
+
+    Returns:
+        int: Number of entries deleted.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_TRIM_TIMELINES_SQL, [limit])
+        return cursor.rowcount
+
+
+def bump_timeline_activity(post_id, activity_at):
+    """Move a post to the top of every timeline it is in after new activity."""
+    TimelineEntry.objects.filter(post_id=post_id).update(activity_at=activity_at)
+
+
+def _visible_posts_for_user(user):
+    """Posts that belong in user's For You feed, computed from their courses and schedule."""
+    course_ids = set(
+        user.experienced_courses.values_list('course_id', flat=True)
+    ) | set(
+        user.help_needed_courses.filter(active=True).values_list('course_id', flat=True)
+    )
+
+    profile = getattr(user, 'userprofile', None)
+    if profile is not None:
+        course_ids |= {
+            getattr(profile, f'{field}_id') for field in SCHEDULE_BLOCK_FIELDS
+        } - {None}
+
+    queryset = Post.objects.filter(
+        Q(courses__id__in=course_ids) |
+        Q(author=user) |
+        Q(courses__isnull=True) |
+        Q(courses__name=GLOBAL_COURSE_NAME)
+    )
+    if user.is_teacher:
+        queryset = queryset.filter(allow_teacher=True)
+    return queryset.distinct()
+
+
+def _recent_entries(user, posts, limit=TIMELINE_MAX_ENTRIES):
+    """TimelineEntry rows for the limit most recently active of posts."""
+    rows = posts.annotate(
+        recent_updated_at=Coalesce('last_activity_at', 'created_at')
+    ).order_by('-recent_updated_at', '-id').values_list('id', 'recent_updated_at')[:limit]
+    return [TimelineEntry(user_id=user.id, post_id=post_id, activity_at=activity_at) for post_id, activity_at in rows]
+
+
+def _is_timeline_built(user):
+    profile = UserProfile.objects.filter(user_id=user.id).values_list('timeline_built', flat=True).first()
+    return bool(profile)
+
+
+def build_user_timeline(user):
+    """
+    Fill a new user's timeline from their current courses and schedule.
+
+    Posts fanned out to the user before the build are kept. The user's
+    profile records that the timeline is built, so later course changes
+    are applied by sync_user_timeline_courses instead of a rebuild.
+
+    Returns:
+        int: Number of entries written.
+    """
+    entries = _recent_entries(user, _visible_posts_for_user(user))
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+        UserProfile.objects.filter(user_id=user.id).update(timeline_built=True)
+    return len(entries)
+
+
+def sync_user_timeline_courses(user, course_ids):
+    """
+    Bring the posts of course_ids in user's timeline up to date after their courses changed.
+
+    Posts of those courses the user can now see are added and the ones they
+    can no longer see are removed; the rest of the timeline is untouched.
+    Timelines that are not built yet are left for build_user_timeline.
+
+    Returns:
+        tuple: (entries added or kept, entries removed)
+    """
+    if not course_ids or not _is_timeline_built(user):
+        return 0, 0
+
+    course_posts = Post.objects.filter(courses__id__in=course_ids).values('id')
+    visible = _visible_posts_for_user(user).filter(id__in=course_posts)
+
+    with transaction.atomic():
+        removed, _ = TimelineEntry.objects.filter(user=user, post_id__in=course_posts).exclude(
+            post_id__in=visible.values('id')
+        ).delete()
+        entries = _recent_entries(user, visible)
+        TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+    return len(entries), removed
+
+
+def schedule_timeline_sync(user_id, course_ids):
+    """
+    Sync a user's timeline for changed courses once the current transaction commits.
+
+    Deferring keeps the sync out of cascading deletes (e.g. deleting the
+    user removes their course rows first) and skips users that no longer exist.
+    """
+    course_ids = list(course_ids)
+
+    def sync():
+        user = User.objects.filter(id=user_id).first()
+        if user is not None:
+            sync_user_timeline_courses(user, course_ids)
+
+    transaction.on_commit(sync)
+
+
+def get_user_timeline(user):
+    """
+    The user's timeline entries, newest activity first, building it on first use.
+
+    The queryset exposes recent_updated_at so it can be keyset-paginated by
+    feed_services.paginate_by_cursor on post_id.
+    """
+    if not _is_timeline_built(user):
+        build_user_timeline(user)
+
+    return TimelineEntry.objects.filter(user=user).annotate(
+        recent_updated_at=F('activity_at')
+    ).order_by('-recent_updated_at', '-post_id')
@@ -0,0 +1,160 @@
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from redis.exceptions import ResponseError
+from forum.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Hash of post_id -> views not yet written to Post.views
+PENDING_VIEWS_KEY = 'post_views:pending'
+# The pending hash is renamed here while a flush writes it to the database
+FLUSHING_VIEWS_KEY = 'post_views:flushing'
+# Held by the running flush; expires so a dead worker cannot block later flushes
+FLUSH_LOCK_KEY = 'post_views:flush_lock'
+FLUSH_LOCK_TIMEOUT = 60 * 5
+# Per-post, per-UTC-day HyperLogLog of viewer ids, used when views are deduplicated per user
+VIEWERS_KEY = 'post_views:viewers:{post_id}:{day}'
+VIEWERS_KEY_TIMEOUT = 60 * 60 * 48
+
+
+def _redis_client():
+    """The raw Redis client behind the default cache, or None when the cache is not Redis."""
+    backend = getattr(cache, '_cache', None)
+    get_client = getattr(backend, 'get_client', None)
+    if get_client is None:
+        return None
+    return get_client(write=True)
+
+
+def _is_new_viewer(client, post_id, user):
+    """Whether user is new to post_id's viewer set for today, in UTC (HyperLogLog estimate)."""
+    day = timezone.now().date().isoformat()
+    key = cache.make_key(VIEWERS_KEY.format(post_id=post_id, day=day))
+    pipe = client.pipeline()
+    pipe.pfadd(key, user.id)
+    pipe.expire(key, VIEWERS_KEY_TIMEOUT)
+    added, _ = pipe.execute()
+    return bool(added)
+
+
+def record_post_view(post_id, user=None):
+    """
+    Count a view of a post without writing to the posts table.
+
+    Views are accumulated in Redis and applied by flush_post_views. When
+    POST_VIEWS_UNIQUE_PER_USER is set, a user's views of a post count once
+    per UTC day. Without Redis (local development) the view is applied
+    immediately with a single UPDATE.
+    """
+    client = _redis_client()
+    if client is None:
+        Post.objects.filter(id=post_id).update(views=F('views') + 1)
+        return
+
+    try:
+        unique = getattr(settings, 'POST_VIEWS_UNIQUE_PER_USER', False)
+        if unique and user is not None and user.is_authenticated:
+            if not _is_new_viewer(client, post_id, user):
+                return
+        client.hincrby(cache.make_key(PENDING_VIEWS_KEY), post_id, 1)
+    except Exception as e:
+        # A lost view is not worth failing the page for
+        logger.error(f"Error recording view for post {post_id}: {e}")
+
+
+def apply_view_counts(counts):
+    """
+    Add buffered view counts to posts with one UPDATE per distinct increment.
+
+    The UPDATEs run in one transaction, so a failure applies none of the
+    counts and the whole batch can be retried. Updated posts are marked stale so recompute_hot_scores picks up the
+    new view totals.
+
+    Args:
+        counts: {post_id: views to add}
+
+    Returns:
+        int: Number of posts updated.
+    """
+    by_increment = defaultdict(list)
+    for post_id, increment in counts.items():
+        if increment > 0:
+            by_increment[increment].append(post_id)
+
+    updated = 0
+    with transaction.atomic():
+        for increment, post_ids in by_increment.items():
+            updated += Post.objects.filter(id__in=post_ids).update(
+                views=F('views') + increment,
+                hot_score_updated_at=None,
+            )
+    return updated
+
+
+def _read_counts(client, key):
+    return {int(post_id): int(views) for post_id, views in client.hgetall(key).items()}
+
+
+def _merge_back(client, pending_key, flushing_key, counts):
+    """Add counts read from the flushing hash back to the pending hash and drop the flushing hash."""
+    pipe = client.pipeline()
+    for post_id, views in counts.items():
+        pipe.hincrby(pending_key, post_id, views)
+    pipe.delete(flushing_key)
+    pipe.execute()
+
+
+def flush_post_views():
+    """
+    Move buffered views from Redis into Post.views.
+
+    The pending hash is renamed to a fixed flushing key before it is read,
+    so views recorded during the flush land in a fresh hash and are picked
+    up by the next run. Flushes hold a lock, so a flushing hash found at the
+    start was left by a worker that died mid-flush; it is merged back into
+    the pending hash instead of being lost. If the database write fails the
+    counts are merged back the same way.
+
+    Returns:
+        int: Number of posts updated.
+    """
+    client = _redis_client()
+    if client is None:
+        return 0
+
+    lock_key = cache.make_key(FLUSH_LOCK_KEY)
+    if not client.set(lock_key, 1, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        # Another worker is flushing
+        return 0
+
+    try:
+        pending_key = cache.make_key(PENDING_VIEWS_KEY)
+        flushing_key = cache.make_key(FLUSHING_VIEWS_KEY)
+
+        leftover = _read_counts(client, flushing_key)
+        if leftover:
+            logger.warning(f"Recovering buffered views for {len(leftover)} posts from an interrupted flush")
+            _merge_back(client, pending_key, flushing_key, leftover)
+
+        try:
+            client.rename(pending_key, flushing_key)
+        except ResponseError:
+            # Nothing has been viewed since the last flush
+            return 0
+
+        counts = _read_counts(client, flushing_key)
+        try:
+            updated = apply_view_counts(counts)
+        except Exception:
+            _merge_back(client, pending_key, flushing_key, counts)
+            raise
+
+        client.delete(flushing_key)
+        return updated
+    finally:
+        client.delete(lock_key)
@@ -1,8 +1,18 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
-from .models import UserProfile, Solution, Comment, PollVote
+from .models import (
+    UserProfile, Post, StandardPost, Poll, PollOption, Solution, Comment, PollVote, PostLike, FollowedPost,
+    UserCourseExperience, UserCourseHelp, Course, CourseAlias
+)
+from .services.counter_services import ensure_post_counters, adjust_post_counter, adjust_comment_counter
+from .services.course_services import invalidate_course_index
+from .services.poll_tally_services import invalidate_poll_tally
+from .services.poll_vote_services import adjust_option_counters, count_new_voter
+from .services.search_backends import get_search_backend
+from .services.timeline_services import bump_timeline_activity, schedule_timeline_sync, SCHEDULE_BLOCK_FIELDS
 
 
 # Update post last_activity_at when a solution is added or updated
@@ -12,6 +22,7 @@ def update_post_activity_on_solution(sender, instance, created, **kwargs):
     if created and instance.post:
         instance.post.last_activity_at = timezone.now()
         instance.post.save(update_fields=['last_activity_at'])
+        bump_timeline_activity(instance.post_id, instance.post.last_activity_at)
 
 # Update post last_activity_at when a comment is added
 @receiver(post_save, sender=Comment)
@@ -22,18 +33,185 @@ def update_post_activity_on_comment(sender, instance, created, **kwargs):
         if instance.solution and instance.solution.post:
             instance.solution.post.last_activity_at = timezone.now()
             instance.solution.post.save(update_fields=['last_activity_at'])
+            bump_timeline_activity(instance.solution.post_id, instance.solution.post.last_activity_at)
+
+
+# Keep PostCounters in step with the rows they count
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=StandardPost)
+@receiver(post_save, sender=Poll)
+def create_post_counters(sender, instance, created, raw=False, **kwargs):
+    """Give every new post a counters row so engagement updates are plain increments"""
+    if created and not raw:
+        ensure_post_counters(instance.pk)
+
+
+# Keep shadow search indexes (see search_backends.SQLiteFTS5SearchBackend) in step with post text
+SEARCH_INDEXED_POST_FIELDS = {'title', 'preview_text'}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=StandardPost)
+@receiver(post_save, sender=Poll)
+def index_post_for_search(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SEARCH_INDEXED_POST_FIELDS & set(update_fields)):
+        return
+    backend = get_search_backend()
+    if backend.maintains_shadow_index:
+        transaction.on_commit(lambda: backend.index_posts([instance]))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend.maintains_shadow_index:
+        post_id = instance.pk
+        transaction.on_commit(lambda: backend.remove_posts([post_id]))
+
+
+@receiver(post_save, sender=Solution)
+def increment_solution_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_post_counter(instance.post_id, 'solution_count', 1)
+
+
+@receiver(post_delete, sender=Solution)
+def decrement_solution_count(sender, instance, **kwargs):
+    adjust_post_counter(instance.post_id, 'solution_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_comment_counter(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    adjust_comment_counter(instance, -1)
+
+
+@receiver(post_save, sender=PostLike)
+def increment_like_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_post_counter(instance.post_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=PostLike)
+def decrement_like_count(sender, instance, **kwargs):
+    adjust_post_counter(instance.post_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=FollowedPost)
+def increment_follower_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_post_counter(instance.post_id, 'follower_count', 1)
+
+
+@receiver(post_delete, sender=FollowedPost)
+def decrement_follower_count(sender, instance, **kwargs):
+    adjust_post_counter(instance.post_id, 'follower_count', -1)
 
 
 @receiver(post_save, sender=PollVote)
-def update_post_activity_on_poll_vote_save(sender, instance, **kwargs):
-    """Update the parent poll post's last_activity_at when votes reach multiples of 5.
-    
-    This prevents polls from dominating the feed on every single vote. Activity is bumped
-    only every 5 votes to balance poll visibility with text posts.
-    """
-    if instance.poll:
-        vote_count = instance.poll.votes.count()
-        # Only update last_activity_at every 5 votes (at vote counts 5, 10, 15, etc.)
-        if vote_count % 5 == 0:
-            instance.poll.last_activity_at = timezone.now()
-            instance.poll.save(update_fields=['last_activity_at'])
\ No newline at end of file
+def increment_poll_vote_count(sender, instance, created, raw=False, **kwargs):
+    """Count the voter and bump the poll's activity from the counter (see count_new_voter)"""
+    if created and not raw:
+        count_new_voter(instance.poll_id)
+
+
+@receiver(post_delete, sender=PollVote)
+def decrement_poll_vote_count(sender, instance, **kwargs):
+    adjust_post_counter(instance.poll_id, 'poll_vote_count', -1)
+
+
+# Keep PollOption.vote_count in step with votes changed through the ORM;
+# cast_poll_vote writes selections directly and adjusts the counters itself
+def _selection_deltas(instance, reverse, pk_set, delta):
+    if reverse:
+        return {instance.pk: delta * len(pk_set)}
+    return {option_id: delta for option_id in pk_set}
+
+
+@receiver(m2m_changed, sender=PollVote.selected_options.through)
+def adjust_option_counters_on_selection(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        # Only selections that exist are removed; remember them before they go
+        own, target = ('polloption_id', 'pollvote_id') if reverse else ('pollvote_id', 'polloption_id')
+        existing = sender.objects.filter(**{own: instance.pk})
+        if action == 'pre_remove':
+            existing = existing.filter(**{f'{target}__in': pk_set})
+        instance._removed_selection_ids = set(existing.values_list(target, flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        removed = getattr(instance, '_removed_selection_ids', set())
+        instance._removed_selection_ids = set()
+        if removed:
+            adjust_option_counters(_selection_deltas(instance, reverse, removed, -1))
+    elif action == 'post_add' and pk_set:
+        adjust_option_counters(_selection_deltas(instance, reverse, pk_set, 1))
+
+
+@receiver(pre_delete, sender=PollVote)
+def decrement_option_counters_on_vote_delete(sender, instance, **kwargs):
+    option_ids = PollVote.selected_options.through.objects.filter(
+        pollvote_id=instance.pk
+    ).values_list('polloption_id', flat=True)
+    adjust_option_counters({option_id: -1 for option_id in option_ids})
+
+
+# Drop cached poll tallies when the votes or options they count change
+@receiver(m2m_changed, sender=PollVote.selected_options.through)
+def invalidate_poll_tally_on_vote(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_poll_tally(instance.poll_id)
+
+
+@receiver(post_delete, sender=PollVote)
+@receiver(post_save, sender=PollOption)
+@receiver(post_delete, sender=PollOption)
+def invalidate_poll_tally_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_poll_tally(instance.poll_id)
+
+
+# Sync a user's For You timeline when the courses that select its posts change
+@receiver(post_save, sender=UserCourseExperience)
+@receiver(post_delete, sender=UserCourseExperience)
+@receiver(post_save, sender=UserCourseHelp)
+@receiver(post_delete, sender=UserCourseHelp)
+def sync_timeline_on_course_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_timeline_sync(instance.user_id, [instance.course_id])
+
+
+# Course autocomplete reads names, aliases and experienced counts from a per-process index
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseAlias)
+@receiver(post_delete, sender=CourseAlias)
+@receiver(post_save, sender=UserCourseExperience)
+@receiver(post_delete, sender=UserCourseExperience)
+def invalidate_course_index_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_course_index()
+
+
+@receiver(pre_save, sender=UserProfile)
+def track_schedule_change(sender, instance, raw=False, **kwargs):
+    """Note the courses added to or removed from the schedule by this save (profiles are re-saved on every User save)"""
+    block_id_fields = [f'{field}_id' for field in SCHEDULE_BLOCK_FIELDS]
+    instance._schedule_changed_course_ids = set()
+    if raw or instance.pk is None:
+        return
+    stored = UserProfile.objects.filter(pk=instance.pk).values(*block_id_fields).first()
+    if stored is not None:
+        old_course_ids = {stored[field] for field in block_id_fields}
+        new_course_ids = {getattr(instance, field) for field in block_id_fields}
+        instance._schedule_changed_course_ids = (old_course_ids ^ new_course_ids) - {None}
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_timeline_on_schedule_change(sender, instance, created, raw=False, **kwargs):
+    changed_course_ids = getattr(instance, '_schedule_changed_course_ids', None)
+    if not raw and not created and changed_course_ids:
+        schedule_timeline_sync(instance.user_id, changed_course_ids)
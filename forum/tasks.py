@@ -31,3 +31,136 @@ def send_email_notification(self, recipient_email, subject, message):
     except Exception as e:
         logger.error(f"Failed to send email to {recipient_email}: {str(e)}")
         raise
+
+
+@shared_task(bind=True, queue='general', routing_key='general.email')
+def send_bulk_email_notifications(self, emails):
+    """
+    Send a batch of notification emails over one mail connection.
+
+    Each email is sent on its own, so a refused recipient or SMTP error only
+    loses that email; failures are logged and counted.
+
+    Args:
+        emails (list): [recipient_email, subject, html_message] triples
+
+    Returns:
+        str: Summary of how many emails were sent and how many failed
+    """
+    from django.core.mail import EmailMultiAlternatives, get_connection
+    from django.conf import settings
+
+    sent = 0
+    failed = 0
+    with get_connection(fail_silently=False) as connection:
+        for recipient_email, subject, message in emails:
+            email = EmailMultiAlternatives(
+                subject, message, settings.DEFAULT_FROM_EMAIL, [recipient_email], connection=connection
+            )
+            email.attach_alternative(message, 'text/html')
+            try:
+                sent += email.send()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to send email to {recipient_email}: {str(e)}")
+
+    logger.info(f"Sent {sent} notification emails, {failed} failed")
+    return f"Sent {sent} emails, {failed} failed"
+
+
+@shared_task(bind=True, queue='general', routing_key='general.notifications')
+def send_course_notifications(self, post_id, course_ids):
+    """
+    Notify the users of a new post's courses (see send_course_notifications_service).
+
+    Args:
+        post_id (int): The new post
+        course_ids (list): Courses the post was made in
+
+    Returns:
+        str: Summary of how many users were notified
+    """
+    from forum.models import Post, Course
+    from forum.services.notification_services import send_course_notifications_service
+
+    post = Post.objects.filter(id=post_id).select_related('author').first()
+    if post is None:
+        return f"Post {post_id} no longer exists"
+
+    notified = send_course_notifications_service(post, list(Course.objects.filter(id__in=course_ids)))
+    logger.info(f"Sent course notifications for post {post_id} to {notified} users")
+    return f"Notified {notified} users"
+
+
+@shared_task(bind=True, queue='general', routing_key='general.timelines')
+def fan_out_post_to_timelines(self, post_id):
+    """
+    Write a new or edited post into its audience's For You timelines (see fan_out_post).
+
+    Args:
+        post_id (int): The post to fan out
+
+    Returns:
+        str: Summary of how many timelines the post is in
+    """
+    from forum.models import Post
+    from forum.services.timeline_services import fan_out_post
+
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        return f"Post {post_id} no longer exists"
+
+    timelines = fan_out_post(post)
+    logger.info(f"Fanned out post {post_id} to {timelines} timelines")
+    return f"Post {post_id} is in {timelines} timelines"
+
+
+@shared_task(bind=True, queue='low', routing_key='low.ranking')
+def recompute_hot_scores(self, batch_size=500):
+    """
+    Rescore posts whose engagement changed since their last hot score.
+
+    Args:
+        batch_size (int): Number of posts loaded and updated per round trip
+
+    Returns:
+        str: Summary of how many posts were rescored
+    """
+    from forum.services.ranking_services import recompute_hot_scores as recompute
+    from forum.services.feed_cache_services import bump_feed_generations
+
+    rescored = recompute(batch_size=batch_size)
+    if rescored:
+        bump_feed_generations('hot')
+    logger.info(f"Recomputed hot scores for {rescored} posts")
+    return f"Rescored {rescored} posts"
+
+
+@shared_task(bind=True, queue='low', routing_key='low.views')
+def flush_post_views(self):
+    """
+    Write view counts buffered in Redis to the posts table.
+
+    Returns:
+        str: Summary of how many posts had views applied
+    """
+    from forum.services.view_services import flush_post_views as flush
+
+    updated = flush()
+    logger.info(f"Flushed buffered views for {updated} posts")
+    return f"Flushed views for {updated} posts"
+
+
+@shared_task(bind=True, queue='low', routing_key='low.timelines')
+def trim_timelines(self):
+    """
+    Cap every For You timeline at its most recent entries.
+
+    Returns:
+        str: Summary of how many timeline entries were deleted
+    """
+    from forum.services.timeline_services import trim_timelines as trim
+
+    deleted = trim()
+    logger.info(f"Trimmed {deleted} timeline entries")
+    return f"Trimmed {deleted} timeline entries"
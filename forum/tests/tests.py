@@ -1,8 +1,9 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
 from forum.models import User, Post, Course, Solution, Comment
 from forum.services.utils import process_post_preview
 import json
+import io
 
 class GeneralURLTests(TestCase):
     def setUp(self):
@@ -417,3 +418,1698 @@ class PostPreviewFormattingTests(TestCase):
         preview = process_post_preview(self._build_post(content))
 
         self.assertEqual(preview, '')
+
+
+class FeedCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='cursoruser',
+            password='cursorpass123',
+            school_email='cursor@wpga.ca',
+            first_name='Cursor',
+            last_name='User'
+        )
+        from rest_framework.authtoken.models import Token
+        self.token = Token.objects.create(user=self.user)
+
+        for index in range(5):
+            Post.objects.create(
+                title=f'Cursor Post {index}',
+                content={'blocks': []},
+                author=self.user,
+                allow_teacher=True,
+            )
+
+    def _get(self, url):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_all_posts_api_cursor_walks_feed_without_duplicates(self):
+        url = reverse('all_posts_api')
+        titles = []
+        cursor = ''
+
+        while cursor is not None:
+            response = self._get(f'{url}?limit=2&cursor={cursor}')
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            self.assertNotIn('total_pages', payload)
+            titles.extend(post['title'] for post in payload['posts'])
+            self.assertEqual(payload['has_next'], payload['next_cursor'] is not None)
+            cursor = payload['next_cursor']
+
+        self.assertEqual(titles, [f'Cursor Post {index}' for index in reversed(range(5))])
+
+    def test_page_mode_returns_cursor_for_next_page(self):
+        url = reverse('all_posts_api')
+        first_page = self._get(f'{url}?limit=2').json()
+        self.assertEqual(first_page['total_pages'], 3)
+
+        next_page = self._get(f"{url}?limit=2&cursor={first_page['next_cursor']}").json()
+        self.assertEqual(
+            [post['title'] for post in next_page['posts']],
+            ['Cursor Post 2', 'Cursor Post 1']
+        )
+
+    def test_invalid_cursor_returns_bad_request(self):
+        response = self._get(reverse('all_posts_api') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+class PostCountersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='counteruser',
+            password='counterpass123',
+            school_email='counter@wpga.ca',
+            first_name='Counter',
+            last_name='User'
+        )
+        self.post = Post.objects.create(
+            title='Counter Post',
+            content={'blocks': []},
+            author=self.user,
+        )
+
+    def _counters(self):
+        from forum.models import PostCounters
+        return PostCounters.objects.get(post=self.post)
+
+    def test_counters_follow_engagement_writes(self):
+        from forum.models import PostLike
+        solution = Solution.objects.create(post=self.post, author=self.user, content={'blocks': []})
+        comment = Comment.objects.create(solution=solution, author=self.user, content={'blocks': []})
+        like = PostLike.objects.create(post=self.post, user=self.user)
+
+        counters = self._counters()
+        self.assertEqual(counters.solution_count, 1)
+        self.assertEqual(counters.comment_count, 1)
+        self.assertEqual(counters.like_count, 1)
+        self.assertEqual(counters.total_response_count, 2)
+
+        comment.delete()
+        like.delete()
+        counters = self._counters()
+        self.assertEqual(counters.comment_count, 0)
+        self.assertEqual(counters.like_count, 0)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        from django.core.management import call_command
+        from forum.models import PostCounters
+        Solution.objects.create(post=self.post, author=self.user, content={'blocks': []})
+        PostCounters.objects.filter(post=self.post).update(solution_count=7)
+
+        call_command('reconcile_post_counters', stdout=io.StringIO())
+
+        self.assertEqual(self._counters().solution_count, 1)
+
+
+class StoredPostPreviewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='previewuser',
+            password='previewpass123',
+            school_email='preview@wpga.ca',
+            first_name='Preview',
+            last_name='User'
+        )
+
+    def _create_post(self):
+        return Post.objects.create(
+            title='Preview Post',
+            content={'blocks': [
+                {'type': 'paragraph', 'data': {'text': 'See <a href="https://example.com">this</a>'}},
+                {'type': 'image', 'data': {'file': {'url': '/media/first.png'}}},
+            ]},
+            author=self.user,
+        )
+
+    def test_previews_are_stored_on_save(self):
+        from forum.services.utils import PREVIEW_VERSION
+        post = Post.objects.get(id=self._create_post().id)
+
+        self.assertEqual(post.preview_text, 'See this')
+        self.assertIn('<a href="https://example.com"', post.preview_html)
+        self.assertEqual(post.first_image_url, '/media/first.png')
+        self.assertEqual(post.preview_version, PREVIEW_VERSION)
+
+    def test_backfill_regenerates_stale_previews(self):
+        from django.core.management import call_command
+        post = self._create_post()
+        Post.objects.filter(id=post.id).update(preview_text='', preview_html='', first_image_url=None, preview_version=0)
+
+        call_command('backfill_post_previews', stdout=io.StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.preview_text, 'See this')
+        self.assertEqual(post.first_image_url, '/media/first.png')
+
+
+class PostListSerializerQueryTests(TestCase):
+    def setUp(self):
+        from django.test import RequestFactory
+        from forum.models import Poll, PollOption, PollVote, PostLike
+        self.user = User.objects.create_user(
+            username='batchuser',
+            password='batchpass123',
+            school_email='batch@wpga.ca',
+            first_name='Batch',
+            last_name='User'
+        )
+        course = Course.objects.create(name='Batch Course', category='Math')
+
+        for index in range(6):
+            if index % 2:
+                post = Poll.objects.create(
+                    title=f'Batch Poll {index}',
+                    content={'blocks': []},
+                    author=self.user,
+                    post_type='poll',
+                )
+                options = [PollOption.objects.create(poll=post, text=text) for text in ('Yes', 'No')]
+                vote = PollVote.objects.create(poll=post, user=self.user)
+                vote.selected_options.add(options[0])
+            else:
+                post = Post.objects.create(title=f'Batch Post {index}', content={'blocks': []}, author=self.user)
+                PostLike.objects.create(post=post, user=self.user)
+            post.courses.add(course)
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def _serialize(self, count):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from forum.serializers import PostListSerializer
+        posts = list(Post.objects.order_by('id')[:count])
+        with CaptureQueriesContext(connection) as queries:
+            data = PostListSerializer(posts, many=True, context={'request': self.request}).data
+        return data, len(queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        _, small_page_queries = self._serialize(2)
+        data, full_page_queries = self._serialize(6)
+
+        self.assertEqual(small_page_queries, full_page_queries)
+        self.assertTrue(data[0]['is_liked'])
+        self.assertEqual(data[1]['poll_data']['poll_info']['total_votes'], 1)
+        self.assertEqual(data[1]['poll_data']['user_vote']['selected_option_ids'], [data[1]['poll_data']['poll_options'][0]['id']])
+        self.assertTrue(data[1]['poll_data']['poll_options'][0]['user_voted'])
+        self.assertEqual(data[1]['poll_data']['poll_options'][0]['percentage'], 100.0)
+
+    def test_annotated_counts_skip_counters_lookup(self):
+        from unittest import mock
+        from forum.serializers import PostListSerializer
+        post = Post.objects.exclude(post_type='poll').first()
+        post.total_response_count, post.solution_count, post.comment_count = 5, 3, 2
+        serializer = PostListSerializer(context={'request': self.request})
+
+        with mock.patch.object(Post, 'get_counters', side_effect=AssertionError('counters loaded')):
+            self.assertEqual(serializer.get_reply_count(post), 5)
+            self.assertEqual(serializer.get_solution_count(post), 3)
+            self.assertEqual(serializer.get_comment_count(post), 2)
+
+
+class ForYouTimelineTests(TestCase):
+    def setUp(self):
+        from forum.models import UserCourseExperience
+        self.course = Course.objects.create(name='Timeline Course', category='Science')
+        self.author = User.objects.create_user(
+            username='timelineauthor', password='timelinepass123', school_email='tauthor@wpga.ca',
+            first_name='Time', last_name='Author'
+        )
+        self.member = User.objects.create_user(
+            username='timelinemember', password='timelinepass123', school_email='tmember@wpga.ca',
+            first_name='Time', last_name='Member'
+        )
+        self.outsider = User.objects.create_user(
+            username='timelineoutsider', password='timelinepass123', school_email='toutsider@wpga.ca',
+            first_name='Time', last_name='Outsider'
+        )
+        UserCourseExperience.objects.create(user=self.member, course=self.course)
+
+    def _create_post(self, title, courses):
+        # Mirrors create_post_service without its course notification emails
+        from forum.services.timeline_services import fan_out_post
+        post = Post.objects.create(title=title, content={'blocks': []}, author=self.author)
+        post.courses.set(courses)
+        fan_out_post(post)
+        return post
+
+    def _feed_titles(self, user):
+        from forum.services.feed_services import get_for_you_posts
+        return [post.title for post in get_for_you_posts(user, cursor='').object_list]
+
+    def test_course_post_fans_out_to_course_members_only(self):
+        from forum.models import TimelineEntry
+        # Build both timelines before posting so the post must arrive by fan-out
+        self._create_post('Global Post', [])
+        self.assertEqual(self._feed_titles(self.outsider), ['Global Post'])
+        self.assertEqual(self._feed_titles(self.member), ['Global Post'])
+
+        post = self._create_post('Course Post', [self.course.id])
+
+        self.assertEqual(self._feed_titles(self.member), ['Course Post', 'Global Post'])
+        self.assertEqual(self._feed_titles(self.outsider), ['Global Post'])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.outsider, post=post).exists())
+
+    def test_solution_bumps_post_to_top_of_timeline(self):
+        older = self._create_post('Older Post', [self.course.id])
+        self._create_post('Newer Post', [self.course.id])
+        self.assertEqual(self._feed_titles(self.member), ['Newer Post', 'Older Post'])
+
+        Solution.objects.create(post=older, author=self.member, content={'blocks': []})
+
+        self.assertEqual(self._feed_titles(self.member), ['Older Post', 'Newer Post'])
+
+    def test_create_post_service_queues_fan_out_after_commit(self):
+        from unittest import mock
+        from forum.models import TimelineEntry
+        from forum.services.post_services import create_post_service
+        with mock.patch('forum.tasks.fan_out_post_to_timelines.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                result = create_post_service(self.author, {
+                    'title': 'Queued Post', 'content': {'blocks': []},
+                    'is_anonymous': False, 'allow_teacher': False,
+                })
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with(result['id'])
+        self.assertFalse(TimelineEntry.objects.filter(post_id=result['id']).exists())
+
+    def test_trim_keeps_most_recent_entries_per_user(self):
+        from forum.models import TimelineEntry
+        from forum.services.timeline_services import trim_timelines
+        posts = [self._create_post(f'Trim Post {index}', [self.course.id]) for index in range(4)]
+
+        deleted = trim_timelines(limit=2)
+
+        # The author and the member each had four entries
+        self.assertEqual(deleted, 4)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=self.member).values_list('post_id', flat=True)),
+            {posts[3].id, posts[2].id}
+        )
+
+    def test_course_changes_sync_only_that_courses_posts(self):
+        from forum.models import TimelineEntry, UserCourseExperience
+        other_course = Course.objects.create(name='Other Timeline Course', category='Arts')
+        self._create_post('Course Post', [self.course.id])
+        self._create_post('Other Course Post', [other_course.id])
+        self.assertEqual(self._feed_titles(self.member), ['Course Post'])
+        entry_ids = set(TimelineEntry.objects.filter(user=self.member).values_list('id', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserCourseExperience.objects.create(user=self.member, course=other_course)
+        self.assertEqual(self._feed_titles(self.member), ['Other Course Post', 'Course Post'])
+        # Existing entries are kept rather than rebuilt
+        self.assertTrue(entry_ids <= set(TimelineEntry.objects.filter(user=self.member).values_list('id', flat=True)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserCourseExperience.objects.filter(user=self.member, course=self.course).delete()
+        self.assertEqual(self._feed_titles(self.member), ['Other Course Post'])
+
+    def test_built_timeline_is_not_rebuilt_when_empty(self):
+        from unittest import mock
+        self.assertEqual(self._feed_titles(self.outsider), [])
+        self.outsider.userprofile.refresh_from_db()
+        self.assertTrue(self.outsider.userprofile.timeline_built)
+
+        with mock.patch('forum.services.timeline_services.build_user_timeline') as build:
+            self.assertEqual(self._feed_titles(self.outsider), [])
+        build.assert_not_called()
+
+
+class HotScoreRankingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='hotuser',
+            password='hotpass123',
+            school_email='hot@wpga.ca',
+            first_name='Hot',
+            last_name='User'
+        )
+        from rest_framework.authtoken.models import Token
+        self.token = Token.objects.create(user=self.user)
+        self.quiet = Post.objects.create(title='Quiet Post', content={'blocks': []}, author=self.user)
+        self.busy = Post.objects.create(title='Busy Post', content={'blocks': []}, author=self.user)
+        # Same age, so only engagement decides the order
+        Post.objects.filter(id__in=[self.quiet.id, self.busy.id]).update(created_at=self.quiet.created_at)
+
+    def test_recompute_only_rescores_touched_posts(self):
+        from forum.services.ranking_services import recompute_hot_scores
+        self.assertEqual(recompute_hot_scores(), 2)
+        self.assertEqual(recompute_hot_scores(), 0)
+
+        for _ in range(3):
+            Solution.objects.create(post=self.quiet, author=self.user, content={'blocks': []})
+
+        self.assertEqual(recompute_hot_scores(), 1)
+        self.quiet.refresh_from_db()
+        self.busy.refresh_from_db()
+        self.assertGreater(self.quiet.hot_score, self.busy.hot_score)
+
+    def test_all_posts_api_hot_sort_with_cursor(self):
+        from forum.services.ranking_services import recompute_hot_scores
+        Solution.objects.create(post=self.quiet, author=self.user, content={'blocks': []})
+        recompute_hot_scores()
+
+        url = reverse('all_posts_api')
+        auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        first_page = self.client.get(f'{url}?sort=hot&limit=1&cursor=', **auth).json()
+        second_page = self.client.get(f"{url}?sort=hot&limit=1&cursor={first_page['next_cursor']}", **auth).json()
+
+        self.assertEqual(first_page['posts'][0]['title'], 'Quiet Post')
+        self.assertEqual(second_page['posts'][0]['title'], 'Busy Post')
+        self.assertIsNone(second_page['next_cursor'])
+
+        recent_cursor_response = self.client.get(f"{url}?limit=1&cursor={first_page['next_cursor']}", **auth)
+        self.assertEqual(recent_cursor_response.status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'feed-cache-tests'}})
+class FeedPageCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        cache.clear()
+        self.client = Client()
+        self.liker = User.objects.create_user(
+            username='cacheliker', password='cachepass123', school_email='cacheliker@wpga.ca',
+            first_name='Cache', last_name='Liker'
+        )
+        self.viewer = User.objects.create_user(
+            username='cacheviewer', password='cachepass123', school_email='cacheviewer@wpga.ca',
+            first_name='Cache', last_name='Viewer'
+        )
+        self.liker_token = Token.objects.create(user=self.liker)
+        self.viewer_token = Token.objects.create(user=self.viewer)
+        self.post = Post.objects.create(title='Cached Post', content={'blocks': []}, author=self.liker)
+        from forum.models import PostLike
+        PostLike.objects.create(post=self.post, user=self.liker)
+
+    def _get(self, token):
+        return self.client.get(reverse('all_posts_api'), HTTP_AUTHORIZATION=f'Token {token.key}').json()
+
+    def test_shared_page_overlays_viewer_state(self):
+        from unittest import mock
+        liker_page = self._get(self.liker_token)
+        with mock.patch('forum.services.feed_cache_services.get_all_posts') as get_all_posts:
+            viewer_page = self._get(self.viewer_token)
+        get_all_posts.assert_not_called()
+
+        self.assertTrue(liker_page['posts'][0]['is_liked'])
+        self.assertFalse(viewer_page['posts'][0]['is_liked'])
+        self.assertEqual(viewer_page['posts'][0]['like_count'], 1)
+        self.assertFalse(liker_page['posts'][0]['author']['userprofile']['can_compare'])
+        self.assertTrue(viewer_page['posts'][0]['author']['userprofile']['can_compare'])
+
+    def test_likes_and_follows_refresh_cached_counts(self):
+        from forum.services.post_services import like_post_service, follow_post_service
+        self.assertEqual(self._get(self.viewer_token)['posts'][0]['like_count'], 1)
+
+        like_post_service(self.viewer, self.post.id)
+        follow_post_service(self.viewer, self.post.id)
+
+        card = self._get(self.viewer_token)['posts'][0]
+        self.assertTrue(card['is_liked'])
+        self.assertEqual((card['like_count'], card['followers_count']), (2, 1))
+
+    def test_html_feed_renders_cards_from_shared_page(self):
+        from unittest import mock
+        self.client.login(school_email='cacheliker@wpga.ca', password='cachepass123')
+        self.assertContains(self.client.get(reverse('all_posts')), 'data-liked="true"')
+
+        self.client.login(school_email='cacheviewer@wpga.ca', password='cachepass123')
+        with mock.patch('forum.services.feed_cache_services.get_all_posts') as get_all_posts, \
+                mock.patch.object(Post.objects, 'filter', side_effect=AssertionError('posts were reloaded')):
+            response = self.client.get(reverse('all_posts'))
+        get_all_posts.assert_not_called()
+
+        self.assertContains(response, 'Cached Post')
+        self.assertContains(response, 'data-liked="false"')
+        self.assertContains(response, '<span class="like-count">1</span>')
+        self.assertContains(response, 'Cache Liker')
+
+    def test_write_services_invalidate_cached_pages(self):
+        from forum.services.solution_services import create_solution_service
+        self.assertEqual(self._get(self.viewer_token)['posts'][0]['solution_count'], 0)
+
+        # Answering your own post sends no notification email
+        result = create_solution_service(self.liker, self.post.id, {
+            'content': {'blocks': [{'type': 'paragraph', 'data': {'text': 'An answer'}}]}
+        })
+        self.assertNotIn('error', result)
+
+        self.assertEqual(self._get(self.viewer_token)['posts'][0]['solution_count'], 1)
+
+
+class _FakeViewRedis:
+    """The few Redis commands the view buffer uses, kept in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    def hincrby(self, key, field, amount):
+        fields = self.data.setdefault(key, {})
+        fields[str(field).encode()] = fields.get(str(field).encode(), 0) + amount
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.data.get(key, {}).items()}
+
+    def rename(self, src, dst):
+        from redis.exceptions import ResponseError
+        if src not in self.data:
+            raise ResponseError('no such key')
+        self.data[dst] = self.data.pop(src)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def pfadd(self, key, value):
+        members = self.data.setdefault(key, set())
+        added = value not in members
+        members.add(value)
+        return int(added)
+
+    def expire(self, key, seconds):
+        return True
+
+    def pipeline(self):
+        return _FakeViewPipeline(self)
+
+
+class _FakeViewPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class PostViewCountingTests(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='viewcounter', password='viewpass123', school_email='viewcounter@wpga.ca',
+            first_name='View', last_name='Counter'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.post = Post.objects.create(title='Viewed Post', content={'blocks': []}, author=self.user)
+
+    def _buffered(self, client, key):
+        from django.core.cache import cache
+        return {int(post_id): int(views) for post_id, views in client.hgetall(cache.make_key(key)).items()}
+
+    def test_flush_recovers_hash_left_by_dead_worker(self):
+        from unittest import mock
+        from forum.services.view_services import flush_post_views, PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY
+        from django.core.cache import cache
+        client = _FakeViewRedis()
+        client.hincrby(cache.make_key(FLUSHING_VIEWS_KEY), self.post.id, 3)
+        client.hincrby(cache.make_key(PENDING_VIEWS_KEY), self.post.id, 2)
+
+        with mock.patch('forum.services.view_services._redis_client', return_value=client):
+            self.assertEqual(flush_post_views(), 1)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 5)
+        self.assertEqual(client.data, {})
+
+    def test_failed_flush_applies_nothing_and_keeps_counts(self):
+        from unittest import mock
+        from django.db.models import QuerySet
+        from forum.services.view_services import flush_post_views, PENDING_VIEWS_KEY
+        from django.core.cache import cache
+        other = Post.objects.create(title='Other Viewed Post', content={'blocks': []}, author=self.user)
+        client = _FakeViewRedis()
+        client.hincrby(cache.make_key(PENDING_VIEWS_KEY), self.post.id, 1)
+        client.hincrby(cache.make_key(PENDING_VIEWS_KEY), other.id, 2)
+
+        original_update = QuerySet.update
+        calls = []
+
+        def fail_second_update(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return original_update(queryset, **kwargs)
+
+        with mock.patch('forum.services.view_services._redis_client', return_value=client), \
+                mock.patch.object(QuerySet, 'update', fail_second_update):
+            with self.assertRaises(RuntimeError):
+                flush_post_views()
+
+        self.assertEqual(sorted(Post.objects.filter(id__in=[self.post.id, other.id]).values_list('views', flat=True)), [0, 0])
+        self.assertEqual(self._buffered(client, PENDING_VIEWS_KEY), {self.post.id: 1, other.id: 2})
+
+    @override_settings(POST_VIEWS_UNIQUE_PER_USER=True)
+    def test_unique_views_count_once_per_user_per_day(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from forum.services.view_services import record_post_view, PENDING_VIEWS_KEY
+        client = _FakeViewRedis()
+        now = timezone.now()
+        with mock.patch('forum.services.view_services._redis_client', return_value=client):
+            record_post_view(self.post.id, self.user)
+            record_post_view(self.post.id, self.user)
+            with mock.patch('forum.services.view_services.timezone.now', return_value=now + timedelta(days=1)):
+                record_post_view(self.post.id, self.user)
+
+        self.assertEqual(self._buffered(client, PENDING_VIEWS_KEY), {self.post.id: 2})
+
+    def test_detail_view_counts_without_saving_post(self):
+        from unittest import mock
+        with mock.patch.object(Post, 'save') as save:
+            response = self.client.get(
+                reverse('api_post_detail', args=[self.post.id]),
+                HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+        self.assertEqual(response.status_code, 200)
+        save.assert_not_called()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_apply_view_counts_adds_to_views_and_marks_hot_score_stale(self):
+        from forum.services.view_services import apply_view_counts
+        from forum.services.ranking_services import recompute_hot_scores
+        other = Post.objects.create(title='Other Post', content={'blocks': []}, author=self.user)
+        recompute_hot_scores()
+
+        updated = apply_view_counts({self.post.id: 3, other.id: 3, 999999: 2})
+
+        self.assertEqual(updated, 2)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.views, other.views), (3, 3))
+        self.assertIsNone(self.post.hot_score_updated_at)
+
+
+class SearchVectorTriggerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='vectoruser', password='vectorpass123', school_email='vectoruser@wpga.ca',
+            first_name='Vector', last_name='Author'
+        )
+
+    def _post_vector(self, post):
+        return Post.objects.values_list('search_vector', flat=True).get(id=post.id)
+
+    def test_post_vector_follows_title_and_content_only(self):
+        post = Post.objects.create(title='Photosynthesis', content={'blocks': []}, author=self.user)
+        self.assertIn('photosynthesi', self._post_vector(post))
+
+        # The in-memory search_vector is stale; a full save must not clobber the stored one
+        with self.assertNumQueries(1):
+            post.save(update_fields=['last_activity_at'])
+        post.save()
+        self.assertIn('photosynthesi', self._post_vector(post))
+
+        post.title = 'Respiration'
+        post.save()
+        vector = self._post_vector(post)
+        self.assertIn('respir', vector)
+        self.assertNotIn('photosynthesi', vector)
+
+    def test_solution_and_comment_vectors_are_weighted_like_post_content(self):
+        post = Post.objects.create(title='Weights', content={'blocks': []}, author=self.user)
+        solution = Solution.objects.create(post=post, author=self.user, content={'blocks': [
+            {'type': 'paragraph', 'data': {'text': 'Photosynthesis'}},
+        ]})
+        comment = Comment.objects.create(solution=solution, author=self.user, content='Respiration')
+
+        self.assertEqual(Solution.objects.values_list('search_vector', flat=True).get(id=solution.id), "'photosynthesi':1B")
+        self.assertEqual(Comment.objects.values_list('search_vector', flat=True).get(id=comment.id), "'respir':1B")
+
+    def test_user_vector_is_set_on_insert_and_name_change(self):
+        self.assertIn('vector', User.objects.values_list('search_vector', flat=True).get(id=self.user.id))
+
+        self.user.first_name = 'Matrix'
+        self.user.save()
+        self.assertIn('matrix', User.objects.values_list('search_vector', flat=True).get(id=self.user.id))
+
+
+class ContentCompilerTests(TestCase):
+    def test_one_pass_produces_every_artifact(self):
+        from forum.services.content_compiler import compile_post_content
+        content = json.dumps({'blocks': [
+            {'type': 'paragraph', 'data': {'text': 'See <a href="https://example.com">notes</a>&nbsp;<b>now</b>'}},
+            {'type': 'image', 'data': {'file': {'url': '/media/uploads/a.jpg'}, 'caption': 'Diagram'}},
+            {'type': 'image', 'data': {'url': '/media/uploads/b.jpg'}},
+            {'type': 'list', 'data': {'items': [{'content': 'sh1t list', 'items': []}]}},
+        ]})
+
+        compiled = compile_post_content(json.loads(content))
+
+        self.assertEqual(compiled.preview_text, 'See notes now\nDiagram\nsh1t list')
+        self.assertEqual(compiled.preview_html, 'See <a href="https://example.com">notes</a> now\nDiagram\nsh1t list')
+        self.assertEqual(compiled.first_image_url, '/media/uploads/a.jpg')
+        self.assertEqual(compiled.file_urls, ['/media/uploads/a.jpg', '/media/uploads/b.jpg'])
+        self.assertEqual(compiled.moderation_findings, ["Bad word detected in list item in block of type 'list'."])
+
+        # String payloads are parsed for previews but moderated as a whole
+        self.assertEqual(compile_post_content(content).preview_text, compiled.preview_text)
+        self.assertEqual(compile_post_content(content).moderation_findings, ['Bad word detected in text.'])
+
+    def test_unsafe_links_keep_only_their_text(self):
+        from forum.services.content_compiler import compile_post_content
+        compiled = compile_post_content({'blocks': [
+            {'type': 'paragraph', 'data': {'text': '<a href="javascript:alert(1)">x &amp; y</a>'}},
+        ]})
+        self.assertEqual(compiled.preview_html, 'x &amp; y')
+        self.assertEqual(compiled.preview_text, 'x & y')
+
+    def test_benchmark_baseline_matches_the_compiler(self):
+        from forum.management.commands import _legacy_content_walkers as legacy
+        from forum.management.commands.benchmark_content_compiler import build_corpus
+        from forum.services.content_compiler import compile_post_content
+        for content in build_corpus(50):
+            compiled = compile_post_content(content)
+            self.assertEqual(legacy.process_post_preview(content), compiled.preview_text)
+            self.assertEqual(legacy.process_post_preview_html(content), compiled.preview_html)
+            self.assertEqual(legacy.get_first_image_url(content), compiled.first_image_url)
+            self.assertEqual(legacy.extract_files_from_editorjs_content(content), compiled.file_urls)
+
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='searcher', password='searchpass123', school_email='searcher@wpga.ca',
+            first_name='Search', last_name='User'
+        )
+        self.token = Token.objects.create(user=self.user)
+        for title, text in [
+            ('Mitochondria question', 'Why is the mitochondria <b>the</b> powerhouse of the cell?'),
+            ('Mitochondria notes', 'Shared notes on mitochondria structure.'),
+            ('Unrelated essay', 'Nothing to see here.'),
+        ]:
+            Post.objects.create(
+                title=title, author=self.user,
+                content={'blocks': [{'type': 'paragraph', 'data': {'text': text}}]},
+            )
+
+    def test_search_is_cursor_paginated_with_headlines(self):
+        url = reverse('api_search_posts')
+        auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+        first_page = self.client.get(f'{url}?q=mitochondria&limit=1', **auth).json()
+        self.assertEqual(len(first_page['posts']), 1)
+        self.assertTrue(first_page['has_next'])
+
+        second_page = self.client.get(f"{url}?q=mitochondria&limit=1&cursor={first_page['next_cursor']}", **auth).json()
+        self.assertFalse(second_page['has_next'])
+
+        titles = {first_page['posts'][0]['title'], second_page['posts'][0]['title']}
+        self.assertEqual(titles, {'Mitochondria question', 'Mitochondria notes'})
+        for page in (first_page, second_page):
+            self.assertIn('<mark>mitochondria</mark>', page['posts'][0]['headline'])
+
+    def test_walking_every_page_has_no_duplicates_or_gaps(self):
+        from forum.services.search_services import search_posts
+        for index in range(12):
+            # Repeated texts give runs of equal rank, so pages split inside ties
+            Post.objects.create(
+                title=f'Mitochondria set {index % 3}', author=self.user,
+                content={'blocks': [{'type': 'paragraph', 'data': {'text': 'mitochondria ' * (index % 4 + 1)}}]},
+            )
+        expected = [post.id for post in search_posts(self.user, 'mitochondria', per_page=100).object_list]
+        self.assertEqual(len(expected), 14)
+
+        walked, cursor = [], ''
+        # A cursor that loses its place repeats pages, so stop after more pages than there can be
+        for _ in range(len(expected)):
+            page = search_posts(self.user, 'mitochondria', cursor=cursor, per_page=3)
+            walked.extend(post.id for post in page.object_list)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(walked, expected)
+
+    def test_headline_escapes_preview_text(self):
+        from forum.services.search_services import search_posts
+        Post.objects.create(
+            title='Ribosome script', author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Ribosome count: 5 &lt; 7 &amp; rising'}}]},
+        )
+        page = search_posts(self.user, 'ribosome')
+        self.assertEqual(len(page.object_list), 1)
+        headline = page.object_list[0].search_headline
+        self.assertIn('<mark>Ribosome</mark>', headline)
+        self.assertIn('5 &lt; 7 &amp; rising', headline)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(
+            f"{reverse('api_search_posts')}?q=mitochondria&cursor=garbage",
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ContentSearchTests(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='contentsearcher', password='searchpass123', school_email='contentsearcher@wpga.ca',
+            first_name='Content', last_name='Searcher'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.question = Post.objects.create(
+            title='Cell biology help', author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'What does this organelle do?'}}]},
+        )
+        self.other = Post.objects.create(
+            title='Study group', author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Meeting after school.'}}]},
+        )
+        self.answer = Solution.objects.create(
+            post=self.question, author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'The <b>golgi</b> apparatus packages proteins.'}}]},
+        )
+        solution = Solution.objects.create(
+            post=self.other, author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Room 204.'}}]},
+        )
+        self.comment = Comment.objects.create(solution=solution, author=self.user, content='Bring golgi diagrams')
+        self.comment_reply = Comment.objects.create(
+            solution=solution, author=self.user, parent=self.comment, content='Golgi golgi golgi body notes'
+        )
+
+    def test_search_groups_fragments_by_post(self):
+        response = self.client.get(
+            f"{reverse('api_search')}?q=golgi", HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        ).json()
+
+        results = {result['post']['id']: result['match'] for result in response['results']}
+        self.assertEqual(set(results), {self.question.id, self.other.id})
+        self.assertEqual(results[self.question.id]['type'], 'solution')
+        self.assertIn('<mark>golgi</mark>', results[self.question.id]['headline'])
+        # The stronger of the two matching comments represents the post
+        self.assertEqual(results[self.other.id], {**results[self.other.id], 'type': 'comment', 'id': self.comment_reply.id})
+        self.assertFalse(response['has_next'])
+
+    def test_search_pages_by_cursor(self):
+        from forum.services.search_services import search_content
+        first = search_content(self.user, 'golgi', per_page=1)
+        second = search_content(self.user, 'golgi', cursor=first.next_cursor, per_page=1)
+
+        self.assertIsNotNone(first.next_cursor)
+        self.assertIsNone(second.next_cursor)
+        self.assertNotEqual(first.object_list[0].id, second.object_list[0].id)
+
+    def test_edit_reindexes_only_that_row_and_backfill_fills_gaps(self):
+        from forum.services.search_services import backfill_search_text, search_content
+        self.answer.content = {'blocks': [{'type': 'paragraph', 'data': {'text': 'Ribosomes build proteins.'}}]}
+        self.answer.save(update_fields=['content'])
+        self.assertEqual(
+            {post.id for post in search_content(self.user, 'ribosomes').object_list}, {self.question.id}
+        )
+
+        # Rows written before the search columns existed have no text or vector
+        Comment.objects.filter(id=self.comment.id).update(search_text=None)
+        self.assertEqual(backfill_search_text(), {'solutions': 0, 'comments': 1})
+        self.assertEqual(Comment.objects.get(id=self.comment.id).search_text, 'Bring golgi diagrams')
+
+
+class SearchSuggestTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.author = User.objects.create_user(
+            username='suggestauthor', password='suggestpass123', school_email='suggestauthor@wpga.ca',
+            first_name='Chelsea', last_name='Morgan'
+        )
+        Course.objects.create(name='Chemistry 11')
+        Post.objects.create(title='Chemistry lab tips', content={'blocks': []}, author=self.author, hot_score=1)
+        Post.objects.create(title='Chemistry midterm', content={'blocks': []}, author=self.author, hot_score=5)
+        Post.objects.create(title='Hidden chemistry post', content={'blocks': []}, author=self.author)
+        Post.objects.create(
+            title='Chem for students only', content={'blocks': []}, author=self.author, allow_teacher=False
+        )
+
+    def test_prefix_suggestions_by_group(self):
+        response = self.client.get(reverse('api_search_suggest') + '?q=CHE').json()
+
+        self.assertEqual([post['title'] for post in response['posts']], ['Chemistry midterm', 'Chemistry lab tips'])
+        self.assertEqual([user['full_name'] for user in response['users']], ['Chelsea Morgan'])
+        self.assertEqual([course['name'] for course in response['courses']], ['Chemistry 11'])
+
+    def test_full_name_prefix_and_short_prefixes(self):
+        from forum.services.search_services import suggest
+        self.assertEqual(len(suggest(self.author, 'chel mor')['users']), 1)
+        self.assertEqual(suggest(self.author, 'chel x')['users'], [])
+        self.assertEqual(suggest(self.author, 'c'), {'posts': [], 'users': [], 'courses': []})
+
+
+class CourseIndexTests(TestCase):
+    def setUp(self):
+        from forum.models import CourseAlias, UserCourseExperience
+        from forum.services.course_services import invalidate_course_index
+        invalidate_course_index()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='indexuser', password='indexpass123', school_email='indexuser@wpga.ca',
+            first_name='Index', last_name='User'
+        )
+        self.chemistry = Course.objects.create(name='Chemistry 11', category='Science')
+        self.calculus = Course.objects.create(name='AP Calculus BC', category='Math')
+        CourseAlias.objects.create(name='Calc', course=self.calculus)
+        UserCourseExperience.objects.create(user=self.user, course=self.calculus)
+
+    def test_search_ranks_prefixes_and_counts_experience(self):
+        response = self.client.get(reverse('course-search') + '?q=calc').json()
+        self.assertEqual(response[0], {
+            'id': self.calculus.id, 'name': 'AP Calculus BC', 'category': 'Math', 'experienced_count': 1
+        })
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('course-search') + '?q=chem')
+
+    def test_changes_invalidate_index(self):
+        from forum.models import CourseAlias
+        self.client.get(reverse('course-search') + '?q=chem')
+        CourseAlias.objects.create(name='Organic', course=self.chemistry)
+
+        response = self.client.get(reverse('course-search') + '?q=organic').json()
+        self.assertEqual(response[0]['id'], self.chemistry.id)
+
+    def test_similarity_matches_pg_trgm(self):
+        from django.db import connection
+        from forum.services.course_services import trigrams, trigram_similarity
+        pairs = [('Chemistry 11', 'chem'), ('AP Calculus BC', 'calculus'), ('English 10', 'engl'), ('Art', 'x')]
+        with connection.cursor() as cursor:
+            for text, token in pairs:
+                cursor.execute('SELECT similarity(%s, %s)', [text, token])
+                self.assertAlmostEqual(trigram_similarity(trigrams(text), trigrams(token)), cursor.fetchone()[0], places=5)
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.chelsea = User.objects.create_user(
+            username='chelsea', password='userpass123', school_email='chelsea@wpga.ca',
+            first_name='Chelsea', last_name='Morgan'
+        )
+        self.morgan = User.objects.create_user(
+            username='morgan', password='userpass123', school_email='morgan@wpga.ca',
+            first_name='Morgan', last_name='Lee'
+        )
+        User.objects.create_user(
+            username='unrelated', password='userpass123', school_email='unrelated@wpga.ca',
+            first_name='Xavier', last_name='Quill'
+        )
+
+    def test_matches_name_words_and_prefixes(self):
+        from forum.services.search_services import search_users
+        self.assertEqual(
+            {user.id for user in search_users(None, '  MORGAN ').object_list},
+            {self.chelsea.id, self.morgan.id}
+        )
+        self.assertEqual([user.id for user in search_users(None, 'chel mor').object_list], [self.chelsea.id])
+        self.assertEqual({user.id for user in search_users(None, 'Mo').object_list}, {self.morgan.id, self.chelsea.id})
+        self.assertEqual(search_users(None, '').object_list, [])
+
+    def test_api_paginates(self):
+        response = self.client.get(reverse('search_users_api') + '?query=morgan').json()
+        self.assertEqual(len(response['users']), 2)
+        self.assertFalse(response['has_next'])
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            from forum.services.search_services import search_users
+            first = search_users(None, 'morgan', per_page=1)
+            self.assertTrue(first.has_next())
+            with self.assertNumQueries(1):
+                second = search_users(None, 'Morgan ', page=2, per_page=1)
+            self.assertEqual(len({first.object_list[0].id, second.object_list[0].id}), 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'search-cache-tests'}})
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cachedsearcher', password='searchpass123', school_email='cachedsearcher@wpga.ca',
+            first_name='Cached', last_name='Searcher'
+        )
+        self.posts = [
+            Post.objects.create(
+                title=title, author=self.user,
+                content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Enzyme kinetics.'}}]},
+            )
+            for title in ('Enzyme question', 'Enzyme notes', 'Enzyme review')
+        ]
+
+    def test_repeat_queries_page_through_cached_ranking(self):
+        from forum.services.search_services import search_posts
+        from forum.services.search_cache_services import get_cached_search_page, get_search_cache_stats
+
+        first = get_cached_search_page(self.user, 'Enzyme', per_page=2)
+        second = get_cached_search_page(self.user, '  ENZYME ', cursor=first.next_cursor, per_page=2)
+
+        expected = search_posts(self.user, 'enzyme', per_page=3).object_list
+        self.assertEqual(
+            [post.id for post in first.object_list + second.object_list],
+            [post.id for post in expected]
+        )
+        self.assertFalse(second.has_next())
+        self.assertEqual(get_search_cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_post_edits_invalidate_rankings(self):
+        from forum.services.post_services import update_post_service
+        from forum.services.search_cache_services import get_cached_search_page
+
+        self.assertEqual(len(get_cached_search_page(self.user, 'enzyme').object_list), 3)
+        update_post_service(self.user, self.posts[0].id, {'title': 'Unrelated title'})
+        self.assertEqual(len(get_cached_search_page(self.user, 'enzyme').object_list), 2)
+
+    def test_stats_are_staff_only(self):
+        client = Client()
+        client.login(school_email='cachedsearcher@wpga.ca', password='searchpass123')
+        self.assertEqual(client.get(reverse('api_search_cache_stats')).status_code, 403)
+
+        User.objects.filter(id=self.user.id).update(is_staff=True)
+        response = client.get(reverse('api_search_cache_stats'))
+        self.assertEqual(response.json(), {'hits': 0, 'misses': 0, 'hit_rate': None})
+
+
+@override_settings(
+    SEARCH_BACKEND='forum.services.search_backends.SQLiteFTS5SearchBackend',
+    SEARCH_BACKEND_OPTIONS={'path': ':memory:'},
+)
+class SQLiteSearchBackendTests(TestCase):
+    def setUp(self):
+        from forum.services import search_backends
+        search_backends._backends.clear()
+        self.addCleanup(search_backends._backends.clear)
+        self.user = User.objects.create_user(
+            username='ftsuser', password='ftspass123', school_email='ftsuser@wpga.ca',
+            first_name='Fts', last_name='User'
+        )
+        self.existing = Post.objects.create(
+            title='Photosynthesis basics', author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Light reactions & the Calvin cycle.'}}]},
+        )
+
+    def test_search_uses_shadow_index(self):
+        from forum.services.search_services import search_posts
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                title='Cell biology review', author=self.user,
+                content={'blocks': [{'type': 'paragraph', 'data': {'text': 'Where does photosynthesis happen?'}}]},
+            )
+
+        page = search_posts(self.user, 'Photosynthesis')
+        self.assertEqual([post.title for post in page.object_list], ['Photosynthesis basics', 'Cell biology review'])
+        self.assertIn('<mark>photosynthesis</mark>', page.object_list[1].search_headline)
+        self.assertIn('&amp;', search_posts(self.user, 'calvin').object_list[0].search_headline)
+
+    def test_edits_and_deletes_update_shadow_index(self):
+        from forum.services.search_backends import get_search_backend
+        backend = get_search_backend()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.existing.title = 'Respiration basics'
+            self.existing.save()
+        self.assertEqual([post_id for post_id, _ in backend.search('respiration')], [self.existing.id])
+        self.assertEqual(backend.search('photosynthesis'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.existing.delete()
+        self.assertEqual(backend.search('respiration'), [])
+
+    def test_preview_backfill_reindexes_posts(self):
+        from forum.services.post_services import backfill_post_previews_service
+        from forum.services.search_backends import get_search_backend
+        backend = get_search_backend()
+        Post.objects.filter(id=self.existing.id).update(preview_text='', preview_version=0)
+        backend.index_posts(Post.objects.filter(id=self.existing.id))
+        self.assertEqual(backend.search('calvin'), [])
+
+        self.assertEqual(backfill_post_previews_service(), 1)
+        self.assertEqual([post_id for post_id, _ in backend.search('calvin')], [self.existing.id])
+
+    def test_query_syntax_is_searched_literally(self):
+        from forum.services.search_backends import SQLiteFTS5SearchBackend
+        self.assertEqual(SQLiteFTS5SearchBackend.match_expression('title:cell OR "bio'), '"title" "cell" "OR" "bio"')
+        self.assertIsNone(SQLiteFTS5SearchBackend.match_expression('?!'))
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='relateduser', password='relatedpass123', school_email='relateduser@wpga.ca',
+            first_name='Related', last_name='User'
+        )
+        self.chemistry = Course.objects.create(name='Chemistry 11', category='Science')
+        self.physics = Course.objects.create(name='Physics 11', category='Science')
+
+    def _post(self, title, course, **kwargs):
+        post = Post.objects.create(
+            title=title, author=self.user,
+            content={'blocks': [{'type': 'paragraph', 'data': {'text': title}}]}, **kwargs
+        )
+        post.courses.set([course])
+        return post
+
+    def test_related_posts_share_a_course(self):
+        from forum.services.related_posts_services import compute_related_posts
+        balancing = self._post('How do I balance chemical equations?', self.chemistry)
+        redox = self._post('Balancing redox chemical equations', self.chemistry)
+        self._post('How do I balance chemical equations in physics?', self.physics)
+        self._post('Lab safety rules', self.chemistry)
+
+        self.assertEqual([post_id for post_id, _ in compute_related_posts(balancing)], [redox.id])
+        balancing.refresh_from_db()
+        self.assertIsNotNone(balancing.related_posts_computed_at)
+
+    def test_new_posts_are_offered_to_matching_posts(self):
+        from forum.services.post_services import create_post_service
+        from forum.services.related_posts_services import get_related_posts
+        existing = self._post('Balancing redox chemical equations', self.chemistry)
+        self.assertEqual(get_related_posts(existing, self.user), [])
+
+        result = create_post_service(self.user, {
+            'title': 'How do I balance chemical equations?',
+            'content': {'blocks': [{'type': 'paragraph', 'data': {'text': 'Stuck on stoichiometry.'}}]},
+            'courses': [self.chemistry.id],
+            'is_anonymous': False,
+            'allow_teacher': True,
+        })
+
+        existing.refresh_from_db()
+        self.assertEqual([related['id'] for related in get_related_posts(existing, self.user)], [result['id']])
+        new_post = Post.objects.get(id=result['id'])
+        self.assertEqual([related['id'] for related in get_related_posts(new_post, self.user)], [existing.id])
+
+    def test_teachers_only_see_teacher_visible_related_posts(self):
+        from forum.services.related_posts_services import compute_related_posts, get_related_posts
+        post = self._post('How do I balance chemical equations?', self.chemistry, allow_teacher=True)
+        hidden = self._post('Balancing redox chemical equations', self.chemistry, allow_teacher=False)
+        compute_related_posts(post)
+
+        teacher = User.objects.create_user(
+            username='relatedteacher', password='relatedpass123', school_email='relatedteacher@wpga.ca',
+            first_name='Related', last_name='Teacher', is_teacher=True
+        )
+        self.assertEqual([related['id'] for related in get_related_posts(post, self.user)], [hidden.id])
+        self.assertEqual(get_related_posts(post, teacher), [])
+
+    def test_suggest_api_matches_title_while_composing(self):
+        existing = self._post('Balancing redox chemical equations', self.chemistry)
+        self.client.login(school_email='relateduser@wpga.ca', password='relatedpass123')
+
+        response = self.client.get(reverse('api_related_posts_suggest'), {
+            'title': 'balance chemical equations', 'courses': f'{self.chemistry.id}'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([related['id'] for related in response.json()['related_posts']], [existing.id])
+
+        response = self.client.get(reverse('api_related_posts_suggest'), {
+            'title': 'balance chemical equations', 'courses': f'{self.physics.id}'
+        })
+        self.assertEqual(response.json()['related_posts'], [])
+        self.assertEqual(self.client.get(reverse('api_related_posts_suggest'), {'courses': 'x'}).status_code, 400)
+
+
+class CommentTreeTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='treeuser', password='treepass123', school_email='treeuser@wpga.ca',
+            first_name='Tree', last_name='User'
+        )
+        self.other = User.objects.create_user(
+            username='treeother', password='treepass123', school_email='treeother@wpga.ca',
+            first_name='Tree', last_name='Other'
+        )
+        self.post = Post.objects.create(title='Threaded post', content={'blocks': []}, author=self.user)
+        self.solutions = [
+            Solution.objects.create(post=self.post, author=self.user, content={'blocks': []}),
+            Solution.objects.create(post=self.post, author=self.other, content={'blocks': []}),
+        ]
+        self.client.login(school_email='treeuser@wpga.ca', password='treepass123')
+
+    def _add_thread(self, solution, length):
+        parent = None
+        for index in range(length):
+            parent = Comment.objects.create(
+                solution=solution, author=(self.user, self.other)[index % 2],
+                content=f'Comment {index}', parent=parent if index % 3 else None
+            )
+
+    def test_trees_are_assembled_from_one_query(self):
+        from forum.services.comment_tree_services import load_comment_trees
+        parent = None
+        for index in range(7):
+            parent = Comment.objects.create(solution=self.solutions[0], author=self.user, content=f'{index}', parent=parent)
+
+        solution = Solution.objects.get(id=self.solutions[0].id)
+        with self.assertNumQueries(1):
+            load_comment_trees([solution])
+            comments = list(solution.comments.all())
+            self.assertEqual([comment.get_depth() for comment in comments], [0, 1, 2, 3, 4, 5, 5])
+            self.assertEqual([list(comment.replies.all()) for comment in comments[:-1]], [[reply] for reply in comments[1:]])
+            self.assertEqual(solution.root_comments_count(), 1)
+            self.assertEqual(comments[3].parent, comments[2])
+
+    def _query_counts(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+        from forum.services.post_services import get_post_detail_service
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+
+        counts = []
+        for fetch in (
+            lambda: get_post_detail_service(self.post.id, self.user),
+            lambda: self.client.get(reverse('post_detail', args=[self.post.id])),
+            lambda: api_client.get(reverse('api_post_detail', args=[self.post.id])),
+            lambda: self.client.get(
+                reverse('get_solution_comments', args=[self.solutions[0].id]), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            ),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                result = fetch()
+            self.assertEqual(getattr(result, 'status_code', 200), 200)
+            self.assertNotIn('error', result if isinstance(result, dict) else {})
+            counts.append(len(queries))
+        return counts
+
+    def test_query_count_does_not_grow_with_thread_size(self):
+        self._add_thread(self.solutions[0], 4)
+        self._add_thread(self.solutions[1], 2)
+        self._query_counts()
+        small_thread = self._query_counts()
+
+        self._add_thread(self.solutions[0], 40)
+        self._add_thread(self.solutions[1], 20)
+        self.assertEqual(self._query_counts(), small_thread)
+
+    def test_comments_service_nests_replies(self):
+        from django.test import RequestFactory
+        from forum.services.comment_services import get_comments_service
+        root = Comment.objects.create(solution=self.solutions[0], author=self.user, content='Root')
+        reply = Comment.objects.create(solution=self.solutions[0], author=self.other, content='Reply', parent=root)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        result = get_comments_service(request, self.solutions[0].id)
+        self.assertEqual([comment['id'] for comment in result['comments_data']], [root.id, reply.id])
+        self.assertEqual([child['id'] for child in result['comments_data'][0]['replies']], [reply.id])
+        self.assertIn(f'id="comment-{reply.id}"', result['html'])
+
+    def test_stored_paths_serve_thread_queries(self):
+        from forum.services.comment_tree_services import get_thread, get_subtree, get_replies_after
+        solution = self.solutions[0]
+        first = Comment.objects.create(solution=solution, author=self.user, content='First')
+        reply = Comment.objects.create(solution=solution, author=self.other, content='Reply', parent=first)
+        nested = Comment.objects.create(solution=solution, author=self.user, content='Nested', parent=reply)
+        second = Comment.objects.create(solution=solution, author=self.other, content='Second')
+        late_reply = Comment.objects.create(solution=solution, author=self.other, content='Late reply', parent=first)
+
+        nested.refresh_from_db()
+        self.assertEqual((nested.root_id, nested.depth), (first.id, 2))
+        self.assertEqual(nested.path, Comment.path_segment(first.id) + Comment.path_segment(reply.id) + Comment.path_segment(nested.id))
+        self.assertEqual(list(get_thread(solution)), [first, reply, nested, late_reply, second])
+        self.assertEqual(list(get_subtree(reply)), [reply, nested])
+        self.assertEqual(list(get_replies_after(reply)), [nested, late_reply])
+        self.assertEqual(list(get_replies_after(second)), [])
+
+    def test_replies_must_stay_in_their_solution(self):
+        other_thread = Comment.objects.create(solution=self.solutions[1], author=self.other, content='Elsewhere')
+        response = self.client.post(
+            reverse('create_comment', kwargs={'solution_id': self.solutions[0].id}),
+            data=json.dumps({'content': 'Reply', 'parent_id': other_thread.id}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(solution=self.solutions[0]).exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PollTallyTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from forum.models import Poll, PollOption
+        cache.clear()
+        self.voters = [
+            User.objects.create_user(
+                username=f'tallyvoter{index}', password='tallypass123', school_email=f'tallyvoter{index}@wpga.ca',
+                first_name='Tally', last_name=f'Voter{index}'
+            )
+            for index in range(3)
+        ]
+        self.polls = []
+        for index, allow_multiple_choice in enumerate((False, True)):
+            poll = Poll.objects.create(
+                title=f'Tally poll {index}', content={'blocks': []}, author=self.voters[0],
+                post_type='poll', allow_multiple_choice=allow_multiple_choice
+            )
+            poll.option_list = [PollOption.objects.create(poll=poll, text=text) for text in ('A', 'B', 'C')]
+            self.polls.append(poll)
+
+    def _vote(self, poll, user, *option_indexes):
+        from forum.models import PollVote
+        vote, _ = PollVote.objects.get_or_create(poll=poll, user=user)
+        vote.selected_options.set([poll.option_list[index] for index in option_indexes])
+        return vote
+
+    def test_counts_many_polls_in_one_query(self):
+        from forum.services.poll_tally_services import get_poll_tallies
+        single, multiple = self.polls
+        self._vote(single, self.voters[0], 0)
+        self._vote(single, self.voters[1], 0)
+        vote = self._vote(multiple, self.voters[0], 2, 0)
+        self._vote(multiple, self.voters[2], 1)
+
+        with self.assertNumQueries(1):
+            tallies = get_poll_tallies([single.id, multiple.id], self.voters[0])
+
+        self.assertEqual(tallies[single.id].total_votes, 2)
+        self.assertEqual(tallies[single.id].vote_count(single.option_list[0].id), 2)
+        self.assertEqual(tallies[single.id].percentage(single.option_list[0].id), 100)
+        self.assertEqual(tallies[multiple.id].total_votes, 2)
+        self.assertEqual(
+            [tallies[multiple.id].vote_count(option.id) for option in multiple.option_list], [1, 1, 1]
+        )
+        self.assertEqual(tallies[multiple.id].user_vote_id, vote.id)
+        self.assertEqual(tallies[multiple.id].selected_option_ids, [multiple.option_list[0].id, multiple.option_list[2].id])
+
+    def test_cached_counts_are_invalidated_by_votes(self):
+        from forum.services.poll_tally_services import get_poll_tally
+        poll = self.polls[0]
+        self._vote(poll, self.voters[0], 0)
+        get_poll_tally(poll.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_poll_tally(poll.id).total_votes, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_poll_tally(poll.id, self.voters[0]).selected_option_ids, [poll.option_list[0].id])
+
+        self._vote(poll, self.voters[1], 1)
+        self.assertEqual(get_poll_tally(poll.id).vote_count(poll.option_list[1].id), 1)
+        self._vote(poll, self.voters[0], 1)
+        self.assertEqual(get_poll_tally(poll.id).vote_count(poll.option_list[1].id), 2)
+        poll.votes.filter(user=self.voters[1]).delete()
+        self.assertEqual(get_poll_tally(poll.id).total_votes, 1)
+
+    def test_serialized_polls_and_cached_feed_cards_read_tallies(self):
+        from django.test import RequestFactory
+        from forum.serializers import serialize_poll_display_data, overlay_viewer_fields
+        poll = self.polls[0]
+        self._vote(poll, self.voters[1], 2)
+        request = RequestFactory().get('/')
+        request.user = self.voters[1]
+
+        poll_data = serialize_poll_display_data(poll, request=request)
+        self.assertEqual(poll_data['poll_info']['total_votes'], 1)
+        self.assertEqual([option['vote_count'] for option in poll_data['poll_options']], [0, 0, 1])
+        self.assertEqual(poll_data['user_vote']['selected_option_ids'], [poll.option_list[2].id])
+
+        self._vote(poll, self.voters[2], 0)
+        card = overlay_viewer_fields([{'id': poll.id, 'poll_data': poll_data, 'is_anonymous': True}], request)[0]
+        self.assertEqual(card['poll_data']['poll_info']['total_votes'], 2)
+        self.assertEqual([option['percentage'] for option in card['poll_data']['poll_options']], [50.0, 0, 50.0])
+        self.assertTrue(card['poll_data']['poll_options'][2]['user_voted'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PollVotersTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from forum.models import Poll, PollOption, PollVote
+        cache.clear()
+        self.voters = [
+            User.objects.create_user(
+                username=f'listvoter{index}', password='listpass123', school_email=f'listvoter{index}@wpga.ca',
+                first_name='List', last_name=f'Voter{index}'
+            )
+            for index in range(5)
+        ]
+        self.poll = Poll.objects.create(
+            title='Voters poll', content={'blocks': []}, author=self.voters[0], post_type='poll'
+        )
+        self.options = [PollOption.objects.create(poll=self.poll, text=text) for text in ('A', 'B')]
+        for voter in self.voters:
+            PollVote.objects.create(poll=self.poll, user=voter).selected_options.set([self.options[0]])
+        self.client.login(school_email='listvoter0@wpga.ca', password='listpass123')
+
+    def _voters_url(self, poll=None):
+        return reverse('api_poll_voters', kwargs={'post_id': (poll or self.poll).id})
+
+    def test_voter_list_pages_by_cursor_newest_first(self):
+        response = self.client.get(self._voters_url(), {'option': self.options[0].id, 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        names = [voter['username'] for voter in response.data['voters']]
+        self.assertTrue(response.data['has_next'])
+
+        while response.data['has_next']:
+            response = self.client.get(self._voters_url(), {
+                'option': self.options[0].id, 'limit': 2, 'cursor': response.data['next_cursor']
+            })
+            names += [voter['username'] for voter in response.data['voters']]
+
+        self.assertEqual(names, [voter.username for voter in reversed(self.voters)])
+        response = self.client.get(self._voters_url(), {'option': self.options[1].id})
+        self.assertEqual(response.data['voters'], [])
+        self.assertFalse(response.data['has_next'])
+
+    def test_voter_list_rejects_private_polls_and_foreign_options(self):
+        from forum.models import Poll, PollOption
+        private_poll = Poll.objects.create(
+            title='Private poll', content={'blocks': []}, author=self.voters[0], post_type='poll', is_public_voting=False
+        )
+        private_option = PollOption.objects.create(poll=private_poll, text='Hidden')
+
+        response = self.client.get(self._voters_url(private_poll), {'option': private_option.id})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(self._voters_url(), {'option': private_option.id})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self._voters_url(), {'option': self.options[0].id, 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_payloads_carry_only_recent_voters(self):
+        from forum.serializers import serialize_poll_display_data
+
+        poll_data = serialize_poll_display_data(self.poll)
+        first_option = poll_data['poll_options'][0]
+        self.assertNotIn('voters', first_option)
+        self.assertEqual(first_option['vote_count'], 5)
+        self.assertEqual(
+            [voter['username'] for voter in first_option['recent_voters']],
+            [voter.username for voter in reversed(self.voters)][:3]
+        )
+        # Counts and recent voters come from the cache; only the poll and its options are loaded
+        with self.assertNumQueries(2):
+            serialize_poll_display_data(self.poll)
+
+        self.voters[1].poll_votes.get().selected_options.set([self.options[1]])
+        poll_data = serialize_poll_display_data(self.poll)
+        self.assertEqual([voter['username'] for voter in poll_data['poll_options'][1]['recent_voters']], ['listvoter1'])
+
+
+class PollVoteServiceTests(TestCase):
+    def setUp(self):
+        from forum.models import Poll, PollOption
+        self.voters = [
+            User.objects.create_user(
+                username=f'castvoter{index}', password='castpass123', school_email=f'castvoter{index}@wpga.ca',
+                first_name='Cast', last_name=f'Voter{index}'
+            )
+            for index in range(5)
+        ]
+        self.poll = Poll.objects.create(
+            title='Cast poll', content={'blocks': []}, author=self.voters[0], post_type='poll', allow_multiple_choice=True
+        )
+        self.options = [PollOption.objects.create(poll=self.poll, text=text) for text in ('A', 'B', 'C')]
+
+    def _option_counts(self):
+        from forum.models import PollOption
+        return list(PollOption.objects.filter(poll=self.poll).order_by('id').values_list('vote_count', flat=True))
+
+    def _voter_count(self):
+        from forum.models import PostCounters
+        return PostCounters.objects.get(post_id=self.poll.id).poll_vote_count
+
+    def test_revote_updates_only_changed_selections(self):
+        from forum.services.poll_vote_services import cast_poll_vote
+        first = cast_poll_vote(self.poll, self.voters[0], [self.options[0].id, self.options[1].id])
+        self.assertTrue(first['created'])
+        second = cast_poll_vote(self.poll, self.voters[0], [str(self.options[1].id), self.options[2].id])
+        self.assertFalse(second['created'])
+        self.assertEqual(second['vote_id'], first['vote_id'])
+
+        self.assertEqual(self._option_counts(), [0, 1, 1])
+        self.assertEqual(self._voter_count(), 1)
+        self.assertEqual(
+            sorted(self.poll.votes.get().selected_options.values_list('id', flat=True)),
+            [self.options[1].id, self.options[2].id]
+        )
+
+    def test_invalid_selections_are_rejected(self):
+        from forum.models import Poll, PollOption
+        from forum.services.poll_vote_services import cast_poll_vote
+        single = Poll.objects.create(title='Single poll', content={'blocks': []}, author=self.voters[0], post_type='poll')
+        single_options = [PollOption.objects.create(poll=single, text=text) for text in ('A', 'B')]
+
+        self.assertIn('error', cast_poll_vote(single, self.voters[0], [option.id for option in single_options]))
+        self.assertIn('error', cast_poll_vote(single, self.voters[0], [self.options[0].id]))
+        self.assertIn('error', cast_poll_vote(single, self.voters[0], ['abc']))
+        self.assertFalse(single.votes.exists())
+
+    def test_activity_is_bumped_from_the_voter_counter(self):
+        from forum.services.poll_vote_services import cast_poll_vote, ACTIVITY_VOTE_INTERVAL
+        for voter in self.voters[:ACTIVITY_VOTE_INTERVAL - 1]:
+            cast_poll_vote(self.poll, voter, [self.options[0].id])
+        self.poll.refresh_from_db()
+        self.assertIsNone(self.poll.last_activity_at)
+
+        cast_poll_vote(self.poll, self.voters[ACTIVITY_VOTE_INTERVAL - 1], [self.options[0].id])
+        self.poll.refresh_from_db()
+        self.assertIsNotNone(self.poll.last_activity_at)
+        self.assertEqual(self._voter_count(), ACTIVITY_VOTE_INTERVAL)
+
+    def test_orm_vote_changes_keep_option_counters(self):
+        from forum.models import PollVote
+        from forum.services.poll_vote_services import cast_poll_vote, reconcile_poll_option_counts
+        vote = PollVote.objects.create(poll=self.poll, user=self.voters[0])
+        vote.selected_options.set(self.options[:2])
+        self.options[2].votes.add(vote)
+        vote.selected_options.remove(self.options[0], self.options[0])
+        self.assertEqual(self._option_counts(), [0, 1, 1])
+        vote.selected_options.clear()
+        self.assertEqual(self._option_counts(), [0, 0, 0])
+
+        cast_poll_vote(self.poll, self.voters[1], [self.options[0].id])
+        self.poll.votes.filter(user=self.voters[1]).delete()
+        self.assertEqual(self._option_counts(), [0, 0, 0])
+        self.assertEqual(reconcile_poll_option_counts([self.poll.id]), 0)
+
+    def test_vote_views_use_the_voting_service(self):
+        self.client.login(school_email='castvoter1@wpga.ca', password='castpass123')
+        url = reverse('api_vote_on_poll', kwargs={'post_id': self.poll.id})
+        response = self.client.post(url, {'selected_option_ids': [self.options[2].id]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([option['vote_count'] for option in response.json()['poll_options']], [0, 0, 1])
+
+        response = self.client.post(reverse('api_remove_poll_vote', kwargs={'post_id': self.poll.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._option_counts(), [0, 0, 0])
+        self.assertEqual(self._voter_count(), 0)
+
+
+class PollVoteConcurrencyTests(TransactionTestCase):
+    """Load test: many voters hitting one poll at once, each voting twice concurrently."""
+    VOTERS = 300
+    WORKERS = 24
+
+    def setUp(self):
+        from forum.models import Poll, PollOption
+        self.users = User.objects.bulk_create([
+            User(
+                username=f'loadvoter{index}', school_email=f'loadvoter{index}@wpga.ca',
+                first_name='Load', last_name=f'Voter{index}'
+            )
+            for index in range(self.VOTERS)
+        ])
+        self.poll = Poll.objects.create(
+            title='Load poll', content={'blocks': []}, author=self.users[0], post_type='poll', allow_multiple_choice=True
+        )
+        self.options = [PollOption.objects.create(poll=self.poll, text=text) for text in ('A', 'B', 'C', 'D')]
+
+    def _cast(self, user, option_ids):
+        from django.db import connection
+        from forum.services.poll_vote_services import cast_poll_vote
+        try:
+            return cast_poll_vote(self.poll, user, option_ids)
+        finally:
+            connection.close()
+
+    def test_concurrent_votes_are_neither_lost_nor_duplicated(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from django.db.models import Count
+        from forum.models import PollOption, PollVote, PostCounters
+
+        option_ids = [option.id for option in self.options]
+        choices = {
+            user.id: [set(option_ids[index % 4:index % 4 + 2]), {option_ids[(index + 1) % 4]}]
+            for index, user in enumerate(self.users)
+        }
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            futures = [
+                executor.submit(self._cast, user, list(choice))
+                for user in self.users for choice in choices[user.id]
+            ]
+            results = [future.result() for future in futures]
+
+        self.assertFalse([result for result in results if 'error' in result])
+        self.assertEqual(sum(result['created'] for result in results), self.VOTERS)
+        self.assertEqual(PollVote.objects.filter(poll=self.poll).count(), self.VOTERS)
+        self.assertEqual(PostCounters.objects.get(post_id=self.poll.id).poll_vote_count, self.VOTERS)
+
+        actual = dict(
+            PollOption.objects.filter(poll=self.poll).annotate(total=Count('votes')).values_list('id', 'total')
+        )
+        self.assertEqual(
+            dict(PollOption.objects.filter(poll=self.poll).values_list('id', 'vote_count')), actual
+        )
+        selections = PollVote.selected_options.through.objects.filter(pollvote__poll=self.poll)
+        self.assertEqual(selections.count(), sum(actual.values()))
+        final = {}
+        for user_id, option_id in selections.values_list('pollvote__user_id', 'polloption_id'):
+            final.setdefault(user_id, set()).add(option_id)
+        self.assertTrue(all(final[user_id] in choices[user_id] for user_id in choices))
+
+
+class PollLiveResultsTests(TestCase):
+    def setUp(self):
+        from forum.models import Poll, PollOption
+        self.user = User.objects.create_user(
+            username='livevoter', password='livepass123', school_email='livevoter@wpga.ca',
+            first_name='Live', last_name='Voter'
+        )
+        self.poll = Poll.objects.create(title='Live poll', content={'blocks': []}, author=self.user, post_type='poll')
+        self.options = [PollOption.objects.create(poll=self.poll, text=text) for text in ('A', 'B')]
+        self.client.login(school_email='livevoter@wpga.ca', password='livepass123')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_tally_endpoint_reflects_votes(self):
+        from forum.services.poll_vote_services import cast_poll_vote
+        url = reverse('poll_results_tally', kwargs={'post_id': self.poll.id})
+        first, second = (option.id for option in self.options)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'total_votes': 0, 'options': [[first, 0], [second, 0]]})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cast_poll_vote(self.poll, self.user, [second])
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {'total_votes': 1, 'options': [[first, 0], [second, 1]]})
+
+    def test_tally_endpoint_requires_a_poll(self):
+        response = self.client.get(reverse('poll_results_tally', kwargs={'post_id': self.poll.id + 1000}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseNotificationFanOutTests(TestCase):
+    def setUp(self):
+        from forum.models import UserCourseExperience
+        self.course = Course.objects.create(name='Fan Out Course')
+        self.other_course = Course.objects.create(name='Other Fan Out Course')
+        users = {}
+        for name in ('author', 'experienced', 'student', 'both', 'outsider'):
+            users[name] = User.objects.create_user(
+                username=f'fanout{name}', password='fanoutpass123', school_email=f'fanout{name}@wpga.ca',
+                first_name='Fan', last_name=name.title(), personal_email=f'{name}@example.com'
+            )
+        self.users = users
+        for name in ('experienced', 'both', 'author'):
+            UserCourseExperience.objects.create(user=users[name], course=self.course)
+        for name in ('student', 'both'):
+            profile = users[name].userprofile
+            profile.block_2C = self.course
+            profile.save()
+        UserCourseExperience.objects.create(user=users['outsider'], course=self.other_course)
+        profile = users['student'].userprofile
+        profile.expo_push_token = 'ExponentPushToken[student]'
+        profile.save()
+
+    def test_post_creation_queues_fan_out_after_commit(self):
+        from unittest import mock
+        from forum.models import Notification
+        from forum.services.post_services import create_post_service
+        with mock.patch('forum.tasks.send_course_notifications.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = create_post_service(self.users['author'], {
+                    'title': 'Fan out post', 'content': {'blocks': []}, 'courses': [self.course.id],
+                    'is_anonymous': False, 'allow_teacher': False,
+                })
+        delay.assert_called_once_with(result['id'], [self.course.id])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_broker_outage_skips_notifications_without_failing_the_post(self):
+        from unittest import mock
+        from forum.models import Notification
+        from forum.services.post_services import create_post_service
+        with mock.patch('forum.tasks.send_course_notifications.delay', side_effect=ConnectionError('broker down')), \
+                mock.patch('forum.tasks.send_bulk_email_notifications.delay') as send_emails:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = create_post_service(self.users['author'], {
+                    'title': 'Broker down post', 'content': {'blocks': []}, 'courses': [self.course.id],
+                    'is_anonymous': False, 'allow_teacher': False,
+                })
+        self.assertNotIn('error', result)
+        self.assertTrue(Post.objects.filter(id=result['id']).exists())
+        self.assertFalse(Notification.objects.exists())
+        send_emails.assert_not_called()
+
+    def test_fan_out_batches_notifications_emails_and_pushes(self):
+        from unittest import mock
+        from forum.models import Notification
+        from forum.services.notification_services import send_course_notifications_service
+        post = Post.objects.create(title='Batched post', content={'blocks': []}, author=self.users['author'])
+        post.courses.set([self.course])
+
+        with mock.patch('forum.tasks.send_bulk_email_notifications.delay') as send_emails, \
+                mock.patch('forum.services.expo_push_service.expo_push_service.send_bulk_push_notifications') as send_pushes:
+            notified = send_course_notifications_service(post, [self.course], batch_size=2)
+
+        self.assertEqual(notified, 3)
+        self.assertEqual(
+            sorted(Notification.objects.filter(post=post).values_list('recipient__username', flat=True)),
+            ['fanoutboth', 'fanoutexperienced', 'fanoutstudent']
+        )
+        self.assertEqual(send_emails.call_count, 2)
+        subjects = {
+            email: subject for call in send_emails.call_args_list for email, subject, _ in call.args[0]
+        }
+        self.assertEqual(subjects['both@example.com'], 'New post in your experienced course: Batched post')
+        self.assertEqual(subjects['student@example.com'], 'New post in your course: Batched post')
+        send_pushes.assert_called_once()
+        [push] = send_pushes.call_args.args[0]
+        notification = Notification.objects.get(post=post, recipient=self.users['student'])
+        self.assertEqual(push['to'], 'ExponentPushToken[student]')
+        self.assertEqual(push['badge'], 1)
+        self.assertEqual(push['data']['notification_id'], str(notification.id))
+
+    def test_bulk_email_task_keeps_sending_after_a_failure(self):
+        from unittest import mock
+        from django.core import mail
+        from django.core.mail.backends.locmem import EmailBackend
+        from forum.tasks import send_bulk_email_notifications
+        original_send = EmailBackend.send_messages
+
+        def refuse_bad_address(backend, messages):
+            if messages[0].to == ['bad@example.com']:
+                raise OSError('recipient refused')
+            return original_send(backend, messages)
+
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'), \
+                mock.patch.object(EmailBackend, 'send_messages', refuse_bad_address):
+            result = send_bulk_email_notifications.apply(args=[[
+                ['first@example.com', 'Subject', '<p>Hi</p>'],
+                ['bad@example.com', 'Subject', '<p>Hi</p>'],
+                ['last@example.com', 'Subject', '<p>Hi</p>'],
+            ]]).get()
+
+        self.assertEqual(result, 'Sent 2 emails, 1 failed')
+        self.assertEqual([email.to for email in mail.outbox], [['first@example.com'], ['last@example.com']])
@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
-from forum.services.feed_services import get_for_you_posts, get_all_posts, paginate_posts, get_user_posts
+from forum.services.feed_services import get_for_you_posts, get_all_posts, paginate_posts, get_user_posts, PostCard, FEED_SORT_FIELDS
+from forum.services.feed_cache_services import get_cached_all_posts_page
 from forum.serializers import PostListSerializer, attach_poll_data_to_posts
 from forum.services.schedule_services import (
     get_block_order_for_day,
@@ -25,7 +26,10 @@ def for_you(request):
     page = request.GET.get('page', 1)
     query = request.GET.get('q', '')
 
-    page_obj = get_all_posts(request.user, query, page)
+    if query:
+        page_obj = get_all_posts(request.user, query, page)
+    else:
+        page_obj = get_for_you_posts(request.user, page)
     posts = list(page_obj.object_list)
     posts_data = PostListSerializer(posts, many=True, context={'request': request}).data
     attach_poll_data_to_posts(posts, posts_data)
@@ -84,9 +88,20 @@ def for_you(request):
 def all_posts(request):
     query = request.GET.get('q', '')
     page = request.GET.get('page', 1)
-    page_obj = get_all_posts(request.user, query, page)
-    posts = list(page_obj.object_list)
-    posts_data = PostListSerializer(posts, many=True, context={'request': request}).data
+    sort = request.GET.get('sort', 'recent')
+    if sort not in FEED_SORT_FIELDS:
+        sort = 'recent'
+
+    if query:
+        page_obj = get_all_posts(request.user, query, page, sort=sort)
+        posts = list(page_obj.object_list)
+        posts_data = PostListSerializer(posts, many=True, context={'request': request}).data
+    else:
+        # Cards come from the shared page cache with the viewer's state overlaid
+        feed_page = get_cached_all_posts_page(request, page, sort=sort)
+        posts_data = feed_page['posts']
+        posts = [PostCard(post_data) for post_data in posts_data]
+        page_obj = None
     attach_poll_data_to_posts(posts, posts_data)
 
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -100,6 +115,7 @@ def all_posts(request):
         'posts': posts,
         'posts_data': posts_data,
         'query': query,
+        'sort': sort,
         'page_obj': page_obj
     })
 
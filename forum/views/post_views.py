@@ -20,6 +20,11 @@ from forum.services.post_services import (
     unfollow_post_service
 )
 from forum.services.notification_services import mark_notifications_by_post_service
+from forum.services.view_services import record_post_view
+from forum.services.related_posts_services import get_related_posts
+from forum.services.comment_tree_services import load_comment_trees
+from forum.services.poll_tally_services import get_poll_tally
+from forum.services.poll_vote_services import cast_poll_vote, remove_poll_vote as remove_poll_vote_service
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +42,7 @@ def build_poll_response_data(poll, request=None):
         'poll_info': {
             'allow_multiple_choice': poll.allow_multiple_choice,
             'is_public_voting': poll.is_public_voting,
-            'total_votes': poll.votes.count()
+            'total_votes': get_poll_tally(poll.id).total_votes
         },
         'user_vote': None
     }
@@ -105,7 +110,7 @@ def create_post(request):
 
 @login_required
 def post_detail(request, post_id):
-    # Get post object and increment views
+    # Get post object and count the view
     post = get_object_or_404(Post, id=post_id)
     
     # Check teacher visibility
@@ -113,8 +118,7 @@ def post_detail(request, post_id):
         from django.http import Http404
         raise Http404("You don't have permission to view this post.")
     
-    post.views += 1
-    post.save(update_fields=['views'])
+    record_post_view(post.id, request.user)
     
     # Mark notifications as read using service
     if request.user.is_authenticated:
@@ -126,7 +130,11 @@ def post_detail(request, post_id):
     solution_form = SolutionForm()
     comment_form = CommentForm()
 
-    solutions = post.solutions.select_related('author').all()
+    solutions = load_comment_trees(post.solutions.select_related('author'))
+    # The accepted solution is rendered first; reuse its loaded copy and comments
+    for solution in solutions:
+        if solution.id == post.accepted_solution_id:
+            Post.accepted_solution.field.set_cached_value(post, solution)
     processed_solutions = post_data['solutions']
 
     context = {
@@ -137,6 +145,7 @@ def post_detail(request, post_id):
         'solutions': solutions,
         'solution_form': solution_form,
         'comment_form': comment_form,
+        'related_posts': get_related_posts(post, request.user),
     }
 
     return render(request, 'forum/post_detail.html', context)
@@ -301,7 +310,7 @@ def vote_on_poll(request, post_id):
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     try:
-        from forum.models import Poll, PollVote
+        from forum.models import Poll
         
         poll = Poll.objects.get(id=post_id)
         
@@ -320,45 +329,13 @@ def vote_on_poll(request, post_id):
             messages.error(request, error_msg)
             return redirect('post_detail', post_id=post_id)
         
-        # Convert to integers
-        selected_option_ids = [int(id) for id in selected_option_ids]
-        try:
-            selected_option_ids = [int(id) for id in selected_option_ids]
-        except (TypeError, ValueError):
-            error_msg = 'Invalid option selection'
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'error': error_msg}, status=400)
-            messages.error(request, error_msg)
-            return redirect('post_detail', post_id=post_id)
-
-        # Ensure selected options belong to this poll
-        valid_option_ids = list(
-            poll.options.filter(id__in=selected_option_ids).values_list('id', flat=True)
-        )
-        if not valid_option_ids:
-            error_msg = 'No valid options selected'
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'error': error_msg}, status=400)
-            messages.error(request, error_msg)
-            return redirect('post_detail', post_id=post_id)
-
-        # Enforce single-choice constraint when multiple choice is not allowed
-        if not getattr(poll, 'allow_multiple_choice', False) and len(valid_option_ids) > 1:
-            error_msg = 'You may only select one option for this poll'
+        result = cast_poll_vote(poll, request.user, selected_option_ids)
+        if 'error' in result:
+            error_msg = result['error']
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'error': error_msg}, status=400)
             messages.error(request, error_msg)
             return redirect('post_detail', post_id=post_id)
-
-        # Check if user already voted
-        existing_vote = PollVote.objects.filter(poll=poll, user=request.user).first()
-        if existing_vote:
-            # Update existing vote
-            existing_vote.selected_options.set(valid_option_ids)
-        else:
-            # Create new vote
-            poll_vote = PollVote.objects.create(poll=poll, user=request.user)
-            poll_vote.selected_options.set(valid_option_ids)
         
         # Handle AJAX requests
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -402,20 +379,18 @@ def remove_poll_vote(request, post_id):
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     try:
-        from forum.models import Poll, PollVote
+        from forum.models import Poll
         
         poll = Poll.objects.get(id=post_id)
-        poll_vote = PollVote.objects.filter(poll=poll, user=request.user).first()
+        result = remove_poll_vote_service(poll, request.user)
         
-        if not poll_vote:
-            error_msg = 'No vote found to remove'
+        if 'error' in result:
+            error_msg = result['error']
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'error': error_msg}, status=404)
             messages.error(request, error_msg)
             return redirect('post_detail', post_id=post_id)
         
-        poll_vote.delete()
-        
         # Handle AJAX requests
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -441,4 +416,24 @@ def remove_poll_vote(request, post_id):
             return JsonResponse({'error': error_msg}, status=500)
         messages.error(request, error_msg)
         return redirect('post_detail', post_id=post_id)
-    return JsonResponse({'success': False}, status=400)
\ No newline at end of file
+    return JsonResponse({'success': False}, status=400)
+
+@login_required
+def poll_results_tally(request, post_id):
+    """
+    Current vote counts of a poll, polled by the post detail page to keep results live.
+
+    Counts come from the cached poll tally, so frequent polling costs a cache
+    read rather than a recount.
+    """
+    from forum.models import Poll
+
+    poll = get_object_or_404(Poll, id=post_id)
+    if request.user.is_teacher and not poll.allow_teacher:
+        return JsonResponse({'error': "You don't have permission to view this post."}, status=403)
+
+    tally = get_poll_tally(poll.id)
+    return JsonResponse({
+        'total_votes': tally.total_votes,
+        'options': [[option_id, count] for option_id, count in tally.option_counts.items()],
+    })
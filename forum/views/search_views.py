@@ -1,26 +1,33 @@
 import json
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect
-from forum.services.search_services import search_posts, search_users
+from django.urls import reverse
+from forum.services.search_services import search_users
+from forum.services.search_cache_services import get_cached_search_page
 from forum.serializers import PostListSerializer, UserSerializer, attach_poll_data_to_posts
 
 def search_results_new_page(request):
     query = request.GET.get('q', '')
     if query:
-        posts_queryset = search_posts(request.user, query)
-        users_queryset = search_users(request.user, query)
+        try:
+            posts_page = get_cached_search_page(request.user, query, cursor=request.GET.get('cursor') or None)
+        except ValueError:
+            return redirect(f"{reverse('search_posts')}?{urlencode({'q': query})}")
+        users = search_users(request.user, query).object_list
 
-        posts = list(posts_queryset)
+        posts = posts_page.object_list
         
         posts_data = PostListSerializer(posts, many=True, context={'request': request}).data
         attach_poll_data_to_posts(posts, posts_data)
-        users_data = UserSerializer(users_queryset, many=True, context={'request': request}).data
+        users_data = UserSerializer(users, many=True, context={'request': request}).data
         
         context = {
             'posts': posts,
-            'users': users_queryset,
+            'users': users,
             'posts_data': posts_data,
             'users_data': users_data,
-            'query': query
+            'query': query,
+            'next_cursor': posts_page.next_cursor,
         }
         
         if request.user.is_authenticated:
@@ -47,6 +47,21 @@ app.conf.beat_schedule = {
         'schedule': 60.0 * 60,  # Every 60 minutes
         'options': {'queue': 'grades', 'routing_key': 'grades.trigger'}
     },
+    'recompute-hot-scores': {
+        'task': 'forum.tasks.recompute_hot_scores',
+        'schedule': 60.0 * 5,  # Every 5 minutes; only touched posts are rescored
+        'options': {'queue': 'low', 'routing_key': 'low.ranking'}
+    },
+    'flush-post-views': {
+        'task': 'forum.tasks.flush_post_views',
+        'schedule': 60.0,  # Every minute; detail views only buffer counts in Redis
+        'options': {'queue': 'low', 'routing_key': 'low.views'}
+    },
+    'trim-timelines': {
+        'task': 'forum.tasks.trim_timelines',
+        'schedule': 60.0 * 60 * 24,  # Daily; fan-out adds an entry per post and audience member
+        'options': {'queue': 'low', 'routing_key': 'low.timelines'}
+    },
     # Alternative: Use batched approach (comment out above and uncomment below)
     # 'check-all-user-grades-batched': {
     #     'task': 'forum.tasks.check_user_grades_batched_dispatch',
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
     'forum',
     'storages',
     'django_editorjs_fields',
@@ -163,6 +164,17 @@ else:
     }
     print("Django cache configured with dummy backend (no Redis)")
 
+# Count a user's repeat views of a post within a day only once (buffered views need Redis)
+POST_VIEWS_UNIQUE_PER_USER = os.getenv('POST_VIEWS_UNIQUE_PER_USER', 'False') == 'True'
+
+# Post search backend (see forum/services/search_backends.py). The SQLite FTS5 backend keeps a
+# shadow index of post text in SEARCH_FTS5_PATH (in memory by default).
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'forum.services.search_backends.PostgresSearchBackend')
+SEARCH_BACKEND_OPTIONS = (
+    {'path': os.getenv('SEARCH_FTS5_PATH', ':memory:')}
+    if SEARCH_BACKEND.endswith('SQLiteFTS5SearchBackend') else {}
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -37,7 +37,8 @@ from forum.views.post_views import (
     follow_post,
     unfollow_post,
     vote_on_poll,
-    remove_poll_vote
+    remove_poll_vote,
+    poll_results_tally
 )
 
 from forum.views.feed_views import (
@@ -171,10 +172,16 @@ from forum.api.posts import (
     follow_post_api,
     unfollow_post_api,
     get_post_share_info_api,
+    related_posts_api,
+    related_posts_suggest_api,
     for_you_api, all_posts_api,
     vote_on_poll_api,
     remove_poll_vote_api,
-    search_posts_api
+    poll_voters_api,
+    search_posts_api,
+    search_api,
+    search_suggest_api,
+    search_cache_stats_api
 )
 
 from forum.api.solutions import (
@@ -221,6 +228,7 @@ urlpatterns = [
     path('posts/<int:post_id>/unlike/', unlike_post, name='unlike_post'),
     path('post/<int:post_id>/vote/', vote_on_poll, name='vote_on_poll'),
     path('post/<int:post_id>/remove-vote/', remove_poll_vote, name='remove_poll_vote'),
+    path('post/<int:post_id>/poll/tally/', poll_results_tally, name='poll_results_tally'),
 
     path('solution/<int:solution_id>/edit/', edit_solution, name='edit_solution'),
     path('solution/<int:solution_id>/delete/', delete_solution, name='delete_solution'),
@@ -347,11 +355,17 @@ urlpatterns = [
     path('api/posts/<int:post_id>/follow/', follow_post_api, name='api_follow_post'),
     path('api/posts/<int:post_id>/unfollow/', unfollow_post_api, name='api_unfollow_post'),
     path('api/posts/<int:post_id>/share/', get_post_share_info_api, name='api_post_share_info'),
+    path('api/posts/<int:post_id>/related/', related_posts_api, name='api_related_posts'),
+    path('api/posts/related/', related_posts_suggest_api, name='api_related_posts_suggest'),
     
     # Poll voting API endpoints
     path('api/posts/<int:post_id>/vote/', vote_on_poll_api, name='api_vote_on_poll'),
     path('api/posts/<int:post_id>/remove-vote/', remove_poll_vote_api, name='api_remove_poll_vote'),
+    path('api/posts/<int:post_id>/poll/voters/', poll_voters_api, name='api_poll_voters'),
     path('api/search-posts/', search_posts_api, name='api_search_posts'),
+    path('api/search/', search_api, name='api_search'),
+    path('api/search/suggest/', search_suggest_api, name='api_search_suggest'),
+    path('api/search/cache-stats/', search_cache_stats_api, name='api_search_cache_stats'),
     
     # Solution API endpoints
     path('api/posts/<int:post_id>/solutions/create/', create_solution_api, name='api_create_solution'),